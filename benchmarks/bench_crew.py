@@ -0,0 +1,473 @@
+"""
+Offline, reproducible benchmark of every tool and the full crew.
+
+    python benchmarks/bench_crew.py [--rounds 5] [--crew-rounds 2] [--skip-crew]
+                                    [--only stage,...] [--llm-latency 0.0]
+                                    [--baseline results/bench-....json] [--threshold 0.2]
+                                    [--fail-on-regression] [--keep]
+
+Nothing leaves the machine. LLM completions are answered by the fake
+OpenAI server from fixtures/llm.json, Yahoo quotes, fundamentals, earnings
+and closes come from fixtures/market.json through StaticProvider, and the
+filing search and IR pages are served from fixtures/html by a local site
+that honours ETags like a real one. Embeddings use the hash backend and
+speech the silent engine. Caches, Chroma and the price store live in a
+temporary directory, so round 1 of each stage is cold and later rounds are
+warm.
+
+Each stage reports cold latency, p50/p95/mean over the warm rounds,
+throughput, and, from one extra traced run, the tracemalloc peak and the
+number of memory blocks allocated during the stage that were still alive
+afterwards. crew_build and crew_copy compare building a crew from scratch
+with copying the per-process prototype, and the import and prototype
+build times are recorded as startup. Results are written to benchmarks/results/ as JSON and
+compared with the previous run (or --baseline).
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from datetime import datetime
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(ROOT, "fixtures")
+RESULTS_DIR = os.getenv("BENCH_RESULTS_DIR", os.path.join(ROOT, "results"))
+PACKAGE_DIR = os.path.join(ROOT, "..", "src", "building_a_multi_agent_finance_assistant_with_voice_interaction")
+
+sys.path.insert(0, PACKAGE_DIR)
+
+from fake_llm import FakeLLMServer, default_responder
+
+
+def load_fixture(name: str) -> dict:
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ----- replayed LLM -----
+
+class FixtureResponder:
+    """
+    Answers tool prompts from the recorded completions and drives each agent
+    through one scripted ReAct exchange: call its own tool, then answer.
+    Prompts with no recording fall back to the canned responder and are counted.
+    """
+
+    def __init__(self, fixtures: dict):
+        self.completions = fixtures["completions"]
+        self.agents = fixtures["agents"]
+        self.query = fixtures["query"]
+        self.brief = fixtures["brief"]
+        self.unmatched = 0
+        self._lock = threading.Lock()
+
+    def _fill(self, value):
+        if isinstance(value, dict):
+            return {key: self._fill(item) for key, item in value.items()}
+        return str(value).replace("{query}", self.query).replace("{brief}", self.brief)
+
+    def _agent(self, prompt: str) -> str:
+        for tool, script in self.agents.items():
+            if f"Tool Name: {tool}" not in prompt:
+                continue
+            if f"Action: {tool}" in prompt:
+                return f"Thought: I now know the final answer\nFinal Answer: {self._fill(script['answer'])}"
+            return (f"Thought: I should use the {tool} tool.\nAction: {tool}\n"
+                    f"Action Input: {json.dumps(self._fill(script['input']))}")
+        return f"Thought: I now know the final answer\nFinal Answer: {self.brief}"
+
+    def __call__(self, prompt: str) -> str:
+        lowered = prompt.lower()
+        # Only crewAI's agent prompts carry the ReAct format instructions
+        if "final answer:" in lowered:
+            return self._agent(prompt)
+        for entry in self.completions:
+            if all(part.lower() in lowered for part in entry["match"]):
+                return entry["response"]
+        with self._lock:
+            self.unmatched += 1
+        return default_responder(prompt)
+
+
+# ----- replayed web -----
+
+class FixtureSite:
+    """
+    Local stand-in for the filing search engine and IR sites. /search picks a
+    results page by query keyword; other paths are files under fixtures/html.
+    Pages carry an ETag and answer If-None-Match with 304.
+    """
+
+    def __init__(self, root: str = os.path.join(FIXTURES, "html"), host: str = "127.0.0.1", port: int = 0):
+        self.root = os.path.realpath(root)
+        with open(os.path.join(self.root, "pages.json"), "r", encoding="utf-8") as f:
+            self.pages = json.load(f)
+        self.requests = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def search_url(self) -> str:
+        return f"{self.base_url}/search?q={{query}}"
+
+    def _page(self, path: str, query: str) -> str:
+        if path == "/search":
+            terms = " ".join(parse_qs(query).get("q", [""])).lower()
+            for keyword, page in self.pages["search"].items():
+                if keyword in terms:
+                    return page
+            return self.pages["default"]
+        return path.lstrip("/")
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                parsed = urlparse(self.path)
+                path = os.path.realpath(os.path.join(site.root, site._page(parsed.path, parsed.query)))
+                if not path.startswith(site.root + os.sep) or not os.path.isfile(path):
+                    self.send_error(404)
+                    return
+
+                with open(path, "rb") as f:
+                    body = f.read()
+                etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    with site._lock:
+                        site.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self) -> "FixtureSite":
+        threading.Thread(target=self._server.serve_forever, name="fixture-site", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# ----- replayed market data -----
+
+def market_provider(fixtures: dict):
+    """StaticProvider over the recorded Yahoo data, closes re-dated to end on the last business day."""
+    import pandas as pd
+    from tools.market_data import StaticProvider
+
+    last_session = pd.Timestamp.now().normalize() - pd.offsets.BDay(1)
+    history = {}
+    for symbol, closes in fixtures["closes"].items():
+        dates = pd.bdate_range(end=last_session, periods=len(closes))
+        history[symbol] = {date.strftime("%Y-%m-%d"): close for date, close in zip(dates, closes)}
+    return StaticProvider(fixtures["quotes"], fundamentals=fixtures["fundamentals"],
+                          history=history, earnings=fixtures["earnings"])
+
+
+def configure(workdir: str, llm_url: str, site: FixtureSite):
+    """Points every module at the fixtures and the scratch directory. Must run before any tool import."""
+    os.environ.update({
+        "FINANCE_CACHE_DIR": os.path.join(workdir, "cache"),
+        "CHROMA_PATH": os.path.join(workdir, "chroma"),
+        "TRACE_EXPORT_PATH": os.path.join(workdir, "spans.jsonl"),
+        "USER_PREFERENCES_PATH": os.path.join(FIXTURES, "user_preference.txt"),
+        "FILING_SEARCH_URL": site.search_url,
+        "LLM_BASE_URL": llm_url,
+        "OPENAI_API_BASE": llm_url,
+        "OPENAI_BASE_URL": llm_url,
+        "OPENAI_API_KEY": "bench",
+        "SERPER_API_KEY": "bench",
+        "EMBEDDINGS_BACKEND": "hash",
+        "TTS_ENGINE": "silent",
+        "PRICE_STORE_ENABLED": "1",
+        "BRIEF_SCHEDULER": "0",
+        "CREWAI_DISABLE_TELEMETRY": "true",
+        "OTEL_SDK_DISABLED": "true",
+        "LITELLM_LOCAL_MODEL_COST_MAP": "True",
+        "NO_PROXY": "127.0.0.1,localhost",
+    })
+
+
+def seed(market: dict):
+    """Installs the replayed Yahoo provider and symbol lookups."""
+    from tools.market_data import engine
+    from tools import entities
+
+    engine.provider = market_provider(market)
+    for key, resolved in market["symbols"].items():
+        entities._symbol_cache.set(key, resolved)
+    return engine.provider
+
+
+# ----- measurement -----
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1))]
+
+
+def measure(name: str, fn, rounds: int, detail: bool = False) -> dict:
+    """
+    Runs `fn` `rounds` times for latency (round 1 traced for per-stage
+    counters), then once more under tracemalloc for memory. Timed rounds
+    never run with tracemalloc on, since it slows allocation-heavy code.
+    """
+    from tools import tracing
+
+    print(f"⏱️ {name}: {rounds} round(s)")
+    timings, errors, trace_summary = [], 0, None
+    for i in range(rounds):
+        start = time.perf_counter()
+        try:
+            if i == 0:
+                with tracing.trace(name) as root:
+                    fn()
+                trace_summary = tracing.summarize(root) if root is not None else None
+            else:
+                fn()
+        except Exception as e:
+            errors += 1
+            print(f"Error in stage {name}: {str(e)}")
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+    except Exception as e:
+        print(f"Error in stage {name} (memory run): {str(e)}")
+    _, peak = tracemalloc.get_traced_memory()
+    stats = tracemalloc.take_snapshot().statistics("lineno")
+    tracemalloc.stop()
+
+    warm = timings[1:] or timings
+    result = {
+        "rounds": rounds,
+        "errors": errors,
+        "cold_ms": round(timings[0] * 1000, 2),
+        "p50_ms": round(percentile(warm, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(warm, 0.95) * 1000, 2),
+        "mean_ms": round(sum(warm) / len(warm) * 1000, 2),
+        "throughput_per_s": round(len(warm) / sum(warm), 2) if sum(warm) else None,
+        "peak_kib": round(peak / 1024, 1),
+        "retained_blocks": sum(stat.count for stat in stats),
+        "top_allocations": [
+            {"site": str(stat.traceback), "kib": round(stat.size / 1024, 1), "blocks": stat.count}
+            for stat in stats[:3]
+        ],
+        "counters": trace_summary["totals"] if trace_summary else {},
+    }
+    if detail and trace_summary:
+        result["by_kind"] = trace_summary["by_kind"]
+        result["critical_path"] = trace_summary["critical_path"]
+    return result
+
+
+def tool_stages(query: str, brief: str) -> list:
+    """(name, callable) for every tool in isolation, in the order the crew uses them."""
+    from tools.custom_tool import (
+        ConfidenceCheckerTool, MarketDataResearcherTool, FilingScraperTool, RetrieverTool,
+        QuantitativeAnalystTool, LanguageNarratorTool, VoiceBroadcasterTool,
+    )
+    from tools.query_validator import validate_query
+    from tools.scheduler import warm_caches
+
+    return [
+        ("validate_query", lambda: validate_query(query)),
+        ("confidence_checker", lambda: ConfidenceCheckerTool()._run(query)),
+        ("market_data_researcher", lambda: MarketDataResearcherTool()._run(query)),
+        ("filing_scraper", lambda: FilingScraperTool()._run(query)),
+        # Indexes the scraped filings, so the retriever has documents to search
+        ("warm_caches", lambda: warm_caches([query])),
+        ("retriever", lambda: RetrieverTool()._run(query)),
+        ("quant_analyst", lambda: QuantitativeAnalystTool()._run(query)),
+        ("language_narrator", lambda: LanguageNarratorTool()._run(query)),
+        ("voice_broadcaster", lambda: VoiceBroadcasterTool()._run(brief)),
+    ]
+
+
+def crew_stages(query: str):
+    """
+    Crew construction with and without the per-process prototype, then the
+    full kickoff. Returns (startup timings, stages); importing crew.py is the
+    one-off cost every process pays first.
+    """
+    start = time.perf_counter()
+    from crew import BuildingAMultiAgentFinanceAssistantWithVoiceInteractionCrew, CachedCrew, crew_prototype
+    import_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    crew_prototype()
+    startup = {"import_crew_ms": round(import_ms, 1), "prototype_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    def kickoff():
+        CachedCrew().crew().kickoff(inputs={"query": query})
+    return startup, [
+        ("crew_build", lambda: BuildingAMultiAgentFinanceAssistantWithVoiceInteractionCrew().crew()),
+        ("crew_copy", lambda: CachedCrew().crew()),
+        ("crew", kickoff),
+    ]
+
+
+# ----- results -----
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def previous_result(directory: str = RESULTS_DIR):
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.startswith("bench-") and n.endswith(".json"))
+    except OSError:
+        return None
+    return os.path.join(directory, names[-1]) if names else None
+
+
+def save_result(result: dict, directory: str = RESULTS_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+def compare(current: dict, previous: dict, threshold: float) -> list:
+    """Prints one line per stage with deltas against `previous`; returns the regressed stage names."""
+    regressions = []
+    before = (previous or {}).get("stages", {})
+    print(f"\n{'stage':<24}{'cold':>10}{'p50':>10}{'p95':>10}{'ops/s':>9}{'peak KiB':>11}  vs previous")
+    for name, stage in current["stages"].items():
+        deltas = []
+        old = before.get(name)
+        if old:
+            for metric in ("p50_ms", "p95_ms", "peak_kib"):
+                if old.get(metric):
+                    change = (stage[metric] - old[metric]) / old[metric]
+                    deltas.append(f"{metric.split('_')[0]} {change:+.0%}")
+                    if change > threshold and metric != "peak_kib" and name not in regressions:
+                        regressions.append(name)
+        flag = "  ⚠️ regression" if name in regressions else ""
+        print(f"{name:<24}{stage['cold_ms']:>10.1f}{stage['p50_ms']:>10.1f}{stage['p95_ms']:>10.1f}"
+              f"{stage['throughput_per_s'] or 0:>9.1f}{stage['peak_kib']:>11.1f}  {', '.join(deltas) or '-'}{flag}")
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmark of the finance crew and its tools")
+    parser.add_argument("--rounds", type=int, default=5, help="Rounds per tool stage (round 1 is cold)")
+    parser.add_argument("--crew-rounds", type=int, default=2, help="Rounds of the full crew kickoff")
+    parser.add_argument("--skip-crew", action="store_true", help="Only benchmark the tools")
+    parser.add_argument("--only", default="", help="Comma-separated stage names to run")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the fake LLM waits per request")
+    parser.add_argument("--baseline", help="Result JSON to compare against (default: the previous run)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative p50/p95 slowdown that counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 when any stage regressed")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch cache directory")
+    args = parser.parse_args(argv)
+
+    llm_fixtures = load_fixture("llm.json")
+    market_fixtures = load_fixture("market.json")
+    only = {name.strip() for name in args.only.split(",") if name.strip()}
+    workdir = tempfile.mkdtemp(prefix="finance-bench-")
+
+    responder = FixtureResponder(llm_fixtures)
+    fake_llm = FakeLLMServer(responder, latency=args.llm_latency).start()
+    site = FixtureSite().start()
+    configure(workdir, fake_llm.base_url, site)
+    try:
+        provider = seed(market_fixtures)
+        query, brief = llm_fixtures["query"], llm_fixtures["brief"]
+
+        stages, startup = {}, {}
+        for name, fn in tool_stages(query, brief):
+            if not only or name in only:
+                stages[name] = measure(name, fn, args.rounds)
+        if not args.skip_crew:
+            startup, stages_of_crew = crew_stages(query)
+            for name, fn in stages_of_crew:
+                if not only or name in only:
+                    kickoff = name == "crew"
+                    stages[name] = measure(name, fn, args.crew_rounds if kickoff else args.rounds, detail=kickoff)
+
+        from tools.llm_gateway import gateway
+        result = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {"rounds": args.rounds, "crew_rounds": args.crew_rounds, "llm_latency": args.llm_latency},
+            "startup": startup,
+            "replay": {
+                "llm_requests": fake_llm.requests,
+                "llm_unmatched": responder.unmatched,
+                "llm_gateway": gateway.stats(),
+                "site_requests": site.requests,
+                "site_not_modified": site.not_modified,
+                "provider_calls": {"quotes": provider.quote_calls, "fundamentals": provider.fundamental_calls,
+                                   "history": provider.history_calls},
+            },
+            "stages": stages,
+        }
+    finally:
+        fake_llm.stop()
+        site.stop()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline_path = args.baseline or previous_result()
+    baseline = None
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    regressions = compare(result, baseline, args.threshold)
+    path = save_result(result)
+    if result["startup"]:
+        print(f"\n🧩 Startup: crew.py import {result['startup']['import_crew_ms']:.0f} ms, "
+              f"prototype build {result['startup']['prototype_ms']:.0f} ms")
+    print(f"\n💾 Results saved to {path}" + (f" (compared with {os.path.basename(baseline_path)})" if baseline_path else ""))
+    if result["replay"]["llm_unmatched"]:
+        print(f"⚠️ {result['replay']['llm_unmatched']} prompt(s) had no recorded completion; update fixtures/llm.json")
+    if regressions:
+        print(f"⚠️ Regressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
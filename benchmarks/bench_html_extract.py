@@ -0,0 +1,73 @@
+"""
+Compares the streaming HTML extractor against the old full BeautifulSoup
+parse over saved filing pages.
+
+    python benchmarks/bench_html_extract.py [page.html ...]
+
+With no arguments every *.html under benchmarks/fixtures/html/ is used, plus a
+synthetic 2 MB IR page, since the saved fixtures are only a few KB each.
+"""
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src",
+                                "building_a_multi_agent_finance_assistant_with_voice_interaction"))
+
+from bs4 import BeautifulSoup
+from tools.html_text import extract_text
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+BUDGET = 3000
+ROUNDS = 5
+
+
+def synthetic_page() -> str:
+    nav = "<nav>" + "".join(f"<a href='/ir/{i}'>Link {i}</a>" for i in range(300)) + "</nav>"
+    script = "<script>" + "var tracking = {};" * 2000 + "</script>"
+    body = "".join(
+        f"<section><h2>Quarter {i}</h2><p>Revenue grew {i % 17}% year on year while EPS came in "
+        f"at {1 + i / 100:.2f} against a consensus of {1 + i / 110:.2f}.</p></section>"
+        for i in range(12000)
+    )
+    return f"<html><head>{script}</head><body>{nav}{body}<footer>Legal</footer></body></html>"
+
+
+def measure(fn, html: str):
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(html)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings) * 1000, peak / 1024 / 1024
+
+
+def full_parse(html: str) -> str:
+    return BeautifulSoup(html, "html.parser").get_text()[:BUDGET]
+
+
+def streaming(html: str) -> str:
+    return extract_text(html, max_chars=BUDGET)
+
+
+def main():
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(FIXTURES, "**", "*.html"), recursive=True))
+    pages = [(os.path.basename(p), open(p, encoding="utf-8", errors="replace").read()) for p in paths]
+    if not sys.argv[1:]:
+        pages.append(("synthetic", synthetic_page()))
+
+    print(f"{'page':<30}{'size KB':>10}{'bs4 ms':>10}{'bs4 MB':>10}{'stream ms':>12}{'stream MB':>12}")
+    for name, html in pages:
+        bs4_ms, bs4_mb = measure(full_parse, html)
+        stream_ms, stream_mb = measure(streaming, html)
+        print(f"{name[:29]:<30}{len(html) / 1024:>10.0f}{bs4_ms:>10.1f}{bs4_mb:>10.1f}{stream_ms:>12.2f}{stream_mb:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Minimal OpenAI-compatible completion server for offline runs and benchmarks.
+
+    python benchmarks/fake_llm.py --port 8001 --latency 0.2
+    LLM_BASE_URL=http://127.0.0.1:8001/v1 streamlit run app.py
+
+Serves /v1/completions and /v1/chat/completions (plain and streamed) with
+deterministic answers, so cache and coalescing behaviour can be measured
+without network access or API keys.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import argparse
+import json
+import time
+
+CANNED_BRIEF = (
+    "Asia tech exposure is up modestly from yesterday. TSMC beat estimates by four percent, "
+    "while Samsung missed by two percent. Regional sentiment is neutral with a cautious tilt."
+)
+
+
+def default_responder(prompt: str) -> str:
+    """Picks a plausible, fixed answer for each prompt the tools send."""
+    lowered = prompt.lower()
+    if "compliance officer" in lowered:
+        return json.dumps({
+            "is_finance": True, "is_ethical": True, "confidence": 85,
+            "reason": "Clear financial question.", "suggestions": [],
+        })
+    if "rate" in lowered and ("1-10" in lowered or "scale from 1 to 10" in lowered):
+        return "8"
+    if "extract company names" in lowered:
+        return "TSM, 005930.KS"
+    if "suggest 3 ways" in lowered:
+        return "Name the company; Give a time frame; State the metric you care about"
+    if "summarize" in lowered:
+        return "EPS beat consensus by 4%; revenue up 12% year on year; guidance raised; tone confident."
+    return CANNED_BRIEF
+
+
+class FakeLLMServer:
+    """Threaded fake endpoint; `responder(prompt) -> str` decides every answer."""
+
+    def __init__(self, responder=None, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.responder = responder or default_responder
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                chat = self.path.endswith("/chat/completions")
+                if not chat and not self.path.endswith("/completions"):
+                    self.send_error(404)
+                    return
+
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if chat:
+                    prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+                else:
+                    prompt = body.get("prompt", "")
+                    prompt = "\n".join(prompt) if isinstance(prompt, list) else prompt
+                text = server.responder(prompt)
+                usage = {
+                    "prompt_tokens": len(prompt.split()),
+                    "completion_tokens": len(text.split()),
+                    "total_tokens": len(prompt.split()) + len(text.split()),
+                }
+                model = body.get("model", "fake")
+
+                if body.get("stream"):
+                    self._stream(text, chat, model)
+                    return
+
+                if chat:
+                    choice = {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}
+                    payload = {"id": "fake", "object": "chat.completion", "created": int(time.time()),
+                               "model": model, "choices": [choice], "usage": usage}
+                else:
+                    choice = {"index": 0, "text": text, "logprobs": None, "finish_reason": "stop"}
+                    payload = {"id": "fake", "object": "text_completion", "created": int(time.time()),
+                               "model": model, "choices": [choice], "usage": usage}
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, text: str, chat: bool, model: str):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for word in text.split(" "):
+                    piece = word + " "
+                    if chat:
+                        choice = {"index": 0, "delta": {"content": piece}, "finish_reason": None}
+                        chunk = {"id": "fake", "object": "chat.completion.chunk", "model": model, "choices": [choice]}
+                    else:
+                        choice = {"index": 0, "text": piece, "logprobs": None, "finish_reason": None}
+                        chunk = {"id": "fake", "object": "text_completion", "model": model, "choices": [choice]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+
+        return Handler
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible completion server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    args = parser.parse_args()
+
+    fake = FakeLLMServer(latency=args.latency, port=args.port)
+    print(f"🧪 Fake LLM listening on {fake.base_url}")
+    fake._server.serve_forever()
@@ -0,0 +1,186 @@
+"""
+Load test for the HTTP API (api.py): many desk users asking for briefs at once.
+
+    python benchmarks/loadtest_api.py [--requests 40] [--concurrency 10] [--distinct 4]
+                                      [--workers 2] [--queue-size 8] [--llm-latency 0.05]
+                                      [--retry] [--no-voice] [--url http://127.0.0.1:8000]
+
+Without --url the API is started in-process on a free port with the same
+offline fixtures as bench_crew.py (fake LLM, replayed Yahoo data, local
+filing site), so the run needs no network or keys; --workers and
+--queue-size size its CrewPool. With --url an already running server is
+targeted as-is.
+
+Every request POSTs /brief and then follows /brief/{id}/events until
+"done", recording time to first streamed token and to the finished brief.
+429 responses count as backpressure; with --retry the client honours
+Retry-After and tries again.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+import bench_crew
+from bench_crew import percentile
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_offline_server(args, workdir: str):
+    """Fixture-backed API on a local port; returns (base_url, stop)."""
+    llm_fixtures = bench_crew.load_fixture("llm.json")
+    fake_llm = bench_crew.FakeLLMServer(bench_crew.FixtureResponder(llm_fixtures), latency=args.llm_latency).start()
+    site = bench_crew.FixtureSite().start()
+    bench_crew.configure(workdir, fake_llm.base_url, site)
+    os.environ["API_WORKERS"] = str(args.workers)
+    os.environ["API_QUEUE_SIZE"] = str(args.queue_size)
+    bench_crew.seed(bench_crew.load_fixture("market.json"))
+
+    import uvicorn
+    from api import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="api", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("API server failed to start")
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join(timeout=30)
+        fake_llm.stop()
+        site.stop()
+    return f"http://127.0.0.1:{port}", stop
+
+
+async def one_brief(client: httpx.AsyncClient, query: str, voice: bool, retry: bool) -> dict:
+    start = time.perf_counter()
+    outcome = {"status": None, "attempts": 0, "ttft_ms": None, "latency_ms": None}
+    while True:
+        outcome["attempts"] += 1
+        response = await client.post("/brief", json={"query": query, "voice": voice})
+        if response.status_code == 429 and retry:
+            await asyncio.sleep(min(float(response.headers.get("Retry-After", "1")), 5.0))
+            continue
+        break
+
+    if response.status_code == 429:
+        outcome["status"] = "rejected"
+        return outcome
+    if response.status_code == 200:
+        outcome["status"] = "cached"
+        outcome["latency_ms"] = (time.perf_counter() - start) * 1000
+        return outcome
+    if response.status_code != 202:
+        outcome["status"] = f"http_{response.status_code}"
+        return outcome
+
+    job = response.json()
+    event = None
+    async with client.stream("GET", job["links"]["events"]) as events:
+        async for line in events.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+                if event == "token" and outcome["ttft_ms"] is None:
+                    outcome["ttft_ms"] = (time.perf_counter() - start) * 1000
+            elif line.startswith("data: ") and event == "done":
+                outcome["status"] = "done" if json.loads(line[len("data: "):]).get("status") == "done" else "error"
+                break
+    outcome["latency_ms"] = (time.perf_counter() - start) * 1000
+    outcome["status"] = outcome["status"] or "error"
+    return outcome
+
+
+def summarize(outcomes: list, wall: float) -> dict:
+    by_status = {}
+    for outcome in outcomes:
+        by_status[outcome["status"]] = by_status.get(outcome["status"], 0) + 1
+    served = [o["latency_ms"] for o in outcomes if o["status"] in ("done", "cached")]
+    first_tokens = [o["ttft_ms"] for o in outcomes if o["ttft_ms"] is not None]
+    summary = {
+        "requests": len(outcomes),
+        "outcomes": by_status,
+        "retries": sum(o["attempts"] - 1 for o in outcomes),
+        "wall_s": round(wall, 2),
+        "throughput_per_s": round(len(served) / wall, 2) if wall else None,
+    }
+    if served:
+        summary["latency_ms"] = {"p50": round(percentile(served, 0.5), 1), "p95": round(percentile(served, 0.95), 1),
+                                 "max": round(max(served), 1)}
+    if first_tokens:
+        summary["first_token_ms"] = {"p50": round(percentile(first_tokens, 0.5), 1),
+                                     "p95": round(percentile(first_tokens, 0.95), 1)}
+    return summary
+
+
+async def run_load(base_url: str, args, query: str) -> dict:
+    queries = [query] + [f"{query} Focus on desk {k}." for k in range(1, args.distinct)]
+    limit = asyncio.Semaphore(args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        async def worker(i):
+            async with limit:
+                try:
+                    return await one_brief(client, queries[i % len(queries)], not args.no_voice, args.retry)
+                except httpx.HTTPError as e:
+                    print(f"Error in request {i}: {str(e)}")
+                    return {"status": "error", "attempts": 1, "ttft_ms": None, "latency_ms": None}
+
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(worker(i) for i in range(args.requests)))
+        summary = summarize(outcomes, time.perf_counter() - start)
+        summary["server"] = (await client.get("/health")).json()
+    return summary
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the brief API")
+    parser.add_argument("--url", help="Target an already running server instead of an offline in-process one")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=10, help="Clients in flight at once")
+    parser.add_argument("--distinct", type=int, default=4, help="How many different queries the clients ask")
+    parser.add_argument("--workers", type=int, default=2, help="Offline server: crew workers")
+    parser.add_argument("--queue-size", type=int, default=8, help="Offline server: queued briefs before 429")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Offline server: seconds per fake LLM call")
+    parser.add_argument("--retry", action="store_true", help="Retry 429s after Retry-After")
+    parser.add_argument("--no-voice", action="store_true", help="Skip audio synthesis")
+    parser.add_argument("--output", help="Also write the summary JSON here")
+    args = parser.parse_args(argv)
+
+    query = bench_crew.load_fixture("llm.json")["query"]
+    stop = None
+    workdir = tempfile.mkdtemp(prefix="finance-loadtest-")
+    base_url = args.url
+    if base_url is None:
+        base_url, stop = start_offline_server(args, workdir)
+    try:
+        summary = asyncio.run(run_load(base_url, args, query))
+    finally:
+        if stop is not None:
+            stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
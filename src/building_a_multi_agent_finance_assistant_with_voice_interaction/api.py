@@ -0,0 +1,256 @@
+"""
+Headless HTTP API for the morning brief assistant.
+
+    uvicorn api:app --port 8000          (from this directory)
+    python main.py serve
+
+POST /validate   {"query"}                  -> validation verdict
+POST /brief      {"query", "voice", "wait"} -> 202 + job links, 200 when cached or finished within
+                                               BRIEF_WAIT_SECONDS with wait=true, 422 when the query
+                                               is rejected, 429 when the queue is full
+GET  /brief/{id}                             -> job status and result
+GET  /brief/{id}/events                      -> server-sent events: queued, started, token,
+                                               segment_end, result, audio, error, done
+GET  /audio/{id}                             -> the brief's audio
+POST /audio      {"text"}                    -> speech for arbitrary text
+GET  /health                                 -> pool and cache statistics
+
+Tools, vector stores and API clients are module-level singletons, so they
+stay warm across requests; crews are copies of one prototype built at
+startup and run on the bounded CrewPool.
+"""
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import json
+import math
+import os
+
+from crew import CachedCrew, crew_prototype, crew_prototype_stats
+from tools.crew_pool import CrewPool, PoolFull
+from tools.query_validator import validate_query
+from tools.response_cache import response_cache
+from tools.audio_cache import audio_cache
+from tools.tts import get_engine, synthesize
+from tools.llm_gateway import gateway
+from tools.index_queue import index_queue
+from tools.market_data import engine as market_engine
+from tools.vector_store import get_vectordb
+
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+SSE_KEEPALIVE_SECONDS = 15
+# Longest a wait=true request is held before it gets the 202 job links instead
+BRIEF_WAIT_SECONDS = float(os.getenv("BRIEF_WAIT_SECONDS", "120"))
+WAIT_POLL_SECONDS = 1
+AUDIO_MEDIA_TYPES = {"mp3": "audio/mpeg", "wav": "audio/wav"}
+MIN_CONFIDENCE = 50
+
+pool = CrewPool(CachedCrew)
+
+
+def warm_up():
+    """Builds the crew prototype and opens the shared stores and clients before the first request has to."""
+    crew_prototype()
+    get_vectordb()
+    response_cache.stats()
+    get_engine()
+    gateway.client
+    print(f"🔥 API ready: {pool.workers} worker(s), capacity {pool.capacity}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(warm_up)
+    yield
+    pool.shutdown(wait=False)
+    index_queue.flush()
+    gateway.close()
+
+
+app = FastAPI(title="Morning Market Brief API", lifespan=lifespan)
+
+
+class QueryRequest(BaseModel):
+    query: str = Field(..., min_length=1, description="Financial question.")
+
+
+class BriefRequest(QueryRequest):
+    voice: bool = Field(True, description="Also synthesize the brief as audio.")
+    wait: bool = Field(False, description="Hold the response until the brief is ready.")
+
+
+class AudioRequest(BaseModel):
+    text: str = Field(..., min_length=1, description="Text to speak.")
+
+
+def rejection(validation: dict):
+    """Why a validated query should not reach the crew, or None."""
+    if not validation["is_finance"]:
+        return "Not a finance-related query."
+    if not validation["is_ethical"]:
+        return "Query flagged as potentially unethical."
+    if validation.get("confidence", 0) < MIN_CONFIDENCE:
+        return "Low confidence in this query."
+    return None
+
+
+def cached_response(query: str):
+    try:
+        return response_cache.lookup(query)
+    except Exception as e:
+        print(f"Response cache unavailable: {str(e)}")
+        return None
+
+
+def job_or_404(job_id: str):
+    job = pool.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+def job_payload(job) -> dict:
+    return {
+        **job.to_dict(),
+        "links": {"self": f"/brief/{job.id}", "events": f"/brief/{job.id}/events", "audio": f"/audio/{job.id}"},
+    }
+
+
+async def follow(job, timeout: float = None):
+    """
+    Yields the job's events from the beginning, then live as the worker
+    publishes them, until "done". Yields None whenever `timeout` passes quietly.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def notify(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop already closed; the client is gone
+            pass
+
+    backlog = job.subscribe(notify)
+    try:
+        for item in backlog:
+            yield item
+            if item["event"] == "done":
+                return
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            yield item
+            if item["event"] == "done":
+                return
+    finally:
+        job.unsubscribe(notify)
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        "pool": pool.stats(),
+        "crew_prototype": crew_prototype_stats(),
+        "llm_gateway": gateway.stats(),
+        "market_data": market_engine.stats(),
+        "response_cache": response_cache.stats(),
+        "audio_cache": audio_cache.stats(),
+    }
+
+
+@app.post("/validate")
+async def validate(body: QueryRequest):
+    validation = await run_in_threadpool(validate_query, body.query)
+    reason = rejection(validation)
+    return {**validation, "accepted": reason is None, "rejection": reason}
+
+
+@app.post("/brief")
+async def brief(body: BriefRequest, request: Request):
+    validation = await run_in_threadpool(validate_query, body.query)
+    reason = rejection(validation)
+    if reason:
+        return JSONResponse(status_code=422, content={"error": reason, "validation": validation})
+
+    cached = await run_in_threadpool(cached_response, body.query)
+    if cached:
+        audio, audio_format = (cached["audio"], cached["audio_format"]) if body.voice else (None, None)
+        if body.voice and audio is None:
+            # Text-only entry from a voice=false job; voice the cached brief rather than rerun the crew
+            engine = get_engine()
+            audio, audio_format = await run_in_threadpool(synthesize, cached["brief"], engine), engine.format
+        job = pool.add_completed(body.query, cached["brief"], audio, audio_format)
+        return JSONResponse(status_code=200, content=job_payload(job))
+
+    try:
+        job = pool.submit(body.query, voice=body.voice)
+    except PoolFull as e:
+        return JSONResponse(
+            status_code=429,
+            content={"error": str(e), "pool": pool.stats()},
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+
+    if body.wait:
+        deadline = asyncio.get_running_loop().time() + BRIEF_WAIT_SECONDS
+        async for item in follow(job, timeout=WAIT_POLL_SECONDS):
+            if asyncio.get_running_loop().time() >= deadline:
+                break
+            if item is None and await request.is_disconnected():
+                break
+        if job.done.is_set():
+            return JSONResponse(status_code=200, content=job_payload(job))
+    return JSONResponse(status_code=202, content=job_payload(job))
+
+
+@app.get("/brief/{job_id}")
+async def brief_status(job_id: str):
+    return job_payload(job_or_404(job_id))
+
+
+@app.get("/brief/{job_id}/events")
+async def brief_events(job_id: str, request: Request):
+    job = job_or_404(job_id)
+
+    async def stream():
+        async for item in follow(job, timeout=SSE_KEEPALIVE_SECONDS):
+            if item is None:
+                if await request.is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {item['event']}\ndata: {json.dumps(item['data'])}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/audio/{job_id}")
+async def brief_audio(job_id: str):
+    job = job_or_404(job_id)
+    if not job.done.is_set():
+        return JSONResponse(status_code=409, content={"error": "Brief not ready yet", "status": job.status})
+    if job.audio is None:
+        raise HTTPException(status_code=404, detail="No audio for this brief")
+    return Response(content=job.audio, media_type=AUDIO_MEDIA_TYPES.get(job.audio_format, "application/octet-stream"))
+
+
+@app.post("/audio")
+async def speak(body: AudioRequest):
+    engine = get_engine()
+    audio = await run_in_threadpool(synthesize, body.text, engine)
+    return Response(content=audio, media_type=AUDIO_MEDIA_TYPES.get(engine.format, "application/octet-stream"))
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=API_HOST, port=API_PORT)
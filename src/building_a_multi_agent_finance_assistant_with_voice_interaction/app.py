@@ -3,16 +3,19 @@ import pysqlite3
 sys.modules["sqlite3"] = pysqlite3
 import sys
 import os
-import io
-import json
 import time
 import streamlit as st
-from io import BytesIO
-import requests
-from gtts import gTTS
 import assemblyai as aai
 
-from crew import BuildingAMultiAgentFinanceAssistantWithVoiceInteractionCrew
+from crew import CachedCrew, crew_prototype_stats
+from tools.response_cache import response_cache
+from tools.streaming import StreamSink, stream_to
+from tools.tts import SpeechPipeline, finish_speech, get_engine, synthesize
+from tools.audio_cache import audio_cache
+from tools.llm_gateway import gateway
+from tools import tracing
+from tools.portfolio import get_portfolio
+from tools.scheduler import scheduled_queries, start_background_scheduler
 
 # --------------------
 # Page config
@@ -36,6 +39,17 @@ os.environ["OPENAI_API_KEY"] = openai_api_key
 st.sidebar.header("🔧 Settings")
 record_query = st.sidebar.checkbox("🎤 Record voice input instead of typing?")
 voice_enabled = st.sidebar.checkbox("🔊 Enable voice output", value=True)
+st.sidebar.caption(f"Audio cache: {audio_cache.stats()}")
+st.sidebar.caption(f"LLM gateway: {gateway.stats()}")
+st.sidebar.caption(f"Crew prototype: {crew_prototype_stats()}")
+
+# Optional in-process scheduler: pre-computed briefs then share the app's in-memory caches
+@st.cache_resource
+def _brief_scheduler():
+    return start_background_scheduler(CachedCrew)
+
+if os.getenv("BRIEF_SCHEDULER", "0") == "1":
+    _brief_scheduler()
 
 # --------------------
 # AssemblyAI Transcription
@@ -49,57 +63,63 @@ def transcribe_audio_bytes(audio_bytes):
         raise RuntimeError(f"AssemblyAI transcription error: {e}")
 
 # --------------------
-# Gemini Query Validator with Suggestions
+# Query Validator with Suggestions
 # --------------------
-from openai import OpenAI
+# Rules settle obvious queries locally; only ambiguous ones reach the LLM.
 from dotenv import load_dotenv
-import os
-import json
+from tools.query_validator import validate_query
 
 load_dotenv()  # Loads variables from .env into os.environ
-client = OpenAI()  # Uses OPENAI_API_KEY from the environment
-
-def is_query_valid(query):
-    system_prompt = """
-You are a compliance officer for a financial assistant.
-
-Evaluate the following query and respond ONLY with JSON like:
-{
-  "is_finance": true,
-  "is_ethical": true,
-  "confidence": 42,
-  "reason": "Explain the confidence level briefly.",
-  "suggestions": [
-    "Improved version of the query suggestion 1",
-    "Improved version of the query suggestion 2"
-  ]
-}
-"""
-    user_prompt = f"Query: {query}"
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.3,
-            max_tokens=500,
-        )
-
-        text_response = response.choices[0].message.content.strip()
-        json_part = text_response[text_response.find("{"):text_response.rfind("}") + 1]
-        return json.loads(json_part)
-
-    except Exception as e:
-        return {
-            "is_finance": False,
-            "is_ethical": False,
-            "confidence": 0,
-            "reason": f"Validation failed: {e}",
-            "suggestions": []
-        }
+# --------------------
+# Live token streaming
+# --------------------
+class StreamlitSink(StreamSink):
+    """
+    Renders streamed narrator/broadcaster tokens into the page as they arrive.
+    With a speech pipeline, the broadcaster's answer is synthesized sentence by
+    sentence while it is still being written, and the first sentence starts
+    playing as soon as it is ready.
+    """
+
+    def __init__(self, speech: SpeechPipeline = None):
+        super().__init__()
+        self.container = st.container()
+        self.placeholder = None
+        self.buffer = ""
+        self.speech = speech
+        # Audio sits right under the live text: first sentence early, full brief at the end
+        self.audio_slot = st.empty() if speech is not None else None
+        self.previewed = False
+
+    @property
+    def speaks(self) -> bool:
+        return self.speech is not None
+
+    def on_token(self, token):
+        if self.placeholder is None:
+            self.placeholder = self.container.empty()
+        self.buffer += token
+        self.placeholder.markdown(self.buffer + " ▌")
+        self.preview_audio()
+
+    def on_segment_end(self):
+        if self.placeholder is not None:
+            self.placeholder.markdown(self.buffer)
+        self.placeholder = None
+        self.buffer = ""
+
+    def on_speech(self, text):
+        if self.speech is not None:
+            self.speech.feed(text)
+
+    def preview_audio(self):
+        if self.speech is None or self.previewed:
+            return
+        first_chunk = self.speech.first_chunk()
+        if first_chunk:
+            self.previewed = True
+            self.audio_slot.audio(first_chunk, format=f"audio/{self.speech.engine.format}")
 
 # --------------------
 # Main Input Section
@@ -127,7 +147,8 @@ if record_query:
             except Exception as e:
                 st.error(f"Transcription failed: {e}")
 else:
-    user_query = st.text_input("Enter your financial query")
+    morning_brief = st.selectbox("🌅 Morning briefs (pre-computed before market open)", ["", *scheduled_queries()])
+    user_query = st.text_input("Enter your financial query", value=morning_brief)
 
 # --------------------
 # Process Query
@@ -143,7 +164,8 @@ if st.button("🚀 Get Market Brief"):
         st.stop()
 
     st.info("🔍 Validating query...")
-    validation = is_query_valid(user_query)
+    validation = validate_query(user_query)
+    st.caption(f"Validated by {validation['tier']} in {validation['elapsed_ms']} ms")
 
     if not validation["is_finance"]:
         st.error("🛑 Not a finance-related query.")
@@ -178,35 +200,87 @@ if st.button("🚀 Get Market Brief"):
         # 🔊 Play voice response
         if voice_enabled:
             try:
-                tts = gTTS(text=voice_message, lang="en")
-                audio_io = io.BytesIO()
-                tts.write_to_fp(audio_io)
-                audio_io.seek(0)
+                engine = get_engine()
+                audio_bytes = synthesize(voice_message, engine)
                 st.markdown("### 🔊 Voice Explanation")
-                st.audio(audio_io, format="audio/mp3")
+                st.audio(audio_bytes, format=f"audio/{engine.format}")
             except Exception as e:
                 st.warning("🔇 Failed to synthesize voice.")
                 st.text(f"Error: {e}")
 
         st.stop()
 
+    # --------------------
+    # Semantic response cache
+    # --------------------
+    cached = None
+    try:
+        cached = response_cache.lookup(user_query)
+    except Exception as e:
+        st.text(f"Response cache unavailable: {e}")
+
+    if cached:
+        prepared = time.strftime("%H:%M", time.localtime(cached["created_at"])) if cached.get("created_at") else "earlier"
+        st.success(f"⚡ Served from cache (similarity {cached['similarity']}, prepared at {prepared})")
+        st.markdown("## 📊 Market Brief Result")
+        st.markdown(cached["brief"])
+
+        # Only the deltas since the brief was prepared are recomputed
+        try:
+            portfolio = get_portfolio()
+            portfolio.refresh()
+            st.markdown("### 🔄 Exposure change since yesterday (live)")
+            st.json(portfolio.exposure_change("region"))
+        except Exception as e:
+            st.text(f"Live exposure refresh unavailable: {e}")
+        if voice_enabled and cached["audio"]:
+            st.markdown("### 🔊 Voice Output")
+            st.audio(cached["audio"], format=f"audio/{cached['audio_format']}")
+        st.sidebar.caption(f"Response cache: {response_cache.stats()}")
+        st.stop()
+
     # --------------------
     # Run Multi-Agent Crew
     # --------------------
     st.info("🤖 Running multi-agent finance assistant...")
-    crew = BuildingAMultiAgentFinanceAssistantWithVoiceInteractionCrew()
-    result = crew.crew().kickoff(inputs={"query": user_query})
+    # Agents, tools and YAML are built once per process; each click gets a fresh copy
+    crew = CachedCrew()
+    st.markdown("### ✍️ Live Brief")
+    sink = StreamlitSink(SpeechPipeline(get_engine()) if voice_enabled else None)
+    with tracing.trace("kickoff", query=user_query) as root, stream_to(sink):
+        result = crew.crew().kickoff(inputs={"query": user_query})
+        usage = getattr(result, "token_usage", None)
+        if root is not None and usage is not None:
+            root.set(agent_prompt_tokens=usage.prompt_tokens, agent_completion_tokens=usage.completion_tokens)
     st.markdown("## 📊 Market Brief Result")
     st.markdown(str(result))
 
+    # --------------------
+    # Where the time went
+    # --------------------
+    if root is not None:
+        summary = tracing.summarize(root)
+        with st.expander(f"⏱️ Trace: {summary['wall_ms'] / 1000:.1f}s wall time", expanded=False):
+            st.markdown("**Critical path**")
+            st.table(summary["critical_path"])
+            st.markdown("**Time by stage kind** (summed, overlapping stages count twice)")
+            st.table([{"kind": kind, **values} for kind, values in summary["by_kind"].items()])
+            st.markdown("**Counters**")
+            st.json(summary["totals"])
+            st.caption(f"Trace {summary['trace_id']} exported to {tracing.TRACE_EXPORT_PATH}")
+
+    audio_bytes = None
     if voice_enabled:
-        st.markdown("### 🔊 Voice Output")
         try:
-            tts = gTTS(text=str(result), lang="en")
-            audio_io = io.BytesIO()
-            tts.write_to_fp(audio_io)
-            audio_io.seek(0)
-            st.audio(audio_io, format="audio/mp3")
+            # Most sentences were synthesized while the brief streamed in
+            audio_bytes = finish_speech(sink.speech, str(result))
+            sink.audio_slot.audio(audio_bytes, format=f"audio/{sink.speech.engine.format}")
         except Exception as e:
             st.warning("🔇 Failed to synthesize voice.")
             st.text(f"Error: {e}")
+
+    try:
+        response_cache.store_response(user_query, str(result), audio_bytes, get_engine().format)
+    except Exception as e:
+        st.text(f"Response cache unavailable: {e}")
+    st.sidebar.caption(f"Response cache: {response_cache.stats()}")
@@ -1,4 +1,4 @@
-from crewai import Agent, Crew, Process, Task
+from crewai import Agent, Crew, Process, Task, LLM
 from crewai.project import CrewBase, agent, task, crew
 from crewai_tools import SerperDevTool, ScrapeWebsiteTool, WebsiteSearchTool
 from tools.custom_tool import (
@@ -10,50 +10,136 @@ from tools.custom_tool import (
     LanguageNarratorTool,
     VoiceBroadcasterTool
 )
+from tools import streaming, tracing
+from tools.llm_gateway import LLM_BASE_URL
 import os
+import json
+import time
+import threading
+import functools
+import contextvars
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from crewai.tasks.task_output import TaskOutput
+from concurrent.futures import Future
 
 os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
 
+# "dag" runs tasks flagged async_execution in tasks.yaml concurrently,
+# "sequential" forces the original one-task-at-a-time chain.
+CREW_EXECUTION_MODE = os.getenv("CREW_EXECUTION_MODE", "dag")
+
+# Narrator and broadcaster push tokens to the active stream sink as they
+# are generated instead of only returning the finished answer.
+CREW_STREAMING = os.getenv("CREW_STREAMING", "1") == "1"
+CREW_MODEL = os.getenv("MODEL", "gpt-4o-mini")
+
+# Build agents, tools and YAML config once per process and hand out copies
+CREW_PROTOTYPE = os.getenv("CREW_PROTOTYPE", "1") == "1"
+
+_chat_lock = threading.Lock()
+_prototype = None
+_prototype_lock = threading.Lock()
+_prototype_stats = {"build_ms": None, "copies": 0, "last_copy_ms": None}
+
+try:
+    from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent
+except ImportError:
+    try:
+        from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+    except ImportError:
+        crewai_event_bus = None
+
+if crewai_event_bus is not None:
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def _forward_stream_chunk(source, event):
+        # `source` is the emitting LLM; the broadcaster's is flagged to be read aloud
+        spoken = getattr(source, "spoken", False) and not event.tool_call
+        streaming.emit(event.chunk, spoken=spoken)
+
+# Task, tool and agent-LLM spans for the active trace
+tracing.register_crewai_listeners()
+
+class ContextTask(Task):
+    """
+    Task whose async execution thread runs in a copy of the kickoff's context,
+    so its LLM tokens, tool spans and callbacks reach that kickoff's stream
+    sink and trace even while other kickoffs run concurrently.
+    """
+
+    def execute_async(self, agent=None, context=None, tools=None):
+        future = Future()
+        threading.Thread(
+            daemon=True,
+            target=contextvars.copy_context().run,
+            args=(self._execute_task_async, agent, context, tools, future),
+        ).start()
+        return future
+
+
+def print_task_output(output: TaskOutput, ctx=None):
+    """Task callback: closes the streamed segment and renders the chat history into the page of `ctx`."""
+    # Async tasks finish on worker threads; give them the UI session context
+    if ctx is not None and get_script_run_ctx() is None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+    streaming.end_segment()
+    # Headless runs (CLI, API server, benchmarks) have no page to render into
+    if ctx is None:
+        return
+    with _chat_lock:
+        render_chat(output)
+
+
+def render_chat(output: TaskOutput):
+    if "chat_history" not in st.session_state:
+        st.session_state.chat_history = []
+
+    clean_message = output.raw
+    if not isinstance(clean_message, str):
+        try:
+            clean_message = json.dumps(clean_message, indent=2)
+        except Exception:
+            clean_message = str(clean_message)
+
+    st.session_state.chat_history.append({
+        "agent": str(output.agent),
+        "message": clean_message
+    })
+
+    if "chat_placeholder" not in st.session_state:
+        st.session_state.chat_placeholder = st.empty()
+
+    with st.session_state.chat_placeholder.container():
+        with st.expander("📁 Chat History", expanded=True):
+            for chat in st.session_state.chat_history:
+                st.markdown(f"""
+                    <div style="border: 1px solid #ccc; border-radius: 10px; padding: 1rem; margin: 1rem 0;
+                                background-color: #e8f5e9; box-shadow: 0 2px 4px rgba(0, 0, 0, 0.05);">
+                        <div style="font-weight: bold; margin-bottom: 0.5rem; color: #2e7d32;">
+                            🧠 <span>{chat['agent']}</span>
+                        </div>
+                        <div style="white-space: pre-wrap; line-height: 1.6; color: #1b1b1b;">
+                            {chat['message']}
+                        </div>
+                    </div>
+                """, unsafe_allow_html=True)
+
+
 @CrewBase
 class BuildingAMultiAgentFinanceAssistantWithVoiceInteractionCrew:
 
     def print_output(self, output: TaskOutput):
-        import json
-
-        if "chat_history" not in st.session_state:
-            st.session_state.chat_history = []
-
-        clean_message = output.raw
-        if not isinstance(clean_message, str):
-            try:
-                clean_message = json.dumps(clean_message, indent=2)
-            except Exception:
-                clean_message = str(clean_message)
-
-        st.session_state.chat_history.append({
-            "agent": str(output.agent),
-            "message": clean_message
-        })
-
-        if "chat_placeholder" not in st.session_state:
-            st.session_state.chat_placeholder = st.empty()
-
-        with st.session_state.chat_placeholder.container():
-            with st.expander("📁 Chat History", expanded=True):
-                for chat in st.session_state.chat_history:
-                    st.markdown(f"""
-                        <div style="border: 1px solid #ccc; border-radius: 10px; padding: 1rem; margin: 1rem 0;
-                                    background-color: #e8f5e9; box-shadow: 0 2px 4px rgba(0, 0, 0, 0.05);">
-                            <div style="font-weight: bold; margin-bottom: 0.5rem; color: #2e7d32;">
-                                🧠 <span>{chat['agent']}</span>
-                            </div>
-                            <div style="white-space: pre-wrap; line-height: 1.6; color: #1b1b1b;">
-                                {chat['message']}
-                            </div>
-                        </div>
-                    """, unsafe_allow_html=True)
+        print_task_output(output, getattr(self, "_script_run_ctx", None))
+
+    def streaming_llm(self, spoken: bool = False):
+        """LLM for agents whose output should reach the UI token by token, and with `spoken` the listener too."""
+        if CREW_STREAMING:
+            llm = LLM(model=CREW_MODEL, stream=True, base_url=LLM_BASE_URL)
+            llm.spoken = spoken
+            return llm
+        return None
+
     @agent
     def confidence_checker(self) -> Agent:
         return Agent(
@@ -94,6 +180,7 @@ class BuildingAMultiAgentFinanceAssistantWithVoiceInteractionCrew:
         return Agent(
             config=self.agents_config['language_narrator'],
             tools=[LanguageNarratorTool()],
+            llm=self.streaming_llm(),
         )
 
     @agent
@@ -101,59 +188,64 @@ class BuildingAMultiAgentFinanceAssistantWithVoiceInteractionCrew:
         return Agent(
             config=self.agents_config['voice_financier'],
             tools=[VoiceBroadcasterTool()],
+            llm=self.streaming_llm(spoken=True),
         )
 
     @task
     def evaluate_prompt_confidence(self) -> Task:
-        return Task(
+        return ContextTask(
             config=self.tasks_config['check_prompt_task'],
             callback=self.print_output,
         )
 
     @task
     def poll_market_data(self) -> Task:
-        return Task(
+        return ContextTask(
             config=self.tasks_config['market_data_task'],
             callback=self.print_output,
         )
 
     @task
     def scrape_financial_filings(self) -> Task:
-        return Task(
+        return ContextTask(
             config=self.tasks_config['filing_scrape_task'],
             callback=self.print_output,
         )
 
     @task
     def retrieve_existing_knowledge(self) -> Task:
-        return Task(
+        return ContextTask(
             config=self.tasks_config['retrieve_existing_knowledge_task'],
             callback=self.print_output,
         )
 
     @task
     def perform_quantitative_analysis(self) -> Task:
-        return Task(
+        return ContextTask(
             config=self.tasks_config['quant_analysis_task'],
             callback=self.print_output,
         )
 
     @task
     def synthesize_narrative(self) -> Task:
-        return Task(
+        return ContextTask(
             config=self.tasks_config['narrate_market_brief_task'],
             callback=self.print_output,
         )
 
     @task
     def deliver_voice_response(self) -> Task:
-        return Task(
+        return ContextTask(
             config=self.tasks_config['broadcast_brief_task'],
             callback=self.print_output,
         )
 
     @crew
     def crew(self) -> Crew:
+        self._script_run_ctx = get_script_run_ctx()
+        if CREW_EXECUTION_MODE == "sequential":
+            for t in self.tasks:
+                t.async_execution = False
         return Crew(
             agents=self.agents,
             tasks=self.tasks,
@@ -161,3 +253,50 @@ class BuildingAMultiAgentFinanceAssistantWithVoiceInteractionCrew:
             verbose=True,
             memory=False,
         )
+
+
+def crew_prototype() -> Crew:
+    """
+    The process-wide crew that copies are made from. It is never kicked off,
+    so its tasks and agents keep a clean state.
+    """
+    global _prototype
+    with _prototype_lock:
+        if _prototype is None:
+            start = time.perf_counter()
+            _prototype = BuildingAMultiAgentFinanceAssistantWithVoiceInteractionCrew().crew()
+            _prototype_stats["build_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            print(f"🧩 Built crew prototype in {_prototype_stats['build_ms']:.0f} ms")
+        return _prototype
+
+
+def crew_prototype_stats() -> dict:
+    with _prototype_lock:
+        return dict(_prototype_stats)
+
+
+class CachedCrew:
+    """
+    Drop-in for BuildingAMultiAgentFinanceAssistantWithVoiceInteractionCrew():
+    `CachedCrew().crew()` returns a copy of the per-process prototype. Copies
+    get their own agents, tasks and executors but share the tool instances,
+    and task callbacks are re-bound to the caller's Streamlit page.
+    """
+
+    def crew(self) -> Crew:
+        ctx = get_script_run_ctx()
+        if not CREW_PROTOTYPE:
+            return BuildingAMultiAgentFinanceAssistantWithVoiceInteractionCrew().crew()
+
+        start = time.perf_counter()
+        try:
+            copied = crew_prototype().copy()
+        except Exception as e:
+            print(f"Error copying crew prototype, building a fresh crew: {str(e)}")
+            return BuildingAMultiAgentFinanceAssistantWithVoiceInteractionCrew().crew()
+        for copied_task in copied.tasks:
+            copied_task.callback = functools.partial(print_task_output, ctx=ctx)
+        with _prototype_lock:
+            _prototype_stats["copies"] += 1
+            _prototype_stats["last_copy_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return copied
@@ -1,6 +1,8 @@
 #!/usr/bin/env python
+import os
+import subprocess
 import sys
-from building_a_multi_agent_finance_assistant_with_voice_interaction.crew import BuildingAMultiAgentFinanceAssistantWithVoiceInteractionCrew
+from building_a_multi_agent_finance_assistant_with_voice_interaction.crew import BuildingAMultiAgentFinanceAssistantWithVoiceInteractionCrew, CachedCrew
 
 # This main file is intended to be a way for your to run your
 # crew locally, so refrain from adding unnecessary logic into this file.
@@ -53,6 +55,46 @@ def test():
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
 
+def schedule():
+    """
+    Pre-compute the morning brief ahead of daily_brief_time every weekday.
+    Pass --once to run immediately and exit.
+    """
+    from tools.scheduler import run_scheduler
+    try:
+        run_scheduler(CachedCrew, once="--once" in sys.argv)
+
+    except Exception as e:
+        raise Exception(f"An error occurred while scheduling the crew: {e}")
+
+def serve():
+    """
+    Serve the headless HTTP API (api.py) with concurrent crew workers.
+    """
+    import uvicorn
+    from api import app, API_HOST, API_PORT
+    try:
+        uvicorn.run(app, host=API_HOST, port=API_PORT)
+
+    except Exception as e:
+        raise Exception(f"An error occurred while serving the crew: {e}")
+
+def bench():
+    """
+    Benchmark every tool and the full crew offline against recorded fixtures.
+    Arguments are passed through to benchmarks/bench_crew.py (see --help).
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "benchmarks", "bench_crew.py")
+    args = sys.argv[2:] if sys.argv[1:2] == ["bench"] else sys.argv[1:]
+    # A fresh interpreter: fixture settings are read at import time and must never reach the real caches
+    try:
+        code = subprocess.call([sys.executable, script, *args])
+
+    except Exception as e:
+        raise Exception(f"An error occurred while benchmarking the crew: {e}")
+    if code:
+        sys.exit(code)
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: main.py <command> [<args>]")
@@ -67,6 +109,12 @@ if __name__ == "__main__":
         replay()
     elif command == "test":
         test()
+    elif command == "schedule":
+        schedule()
+    elif command == "serve":
+        serve()
+    elif command == "bench":
+        bench()
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)
@@ -0,0 +1,152 @@
+from tools.market_data import engine
+import numpy as np
+import pandas as pd
+import os
+
+TRADING_DAYS = 252
+VAR_CONFIDENCE = 0.95
+ANALYTICS_BENCHMARK = os.getenv("ANALYTICS_BENCHMARK", "^GSPC")
+HISTORY_PERIOD = os.getenv("ANALYTICS_HISTORY_PERIOD", "1y")
+
+
+def _clean(value, digits: int = 4):
+    """JSON-safe float: NaN and infinities become None."""
+    if value is None:
+        return None
+    value = float(value)
+    return round(value, digits) if np.isfinite(value) else None
+
+
+def daily_returns(prices: pd.DataFrame) -> pd.DataFrame:
+    """Simple close-to-close returns; the first row (no previous close) is dropped."""
+    return prices.sort_index().pct_change(fill_method=None).iloc[1:]
+
+
+def annualized_volatility(returns: pd.DataFrame) -> pd.Series:
+    return returns.std(ddof=1) * np.sqrt(TRADING_DAYS)
+
+
+def beta(returns: pd.DataFrame, benchmark_returns: pd.Series) -> pd.Series:
+    """Covariance with the benchmark over benchmark variance, one vectorized pass for all columns."""
+    aligned = returns.loc[benchmark_returns.index]
+    market = benchmark_returns - benchmark_returns.mean()
+    covariance = aligned.sub(aligned.mean()).mul(market, axis=0).sum() / (aligned.notna().sum() - 1)
+    return covariance / market.var(ddof=1)
+
+
+def max_drawdown(prices: pd.DataFrame) -> pd.Series:
+    """Largest peak-to-trough fall, as a negative fraction."""
+    return (prices / prices.cummax() - 1).min()
+
+
+def historical_var(returns: pd.DataFrame, confidence: float = VAR_CONFIDENCE) -> pd.Series:
+    """One-day historical Value at Risk, reported as a positive loss fraction."""
+    return -returns.quantile(1 - confidence, interpolation="lower")
+
+
+def eps_surprise(actual, estimate):
+    """Percent beat (positive) or miss (negative) against the consensus estimate."""
+    if actual is None or estimate is None or estimate == 0:
+        return None
+    return (actual - estimate) / abs(estimate) * 100
+
+
+def allocation_delta(weights: pd.Series, last_returns: pd.Series) -> pd.DataFrame:
+    """
+    How yesterday's weights drifted with the last bar: each weight grows by
+    its own return and the book is renormalized.
+    """
+    drifted = weights * (1 + last_returns.reindex(weights.index).fillna(0))
+    drifted = drifted / drifted.sum()
+    return pd.DataFrame({"previous": weights, "current": drifted, "delta": drifted - weights})
+
+
+def analyze(prices: pd.DataFrame, weights: dict = None, benchmark: pd.Series = None,
+            earnings: dict = None, confidence: float = VAR_CONFIDENCE) -> dict:
+    """
+    Deterministic risk and performance metrics for every column of `prices`
+    (a date x symbol frame of closes) plus the weighted portfolio. Weights
+    default to equal; `earnings` maps symbol -> {"eps_actual", "eps_estimate"}.
+    """
+    prices = prices.sort_index().dropna(axis=1, how="all")
+    if prices.empty or len(prices) < 2:
+        return {"as_of": None, "symbols": {}, "portfolio": {}}
+
+    earnings = earnings or {}
+    returns = daily_returns(prices)
+    last_returns = prices.ffill().iloc[-1] / prices.ffill().iloc[-2] - 1
+    volatility = annualized_volatility(returns)
+    drawdown = max_drawdown(prices)
+    var = historical_var(returns, confidence)
+    period_return = prices.ffill().iloc[-1] / prices.bfill().iloc[0] - 1
+
+    benchmark_returns = None
+    betas = pd.Series(np.nan, index=prices.columns)
+    if benchmark is not None and len(benchmark) > 2:
+        benchmark_returns = daily_returns(benchmark.to_frame("benchmark"))["benchmark"]
+        benchmark_returns = benchmark_returns.loc[benchmark_returns.index.intersection(returns.index)].dropna()
+        if len(benchmark_returns) > 2:
+            betas = beta(returns, benchmark_returns)
+
+    symbols = {}
+    for symbol in prices.columns:
+        info = earnings.get(symbol) or {}
+        symbols[symbol] = {
+            "return_1d": _clean(last_returns[symbol]),
+            "return_period": _clean(period_return[symbol]),
+            "annual_volatility": _clean(volatility[symbol]),
+            "beta": _clean(betas[symbol], 3),
+            "max_drawdown": _clean(drawdown[symbol]),
+            f"var_{int(confidence * 100)}": _clean(var[symbol]),
+            "eps_actual": _clean(info.get("eps_actual"), 3),
+            "eps_estimate": _clean(info.get("eps_estimate"), 3),
+            "eps_surprise_pct": _clean(eps_surprise(info.get("eps_actual"), info.get("eps_estimate")), 2),
+        }
+
+    if weights:
+        w = pd.Series(weights, dtype=float).reindex(prices.columns).fillna(0.0)
+    else:
+        w = pd.Series(1.0, index=prices.columns)
+    w = w / w.sum() if w.sum() else w
+
+    portfolio_returns = returns.fillna(0.0) @ w
+    portfolio_prices = (1 + portfolio_returns).cumprod()
+    deltas = allocation_delta(w, last_returns)
+    portfolio = {
+        "return_1d": _clean(portfolio_returns.iloc[-1]),
+        "return_period": _clean(portfolio_prices.iloc[-1] - 1),
+        "annual_volatility": _clean(portfolio_returns.std(ddof=1) * np.sqrt(TRADING_DAYS)),
+        "beta": None,
+        "max_drawdown": _clean((portfolio_prices / portfolio_prices.cummax() - 1).min()),
+        f"var_{int(confidence * 100)}": _clean(-portfolio_returns.quantile(1 - confidence, interpolation="lower")),
+        "allocation": {
+            symbol: {key: _clean(value) for key, value in row.items()}
+            for symbol, row in deltas.iterrows()
+        },
+    }
+    if benchmark_returns is not None and len(benchmark_returns) > 2:
+        portfolio["beta"] = _clean(beta(portfolio_returns.to_frame("portfolio"), benchmark_returns)["portfolio"], 3)
+
+    return {
+        "as_of": pd.Timestamp(prices.index[-1]).strftime("%Y-%m-%d"),
+        "observations": int(len(returns)),
+        "benchmark": benchmark.name if benchmark is not None else None,
+        "symbols": symbols,
+        "portfolio": portfolio,
+    }
+
+
+def analyze_symbols(symbols: list, weights: dict = None, benchmark: str = ANALYTICS_BENCHMARK,
+                    period: str = HISTORY_PERIOD) -> dict:
+    """Fetches history (benchmark included, one batch) and earnings, then runs `analyze`."""
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return analyze(pd.DataFrame())
+
+    prices = engine.history(symbols + ([benchmark] if benchmark else []), period)
+    benchmark_prices = None
+    if benchmark and benchmark in prices.columns:
+        benchmark_prices = prices[benchmark].dropna().rename(benchmark)
+        if benchmark not in symbols:
+            prices = prices.drop(columns=[benchmark])
+    return analyze(prices, weights=weights, benchmark=benchmark_prices, earnings=engine.earnings(symbols))
@@ -0,0 +1,103 @@
+from tools.cache import CACHE_DIR
+import threading
+import hashlib
+import json
+import os
+
+AUDIO_CACHE_DIR = os.path.join(CACHE_DIR, "tts")
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_MB", "200")) * 1024 * 1024
+
+
+class AudioCache:
+    """
+    Content-addressed store for synthesized speech. Files are named by
+    hash(text, voice, engine, language); a hit refreshes the file's mtime and
+    the least recently used files are evicted once max_bytes is exceeded.
+    """
+
+    def __init__(self, directory: str = AUDIO_CACHE_DIR, max_bytes: int = AUDIO_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes = None
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def key(text: str, voice: str, engine: str, language: str) -> str:
+        payload = json.dumps([" ".join(text.split()), voice, engine, language])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _index(self) -> dict:
+        # Sizes of everything on disk, built on first use
+        if self._sizes is None:
+            self._sizes = {}
+            if os.path.isdir(self.directory):
+                for root, _, files in os.walk(self.directory):
+                    for name in files:
+                        self._sizes[name] = os.path.getsize(os.path.join(root, name))
+        return self._sizes
+
+    def get(self, key: str):
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                self.misses += 1
+                return None
+            os.utime(path)
+            self.hits += 1
+            self.bytes_saved += len(data)
+            return data
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._index()[key] = len(data)
+            self._evict()
+
+    def _mtime(self, key: str) -> float:
+        try:
+            return os.path.getmtime(self._path(key))
+        except OSError:
+            return 0.0
+
+    def _evict(self):
+        sizes = self._index()
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = sorted(sizes, key=self._mtime)
+        for key in by_age:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            total -= sizes.pop(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "bytes_stored": sum(self._index().values()),
+            }
+
+
+audio_cache = AudioCache()
@@ -0,0 +1,63 @@
+import threading
+import json
+import time
+import os
+
+CACHE_DIR = os.getenv("FINANCE_CACHE_DIR", "./cache")
+
+
+class JsonFileCache:
+    """
+    Small key/value store persisted as a single JSON file.
+    Each entry carries its own expiry so different TTLs can share a file.
+    """
+
+    def __init__(self, filename: str, ttl: float):
+        self.path = os.path.join(CACHE_DIR, filename)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None or entry["expires_at"] < time.time():
+                return default
+            return entry["value"]
+
+    def set(self, key: str, value, ttl: float = None):
+        with self._lock:
+            data = self._load()
+            data[key] = {"value": value, "expires_at": time.time() + (ttl or self.ttl)}
+            self._save()
+
+    def items(self) -> list:
+        """Unexpired (key, value) pairs."""
+        with self._lock:
+            now = time.time()
+            return [(k, v["value"]) for k, v in self._load().items() if v["expires_at"] >= now]
+
+    def purge(self):
+        """Drop expired entries from disk."""
+        with self._lock:
+            now = time.time()
+            data = self._load()
+            for key in [k for k, v in data.items() if v["expires_at"] < now]:
+                del data[key]
+            self._save()
@@ -1,7 +1,7 @@
 from crewai_tools import tool
-from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAI
+from tools.llm_gateway import gateway
+from tools.vector_store import get_vectordb
+from tools.query_validator import cached_validation
 import json
 import os
 from dotenv import load_dotenv
@@ -9,8 +9,6 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-CHROMA_PATH = "./chroma"
-
 @tool("confidence_and_similarity_check")
 def check_prompt_confidence_and_similarity(query: str) -> str:
     """
@@ -23,12 +21,8 @@ def check_prompt_confidence_and_similarity(query: str) -> str:
     if not openai_api_key:
         raise EnvironmentError("Missing OPENAI_API_KEY in environment.")
 
-    # 1. Load vector store
-    embedding_model = OpenAIEmbeddings(openai_api_key=openai_api_key)
-    vectordb = Chroma(
-        persist_directory=CHROMA_PATH,
-        embedding_function=embedding_model
-    )
+    # 1. Load vector store (shared per process)
+    vectordb = get_vectordb()
 
     # 2. Semantic similarity search
     results = vectordb.similarity_search_with_score(query, k=1)
@@ -37,18 +31,22 @@ def check_prompt_confidence_and_similarity(query: str) -> str:
     else:
         similarity_score = 0.0
 
-    # 3. LLM-based prompt clarity scoring
-    llm = OpenAI(temperature=0, openai_api_key=openai_api_key)
-    clarity_prompt = (
-        f"Rate the clarity and specificity of the following market query on a scale from 1 to 10:\n"
-        f"{query}\n"
-        "Respond with a single number only."
-    )
-    response = llm.invoke(clarity_prompt)
-    try:
-        confidence_score = float(response.strip()) / 10.0
-    except ValueError:
-        confidence_score = 0.5
+    # 3. Prompt clarity: reuse query validation if it already scored this query
+    validation = cached_validation(query)
+    if validation is not None:
+        confidence_score = float(validation.get("confidence", 50)) / 100.0
+    else:
+        llm = gateway.llm(temperature=0)
+        clarity_prompt = (
+            f"Rate the clarity and specificity of the following market query on a scale from 1 to 10:\n"
+            f"{query}\n"
+            "Respond with a single number only."
+        )
+        response = llm.invoke(clarity_prompt)
+        try:
+            confidence_score = float(response.strip()) / 10.0
+        except ValueError:
+            confidence_score = 0.5
 
     # 4. Routing logic
     route_to_data_agents = confidence_score > 0.6 or similarity_score > 0.7
@@ -0,0 +1,252 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from tools.streaming import StreamSink, stream_to
+from tools.response_cache import response_cache
+from tools.tts import SpeechPipeline, finish_speech, get_engine
+from tools import tracing
+import threading
+import time
+import uuid
+import os
+
+API_WORKERS = int(os.getenv("API_WORKERS", "2"))
+API_QUEUE_SIZE = int(os.getenv("API_QUEUE_SIZE", "8"))
+API_JOB_HISTORY = int(os.getenv("API_JOB_HISTORY", "256"))
+DEFAULT_RUN_SECONDS = 60.0
+
+
+class PoolFull(Exception):
+    """Every worker is busy and the queue is at capacity."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Brief queue is full, retry in about {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def _normalize(query: str) -> str:
+    return " ".join(str(query).lower().split())
+
+
+class Job:
+    """One brief request: its state, its result and the event log streamed to subscribers."""
+
+    def __init__(self, query: str, voice: bool = True):
+        self.id = uuid.uuid4().hex
+        self.query = query
+        self.voice = voice
+        self.status = "queued"
+        self.cached = False
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.brief = None
+        self.audio = None
+        self.audio_format = None
+        self.error = None
+        self.trace = None
+        self.events = []
+        self.done = threading.Event()
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def publish(self, event: str, **data):
+        item = {"event": event, "data": data}
+        with self._lock:
+            self.events.append(item)
+            subscribers = list(self._subscribers)
+        for notify in subscribers:
+            notify(item)
+
+    def subscribe(self, notify) -> list:
+        """Calls `notify(item)` for every new event; returns the events published so far."""
+        with self._lock:
+            self._subscribers.append(notify)
+            return list(self.events)
+
+    def unsubscribe(self, notify):
+        with self._lock:
+            if notify in self._subscribers:
+                self._subscribers.remove(notify)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "query": self.query,
+            "status": self.status,
+            "cached": self.cached,
+            "queued_ms": round(((self.started_at or time.time()) - self.created_at) * 1000, 1)
+            if not self.cached else 0.0,
+            "run_ms": round((self.finished_at - self.started_at) * 1000, 1)
+            if self.started_at and self.finished_at else None,
+            "brief": self.brief,
+            "audio_format": self.audio_format if self.audio is not None else None,
+            "error": self.error,
+            "trace": self.trace,
+        }
+
+
+class JobSink(StreamSink):
+    """
+    Forwards streamed narrator/broadcaster tokens into the job's event log and,
+    for voiced jobs, the broadcaster's answer into a speech pipeline as it streams.
+    """
+
+    def __init__(self, job: Job, speech: SpeechPipeline = None):
+        super().__init__()
+        self.job = job
+        self.speech = speech
+
+    @property
+    def speaks(self) -> bool:
+        return self.speech is not None
+
+    def on_token(self, token):
+        self.job.publish("token", text=token)
+
+    def on_segment_end(self):
+        self.job.publish("segment_end")
+
+    def on_speech(self, text):
+        if self.speech is not None:
+            self.speech.feed(text)
+
+
+class CrewPool:
+    """
+    Runs crew kickoffs on a fixed number of worker threads behind a bounded
+    queue. Submissions beyond workers + queue_size raise PoolFull instead of
+    piling up, and an identical query already queued or running is shared
+    rather than run twice. Finished jobs are kept for a while so their
+    brief, audio and events can still be fetched.
+    """
+
+    def __init__(self, crew_factory, workers: int = API_WORKERS, queue_size: int = API_QUEUE_SIZE,
+                 history: int = API_JOB_HISTORY):
+        self.crew_factory = crew_factory
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crew")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._inflight = {}
+        self._pending = 0
+        self._running = 0
+        self._run_seconds = None
+        self._stats = {"submitted": 0, "coalesced": 0, "rejected": 0, "completed": 0, "failed": 0, "cached": 0}
+
+    def _remember(self, job: Job):
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.history:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if not oldest.done.is_set():
+                break
+            del self._jobs[oldest_id]
+
+    def _retry_after(self) -> float:
+        """Rough wait until a slot frees up: waves of queued work times the average run."""
+        waves = max(1, self._pending - self.workers + 1) / self.workers
+        return max(1.0, (self._run_seconds or DEFAULT_RUN_SECONDS) * waves)
+
+    def submit(self, query: str, voice: bool = True) -> Job:
+        key = (_normalize(query), voice)
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None:
+                self._stats["coalesced"] += 1
+                return existing
+            if self._pending >= self.capacity:
+                self._stats["rejected"] += 1
+                raise PoolFull(self._retry_after())
+            job = Job(query, voice)
+            self._pending += 1
+            self._stats["submitted"] += 1
+            self._inflight[key] = job
+            self._remember(job)
+            position = max(0, self._pending - self.workers)
+        job.publish("queued", job_id=job.id, position=position)
+        self._executor.submit(self._run, job, key)
+        return job
+
+    def add_completed(self, query: str, brief: str, audio: bytes = None, audio_format: str = None) -> Job:
+        """Registers an answer served from the response cache, so it is fetched like any other job."""
+        job = Job(query, voice=audio is not None)
+        job.cached = True
+        job.status = "done"
+        job.brief = brief
+        job.audio = audio
+        job.audio_format = audio_format
+        job.started_at = job.finished_at = job.created_at
+        with self._lock:
+            self._stats["cached"] += 1
+            self._remember(job)
+        job.publish("result", brief=brief, cached=True)
+        job.publish("done", status=job.status)
+        job.done.set()
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job, key):
+        with self._lock:
+            self._running += 1
+        job.status = "running"
+        job.started_at = time.time()
+        job.publish("started")
+        try:
+            engine = get_engine()
+            speech = SpeechPipeline(engine) if job.voice else None
+            with tracing.trace("kickoff", query=job.query, job_id=job.id) as root, stream_to(JobSink(job, speech)):
+                result = self.crew_factory().crew().kickoff(inputs={"query": job.query})
+                usage = getattr(result, "token_usage", None)
+                if root is not None and usage is not None:
+                    root.set(agent_prompt_tokens=usage.prompt_tokens, agent_completion_tokens=usage.completion_tokens)
+            job.brief = str(result)
+            job.trace = tracing.summarize(root) if root is not None else None
+            job.publish("result", brief=job.brief, cached=False)
+
+            if job.voice:
+                job.audio = finish_speech(speech, job.brief)
+                job.audio_format = engine.format
+                job.publish("audio", format=engine.format, bytes=len(job.audio))
+            try:
+                response_cache.store_response(job.query, job.brief, job.audio, engine.format)
+            except Exception as e:
+                print(f"Response cache unavailable: {str(e)}")
+            job.status = "done"
+        except Exception as e:
+            job.status = "error"
+            job.error = str(e)
+            print(f"Error running brief {job.id}: {str(e)}")
+            job.publish("error", message=str(e))
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+                self._running -= 1
+                self._inflight.pop(key, None)
+                if job.status == "done":
+                    self._stats["completed"] += 1
+                    elapsed = job.finished_at - job.started_at
+                    # Moving average keeps Retry-After close to current run times
+                    self._run_seconds = elapsed if self._run_seconds is None else 0.7 * self._run_seconds + 0.3 * elapsed
+                else:
+                    self._stats["failed"] += 1
+            job.publish("done", status=job.status)
+            job.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "avg_run_seconds": round(self._run_seconds, 1) if self._run_seconds else None,
+                **self._stats,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
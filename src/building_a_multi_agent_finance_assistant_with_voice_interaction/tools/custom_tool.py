@@ -24,12 +24,12 @@ class MyCustomTool(BaseTool):
 from crewai.tools import BaseTool
 from typing import Type, Union, Any, Dict
 from pydantic import BaseModel, Field
-from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings, OpenAI
+from tools.llm_gateway import gateway
+from tools.vector_store import get_vectordb
+from tools.query_validator import cached_validation
 import os
 import json
 
-CHROMA_PATH = "./chroma"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
 
@@ -44,21 +44,24 @@ class ConfidenceCheckerTool(BaseTool):
     args_schema: Type[BaseModel] = ConfidenceCheckerInput
 
     def _run(self, query: Union[str, Dict[str, Any]]) -> str:
-        # Initialize embeddings and vector DB
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectordb = Chroma(persist_directory=CHROMA_PATH, embedding_function=embeddings)
-
-        # LLM-based confidence scoring
-        llm = OpenAI(temperature=0, openai_api_key=OPENAI_API_KEY)
-        eval_prompt = (
-            f"Rate this query on clarity and specificity (1-10):\n"
-            f"{query}\n"
-            "Respond only with the number."
-        )
-        try:
-            llm_score = float(llm.invoke(eval_prompt).strip()) / 10.0
-        except Exception:
-            llm_score = 0.5
+        # Shared vector DB handle
+        vectordb = get_vectordb()
+
+        # Reuse the score from query validation when the app already ran it
+        validation = cached_validation(query)
+        llm = gateway.llm(temperature=0)
+        if validation is not None:
+            llm_score = float(validation.get("confidence", 50)) / 100.0
+        else:
+            eval_prompt = (
+                f"Rate this query on clarity and specificity (1-10):\n"
+                f"{query}\n"
+                "Respond only with the number."
+            )
+            try:
+                llm_score = float(llm.invoke(eval_prompt).strip()) / 10.0
+            except Exception:
+                llm_score = 0.5
 
         # Similarity check
         results = vectordb.similarity_search_with_score(query, k=1)
@@ -68,8 +71,8 @@ class ConfidenceCheckerTool(BaseTool):
         route_to_data_agents = llm_score > 0.6 or similarity_score > 0.7
 
         # Generate suggestions if confidence low
-        suggestions = []
-        if llm_score < 0.6:
+        suggestions = list(validation.get("suggestions") or []) if validation is not None else []
+        if llm_score < 0.6 and not suggestions:
             suggestion_prompt = (
                 f"Suggest 3 ways to improve this user query to make it clearer and more specific:\n{query}\n"
                 "Respond with 3 short suggestions, separated by semicolons."
@@ -92,8 +95,8 @@ class ConfidenceCheckerTool(BaseTool):
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
-from langchain_openai import OpenAI
-import yfinance as yf
+from tools.entities import extract_entities
+from tools.market_data import engine
 import os
 import json
 
@@ -111,58 +114,20 @@ class MarketDataResearcherTool(BaseTool):
     args_schema: Type[BaseModel] = MarketDataResearcherInput
 
     def _run(self, query: str) -> str:
-        llm = OpenAI(temperature=0, openai_api_key=OPENAI_API_KEY)
-
-        extraction_prompt = (
-            f"Extract company names or tickers related to this query:\n{query}\n"
-            "Respond only with comma-separated symbols or names."
-        )
-        response = llm.invoke(extraction_prompt)
-        entities = [e.strip() for e in response.strip().split(",")]
-
-        results = []
-        for entity in entities:
-            try:
-                ticker = yf.Ticker(entity)
-                info = ticker.info
-                history = ticker.history(period="1d")
-                if history.empty:
-                    continue
-
-                current_price = round(history["Close"].iloc[-1], 2)
-                previous_close = round(history["Open"].iloc[0], 2)
-                change_percent = round(((current_price - previous_close) / previous_close) * 100, 2)
-                volume = int(history["Volume"].iloc[-1])
-                eps = info.get("epsTrailingTwelveMonths", None)
-
-                result = {
-                    "ticker": info.get("symbol"),
-                    "name": info.get("shortName"),
-                    "price": current_price,
-                    "change_percent": change_percent,
-                    "previous_close": previous_close,
-                    "volume": volume,
-                    "eps_trailing_12m": eps
-                }
-                results.append(result)
-
-            except Exception as e:
-                print(f"Error fetching data for {entity}: {str(e)}")
+        entities = extract_entities(query)
 
+        # One batched fetch for every symbol, served from the TTL cache when warm
+        results = engine.snapshot([entity["symbol"] for entity in entities])
         return json.dumps(results, indent=2)
     
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
-from langchain_openai import OpenAI
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-import os
+from tools.llm_gateway import gateway
+from tools.entities import extract_entities
+from tools.scraper import scrape_filings
 import json
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
 class FilingScraperInput(BaseModel):
     """Input schema for FilingScraper."""
     query: str = Field(..., description="Query containing company names or tickers.")
@@ -175,59 +140,47 @@ class FilingScraperTool(BaseTool):
     args_schema: Type[BaseModel] = FilingScraperInput
 
     def _run(self, query: str) -> str:
-        llm = OpenAI(temperature=0, openai_api_key=OPENAI_API_KEY)
-
-        extraction_prompt = (
-            f"Extract company names or tickers related to this query:\n{query}\n"
-            "Respond only with comma-separated symbols or names."
-        )
-        response = llm.invoke(extraction_prompt)
-        entities = [e.strip() for e in response.strip().split(",")]
+        llm = gateway.llm(temperature=0)
+        entities = extract_entities(query)
 
         results = []
 
-        for entity in entities:
+        # All entities are scraped concurrently; summaries follow per filing
+        for filing in scrape_filings(entities):
+            entity = filing["entity"]
             try:
-                ir_url = f"https://www.google.com/search?q= {entity} investor relations latest earnings report OR filing"
-                headers = {"User-Agent": "Mozilla/5.0"}
-                resp = requests.get(ir_url, headers=headers)
-                soup = BeautifulSoup(resp.text, 'html.parser')
-                links = [a['href'] for a in soup.find_all('a', href=True)]
-                relevant_links = [urljoin(ir_url, link) for link in links if 'ir' in link or 'news' in link]
-
-                if relevant_links:
-                    content = BeautifulSoup(requests.get(relevant_links[0], headers=headers).text, 'html.parser').get_text()
-                    summary_prompt = (
-                        "Summarize this earnings report or disclosure excerpt.\n"
-                        "Highlight EPS surprise, revenue change, guidance updates, and tone.\n"
-                        "---\n"
-                        f"{content[:3000]}"
-                    )
-                    summary = llm.invoke(summary_prompt).strip()
-                    results.append({
-                        "company": entity,
-                        "source": relevant_links[0],
-                        "summary": summary
-                    })
+                summary_prompt = (
+                    "Summarize this earnings report or disclosure excerpt.\n"
+                    "Highlight EPS surprise, revenue change, guidance updates, and tone.\n"
+                    "---\n"
+                    f"{filing['content']}"
+                )
+                summary = llm.invoke(summary_prompt).strip()
+                results.append({
+                    "company": entity["name"],
+                    "ticker": entity["symbol"],
+                    "source": filing["source"],
+                    "summary": summary
+                })
 
             except Exception as e:
-                print(f"Error processing {entity}: {str(e)}")
+                print(f"Error processing {entity['name']}: {str(e)}")
 
         return json.dumps(results, indent=2)
     
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
+from typing import Optional
+from tools.retrieval import hybrid_search
 import os
 import json
 
-CHROMA_PATH = "./chroma"
-
 class RetrieverToolInput(BaseModel):
     """Input schema for RetrieverTool."""
     query: str = Field(..., description="User query to search in vector store.")
+    ticker: Optional[str] = Field(None, description="Only return chunks about this exchange-qualified ticker.")
+    source: Optional[str] = Field(None, description="Only return chunks from this source, e.g. 'filing' or 'market_data'.")
 
 class RetrieverTool(BaseTool):
     name: str = "retriever_tool"
@@ -236,23 +189,28 @@ class RetrieverTool(BaseTool):
     )
     args_schema: Type[BaseModel] = RetrieverToolInput
 
-    def _run(self, query: str) -> str:
-        embeddings = OpenAIEmbeddings()
-        vectordb = Chroma(persist_directory=CHROMA_PATH, embedding_function=embeddings)
-        docs = vectordb.similarity_search(query, k=3)
-
-        matches = [{"content": doc.page_content, "similarity": 0.85} for doc in docs]
+    def _run(self, query: str, ticker: Optional[str] = None, source: Optional[str] = None) -> str:
+        # Keyword index answers exact tickers; otherwise BM25 and vector scores are fused
+        hits = hybrid_search(query, k=3, score_threshold=0.3, ticker=ticker, source=source)
+        matches = [
+            {
+                "content": hit["content"],
+                "similarity": hit["similarity"],
+                "ticker": hit["metadata"].get("ticker"),
+                "source": hit["metadata"].get("source"),
+            }
+            for hit in hits
+        ]
         return json.dumps(matches, indent=2)
     
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
-from langchain_openai import OpenAI
-import os
+from tools.entities import extract_entities
+from tools.analytics import analyze_symbols
+from tools.portfolio import get_portfolio
 import json
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
 class QuantitativeAnalystInput(BaseModel):
     """Input schema for QuantitativeAnalyst."""
     query: str = Field(..., description="Query for risk allocation and surprises.")
@@ -265,29 +223,27 @@ class QuantitativeAnalystTool(BaseTool):
     args_schema: Type[BaseModel] = QuantitativeAnalystInput
 
     def _run(self, query: str) -> str:
-        llm = OpenAI(temperature=0, openai_api_key=OPENAI_API_KEY)
-        analysis_prompt = (
-            "Given the following query:\n"
-            f"{query}\n"
-            "Analyze and summarize:\n"
-            "- Allocation delta\n"
-            "- Earnings surprises\n"
-            "- Risk exposure\n"
-            "- Regional sentiment\n"
-            "Return structured JSON output."
-        )
-        response = llm.invoke(analysis_prompt)
-        return response.strip()
+        entities = extract_entities(query)
+        portfolio = get_portfolio()
+        portfolio.refresh()
+
+        # Questions naming no company are about the user's own holdings
+        symbols = [entity["symbol"] for entity in entities] or portfolio.symbols()
+        held = portfolio.weights(previous=True)
+        weights = {symbol: held[symbol] for symbol in symbols if symbol in held} or None
+
+        # Numbers are computed locally; the agent only interprets them
+        metrics = analyze_symbols(symbols, weights=weights)
+        metrics["exposure"] = portfolio.summary()
+        return json.dumps(metrics, indent=2)
     
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
-from langchain_openai import OpenAI
-import os
+from tools.llm_gateway import gateway
+from tools.streaming import stream_completion
 import json
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
 class LanguageNarratorInput(BaseModel):
     """Input schema for LanguageNarrator."""
     query: str = Field(..., description="Query to generate spoken briefing from.")
@@ -300,7 +256,7 @@ class LanguageNarratorTool(BaseTool):
     args_schema: Type[BaseModel] = LanguageNarratorInput
 
     def _run(self, query: str) -> str:
-        llm = OpenAI(temperature=0.7, openai_api_key=OPENAI_API_KEY)
+        llm = gateway.llm(temperature=0.7)
         narrative_prompt = (
             "Write a concise 3-paragraph spoken market briefing:\n"
             f"Query: {query}\n"
@@ -310,12 +266,15 @@ class LanguageNarratorTool(BaseTool):
             "- Sentiment summary\n"
             "Style: Confident, professional, Bloomberg-style tone."
         )
-        response = llm.invoke(narrative_prompt)
+        # Tokens go straight to the UI when a stream sink is active
+        response = stream_completion(llm, narrative_prompt)
         return response.strip()
     
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
+from tools.tts import synthesize_to_file
+from tools.streaming import is_speaking
 
 class VoiceBroadcasterInput(BaseModel):
     """Input schema for VoiceBroadcaster."""
@@ -329,5 +288,9 @@ class VoiceBroadcasterTool(BaseTool):
     args_schema: Type[BaseModel] = VoiceBroadcasterInput
 
     def _run(self, text: str) -> str:
-        # Placeholder – use Piper, Coqui, or Bark API later
-        return f"[AUDIO FILE GENERATED FROM TEXT]: {text}"
+        # The caller is already voicing the final answer as it streams; don't synthesize it twice
+        if is_speaking():
+            return f"[AUDIO STREAMED TO LISTENER]: {text}"
+        # Sentences are synthesized concurrently and stitched back in order
+        audio_path = synthesize_to_file(text)
+        return f"[AUDIO FILE GENERATED AT {audio_path}]: {text}"
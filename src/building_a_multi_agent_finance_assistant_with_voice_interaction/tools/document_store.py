@@ -0,0 +1,117 @@
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from tools.vector_store import get_vectordb, DEFAULT_COLLECTION
+from tools.keyword_index import get_keyword_index
+from tools.cache import JsonFileCache
+from datetime import date
+import threading
+import hashlib
+import time
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+
+# Document fingerprints only need to outlive the rows they describe
+FINGERPRINT_TTL = 365 * 24 * 3600
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def chunk_id_for(source_key: str, chunk_hash: str) -> str:
+    """Chunk ids are owned by one source, so removing a chunk from one source never deletes another's copy."""
+    return hashlib.sha256(f"{source_key}\x00{chunk_hash}".encode("utf-8")).hexdigest()
+
+
+class DocumentStore:
+    """
+    Incremental ingestion into Chroma. Documents are split into chunks whose
+    ids hash the source and the chunk content, so unchanged chunks are never
+    re-embedded. When a source (e.g. a ticker snapshot or an IR page) is
+    re-ingested, only new chunks are added and chunks that disappeared from it
+    are deleted; text shared with other sources is stored once per source, and
+    the embedding cache still embeds it only once.
+    The BM25 keyword index for the collection is updated alongside.
+    """
+
+    def __init__(self, collection_name: str = DEFAULT_COLLECTION):
+        self.collection_name = collection_name
+        self.splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        self.fingerprints = JsonFileCache(f"fingerprints_{collection_name}.json", ttl=FINGERPRINT_TTL)
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        return get_vectordb(self.collection_name)
+
+    def ingest(self, content: str, source_key: str, metadata: dict = None) -> dict:
+        """Upserts the deltas for one source; returns counts of added/skipped/removed chunks."""
+        return self.ingest_batch([(content, source_key, metadata)])
+
+    def ingest_batch(self, items: list) -> dict:
+        """
+        Upserts many (content, source_key, metadata) items with one existence
+        lookup and one embedding/add call for all of their new chunks.
+        """
+        # Later submissions for the same source win
+        latest = {}
+        for content, source_key, metadata in items:
+            latest[source_key] = (content, metadata)
+
+        totals = {"added": 0, "skipped": 0, "removed": 0}
+        chunks = {}
+        chunk_metadata = {}
+        changed = {}
+        today = int(date.today().strftime("%Y%m%d"))
+        for source_key, (content, metadata) in latest.items():
+            doc_hash = content_hash(content)
+            if self.fingerprints.get(source_key) == doc_hash:
+                totals["skipped"] += 1
+                continue
+            changed[source_key] = (doc_hash, set())
+            base_metadata = {
+                **(metadata or {}),
+                "source_key": source_key,
+                "date": today,
+                "indexed_at": time.time(),
+            }
+            for chunk in self.splitter.split_text(content):
+                chunk_hash = content_hash(chunk)
+                chunk_id = chunk_id_for(source_key, chunk_hash)
+                changed[source_key][1].add(chunk_id)
+                if chunk_id not in chunks:
+                    chunks[chunk_id] = chunk
+                    chunk_metadata[chunk_id] = {**base_metadata, "content_hash": chunk_hash}
+
+        if not changed:
+            return totals
+
+        with self._lock:
+            store = self.store
+            existing = set(store.get(ids=list(chunks), include=[])["ids"]) if chunks else set()
+            new_ids = [chunk_id for chunk_id in chunks if chunk_id not in existing]
+            keyword_index = get_keyword_index(self.collection_name)
+            if new_ids:
+                texts = [chunks[chunk_id] for chunk_id in new_ids]
+                metadatas = [chunk_metadata[chunk_id] for chunk_id in new_ids]
+                store.add_texts(texts, metadatas=metadatas, ids=new_ids)
+                keyword_index.add(new_ids, texts, metadatas)
+
+            stale = []
+            for source_key, (_, chunk_ids) in changed.items():
+                previous = set(store.get(where={"source_key": source_key}, include=[])["ids"])
+                stale.extend(previous - chunk_ids)
+            if stale:
+                store.delete(ids=stale)
+                keyword_index.delete(stale)
+
+        for source_key, (doc_hash, _) in changed.items():
+            self.fingerprints.set(source_key, doc_hash)
+
+        totals["added"] = len(new_ids)
+        totals["skipped"] += len(chunks) - len(new_ids)
+        totals["removed"] = len(stale)
+        return totals
+
+
+document_store = DocumentStore()
@@ -0,0 +1,140 @@
+from langchain_core.embeddings import Embeddings
+from tools.cache import CACHE_DIR
+from tools import tracing
+from array import array
+import threading
+import hashlib
+import sqlite3
+import math
+import re
+import os
+
+EMBEDDING_CACHE_PATH = os.path.join(CACHE_DIR, "embeddings.sqlite3")
+HASH_EMBEDDING_DIM = 384
+TOKEN_PATTERN = re.compile(r"[a-z0-9.\-]+")
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any LangChain embedding model with a SQLite cache keyed by
+    (model, normalized text), so repeated queries and unchanged documents
+    are embedded once across the whole process and across restarts.
+    """
+
+    def __init__(self, inner: Embeddings, model_name: str, path: str = EMBEDDING_CACHE_PATH):
+        self.inner = inner
+        self.model_name = model_name
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+        return self._conn
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: list) -> dict:
+        found = {}
+        with self._lock:
+            db = self._db()
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for key, blob in db.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch):
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def _store(self, rows: dict):
+        with self._lock:
+            db = self._db()
+            db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in rows.items()],
+            )
+            db.commit()
+
+    def embed_documents(self, texts: list) -> list:
+        keys = [self._key(t) for t in texts]
+        found = self._lookup(list(set(keys)))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+
+        # A text repeated within the batch is embedded once, so its repeats count as hits
+        hits = len(texts) - len(missing)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(missing)
+        tracing.add("embedding_cache_hits", hits)
+        tracing.add("embedding_cache_misses", len(missing))
+
+        if missing:
+            vectors = self.inner.embed_documents(list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            self._store(computed)
+            found.update(computed)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> list:
+        key = self._key(text)
+        found = self._lookup([key])
+        if key in found:
+            with self._lock:
+                self.hits += 1
+            tracing.add("embedding_cache_hits")
+            return found[key]
+        with self._lock:
+            self.misses += 1
+        tracing.add("embedding_cache_misses")
+        vector = self.inner.embed_query(text)
+        self._store({key: vector})
+        return vector
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Deterministic offline embeddings via signed feature hashing of tokens.
+    Not semantic, but stable across runs, so exact and keyword-overlapping
+    text lands close together; meant for tests and offline benchmarks.
+    """
+
+    def __init__(self, dim: int = HASH_EMBEDDING_DIM):
+        self.dim = dim
+
+    def _embed(self, text: str) -> list:
+        vector = [0.0] * self.dim
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: list) -> list:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self._embed(text)
@@ -0,0 +1,117 @@
+from tools.llm_gateway import gateway
+from tools.cache import JsonFileCache
+import yfinance as yf
+import threading
+import re
+
+# Name -> exchange-qualified symbol changes rarely; keep it for a week
+SYMBOL_TTL = 7 * 24 * 3600
+# A failed lookup may be a new listing or a transient empty search; retry it soon
+UNRESOLVED_SYMBOL_TTL = 3600
+SYMBOL_PATTERN = re.compile(r"^[A-Z0-9^]{1,10}([.\-=][A-Z0-9]{1,4})?$")
+
+MAX_CACHED_QUERIES = 256
+
+_symbol_cache = JsonFileCache("symbols.json", ttl=SYMBOL_TTL)
+_query_results = {}
+_inflight = {}
+_lock = threading.Lock()
+
+
+def _normalize(query: str) -> str:
+    return " ".join(str(query).lower().split())
+
+
+def _extract_names(query: str) -> list:
+    llm = gateway.llm(temperature=0)
+    extraction_prompt = (
+        f"Extract company names or tickers related to this query:\n{query}\n"
+        "Respond only with comma-separated symbols or names."
+    )
+    response = llm.invoke(extraction_prompt)
+    entities = [e.strip() for e in response.strip().split(",")]
+    return [e for e in entities if e and e.lower() != "none"]
+
+
+def resolve_symbol(entity: str) -> dict:
+    """
+    Resolves a company name or bare ticker to an exchange-qualified symbol,
+    e.g. "Infosys" -> INFY.NS, "HSBC Holdings" -> HSBA.L. Cached on disk;
+    names the search could not find are only cached for an hour.
+    """
+    key = entity.strip().lower()
+    cached = _symbol_cache.get(key)
+    if cached is not None:
+        return cached
+
+    resolved = {"entity": entity, "symbol": entity, "name": entity, "exchange": None, "resolved": False}
+    if SYMBOL_PATTERN.match(entity) and ("." in entity or "-" in entity):
+        # Already exchange-qualified, nothing to look up
+        resolved["symbol"] = entity
+        resolved["resolved"] = True
+    else:
+        try:
+            quotes = yf.Search(entity, max_results=1).quotes
+            if quotes:
+                resolved["symbol"] = quotes[0]["symbol"]
+                resolved["name"] = quotes[0].get("shortname") or quotes[0].get("longname") or entity
+                resolved["exchange"] = quotes[0].get("exchange")
+                resolved["resolved"] = True
+        except Exception as e:
+            print(f"Error resolving symbol for {entity}: {str(e)}")
+            return resolved
+
+    _symbol_cache.set(key, resolved, ttl=None if resolved["resolved"] else UNRESOLVED_SYMBOL_TTL)
+    return resolved
+
+
+def known_names() -> set:
+    """
+    Lower-cased company names and symbols that resolved to a listed ticker,
+    for local matching. Names the symbol search could not find are left out.
+    """
+    names = set()
+    for key, resolved in _symbol_cache.items():
+        # Entries cached before the "resolved" flag existed count if they found an exchange
+        if not resolved.get("resolved", bool(resolved.get("exchange"))):
+            continue
+        names.add(key)
+        names.add(str(resolved.get("name", "")).lower())
+        names.add(str(resolved.get("symbol", "")).lower())
+    return {name for name in names if len(name) > 1}
+
+
+def extract_entities(query: str) -> list:
+    """
+    Shared entity stage: one LLM extraction and one symbol resolution per query.
+    Concurrent callers for the same query wait on the first one instead of
+    repeating the work, so parallel crew tasks all reuse a single result.
+    """
+    key = _normalize(query)
+    with _lock:
+        if key in _query_results:
+            return _query_results[key]
+        event = _inflight.get(key)
+        owner = event is None
+        if owner:
+            event = _inflight[key] = threading.Event()
+
+    if not owner:
+        event.wait()
+        return _query_results.get(key, [])
+
+    entities = None
+    try:
+        entities = [resolve_symbol(name) for name in _extract_names(query)]
+    except Exception as e:
+        print(f"Error extracting entities: {str(e)}")
+    finally:
+        with _lock:
+            # Failed extractions are not memoised so the next call retries
+            if entities is not None:
+                if len(_query_results) >= MAX_CACHED_QUERIES:
+                    _query_results.pop(next(iter(_query_results)))
+                _query_results[key] = entities
+            del _inflight[key]
+        event.set()
+    return entities or []
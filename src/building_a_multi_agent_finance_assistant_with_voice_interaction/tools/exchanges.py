@@ -0,0 +1,107 @@
+from collections import namedtuple
+from datetime import datetime, timedelta, time as dtime
+from zoneinfo import ZoneInfo
+
+Exchange = namedtuple("Exchange", ["code", "timezone", "open", "close", "currency"])
+
+# Yahoo symbol suffix -> regular session in the exchange's own timezone and
+# quote currency. Holidays are not modelled; a closed weekday just looks like
+# a quiet session.
+EXCHANGES = {
+    "": Exchange("US", "America/New_York", dtime(9, 30), dtime(16, 0), "USD"),
+    "TO": Exchange("TSX", "America/Toronto", dtime(9, 30), dtime(16, 0), "CAD"),
+    "V": Exchange("TSXV", "America/Toronto", dtime(9, 30), dtime(16, 0), "CAD"),
+    "MX": Exchange("BMV", "America/Mexico_City", dtime(8, 30), dtime(15, 0), "MXN"),
+    "L": Exchange("LSE", "Europe/London", dtime(8, 0), dtime(16, 30), "GBp"),
+    "DE": Exchange("XETRA", "Europe/Berlin", dtime(9, 0), dtime(17, 30), "EUR"),
+    "F": Exchange("FRA", "Europe/Berlin", dtime(8, 0), dtime(20, 0), "EUR"),
+    "PA": Exchange("EPA", "Europe/Paris", dtime(9, 0), dtime(17, 30), "EUR"),
+    "AS": Exchange("AMS", "Europe/Amsterdam", dtime(9, 0), dtime(17, 30), "EUR"),
+    "BR": Exchange("EBR", "Europe/Brussels", dtime(9, 0), dtime(17, 30), "EUR"),
+    "MI": Exchange("BIT", "Europe/Rome", dtime(9, 0), dtime(17, 30), "EUR"),
+    "MC": Exchange("BME", "Europe/Madrid", dtime(9, 0), dtime(17, 30), "EUR"),
+    "SW": Exchange("SIX", "Europe/Zurich", dtime(9, 0), dtime(17, 30), "CHF"),
+    "ST": Exchange("STO", "Europe/Stockholm", dtime(9, 0), dtime(17, 30), "SEK"),
+    "CO": Exchange("CPH", "Europe/Copenhagen", dtime(9, 0), dtime(17, 0), "DKK"),
+    "OL": Exchange("OSL", "Europe/Oslo", dtime(9, 0), dtime(16, 20), "NOK"),
+    "HE": Exchange("HEL", "Europe/Helsinki", dtime(10, 0), dtime(18, 30), "EUR"),
+    "T": Exchange("TSE", "Asia/Tokyo", dtime(9, 0), dtime(15, 30), "JPY"),
+    "KS": Exchange("KRX", "Asia/Seoul", dtime(9, 0), dtime(15, 30), "KRW"),
+    "KQ": Exchange("KOSDAQ", "Asia/Seoul", dtime(9, 0), dtime(15, 30), "KRW"),
+    "HK": Exchange("HKEX", "Asia/Hong_Kong", dtime(9, 30), dtime(16, 0), "HKD"),
+    "SS": Exchange("SSE", "Asia/Shanghai", dtime(9, 30), dtime(15, 0), "CNY"),
+    "SZ": Exchange("SZSE", "Asia/Shanghai", dtime(9, 30), dtime(15, 0), "CNY"),
+    "TW": Exchange("TWSE", "Asia/Taipei", dtime(9, 0), dtime(13, 30), "TWD"),
+    "TWO": Exchange("TPEx", "Asia/Taipei", dtime(9, 0), dtime(13, 30), "TWD"),
+    "NS": Exchange("NSE", "Asia/Kolkata", dtime(9, 15), dtime(15, 30), "INR"),
+    "BO": Exchange("BSE", "Asia/Kolkata", dtime(9, 15), dtime(15, 30), "INR"),
+    "SI": Exchange("SGX", "Asia/Singapore", dtime(9, 0), dtime(17, 0), "SGD"),
+    "JK": Exchange("IDX", "Asia/Jakarta", dtime(9, 0), dtime(16, 0), "IDR"),
+    "BK": Exchange("SET", "Asia/Bangkok", dtime(10, 0), dtime(16, 30), "THB"),
+    "AX": Exchange("ASX", "Australia/Sydney", dtime(10, 0), dtime(16, 0), "AUD"),
+}
+# Yahoo dates FX bars in London time and closes them at midnight
+FX = Exchange("FX", "Europe/London", dtime(0, 0), dtime(23, 59, 59), None)
+# Quote units that are a fraction of an ISO currency (LSE prices are in pence)
+MINOR_UNITS = {"GBp": ("GBP", 100.0)}
+
+
+def exchange_for(symbol: str) -> Exchange:
+    """Listing exchange from the Yahoo suffix; bare symbols and indices are US."""
+    symbol = str(symbol).upper()
+    if symbol.endswith("=X"):
+        return FX
+    suffix = symbol.rsplit(".", 1)[1] if "." in symbol else ""
+    return EXCHANGES.get(suffix, EXCHANGES[""])
+
+
+def currency_for(symbol: str) -> tuple:
+    """(ISO currency, quote units per currency unit) for a symbol, e.g. ("GBP", 100.0) on the LSE."""
+    currency = exchange_for(symbol).currency or "USD"
+    return MINOR_UNITS.get(currency, (currency, 1.0))
+
+
+def local_now(exchange: Exchange, now: datetime = None) -> datetime:
+    """`now` (default: the current instant) on the exchange's wall clock."""
+    zone = ZoneInfo(exchange.timezone)
+    if now is None:
+        return datetime.now(zone)
+    if now.tzinfo is None:
+        now = now.astimezone()
+    return now.astimezone(zone)
+
+
+def is_open(exchange: Exchange, now: datetime = None) -> bool:
+    local = local_now(exchange, now)
+    return local.weekday() < 5 and exchange.open <= local.time() < exchange.close
+
+
+def session_close(exchange: Exchange, now: datetime = None) -> datetime:
+    """Today's close on the exchange's clock."""
+    local = local_now(exchange, now)
+    return datetime.combine(local.date(), exchange.close, local.tzinfo)
+
+
+def next_open(exchange: Exchange, now: datetime = None) -> datetime:
+    """First session open strictly after `now`."""
+    local = local_now(exchange, now)
+    candidate = datetime.combine(local.date(), exchange.open, local.tzinfo)
+    if candidate <= local:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def last_completed_session(exchange: Exchange, now: datetime = None) -> str:
+    """
+    Date (YYYY-MM-DD, exchange-local) of the most recent session that has
+    closed. Bars after it are still forming and must not be treated as final.
+    """
+    local = local_now(exchange, now)
+    day = local.date()
+    if local.time() < exchange.close:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day.strftime("%Y-%m-%d")
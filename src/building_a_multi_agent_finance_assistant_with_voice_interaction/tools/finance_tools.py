@@ -1,20 +1,22 @@
 from langchain.tools import tool
-from langchain_openai import OpenAI
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OpenAIEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.document_loaders import TextLoader
-import yfinance as yf
 import os
 import json
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from tools.vector_store import get_vectordb
+from tools.index_queue import index_queue
+from tools.retrieval import hybrid_search
+from tools.entities import extract_entities
+from tools.market_data import engine
+from tools.analytics import analyze_symbols
+from tools.portfolio import get_portfolio
+from tools.scraper import scrape_filings
+from tools.streaming import stream_completion
+from tools.tts import synthesize_to_file
+from tools.llm_gateway import gateway
 
 
-CHROMA_PATH = "./chroma"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-llm = OpenAI(temperature=0, openai_api_key=OPENAI_API_KEY)
+llm = gateway.llm(temperature=0)
 
 
 class FinanceTools:
@@ -26,8 +28,7 @@ class FinanceTools:
         Returns confidence score and whether to route to data agents.
         """
         print("🔍 Assessing prompt clarity and similarity...")
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectordb = Chroma(persist_directory=CHROMA_PATH, embedding_function=embeddings)
+        vectordb = get_vectordb()
 
         # Clarity scoring via LLM
         clarity_prompt = (
@@ -54,51 +55,19 @@ class FinanceTools:
         Automatically indexes new findings into ChromaDB.
         """
         print("📈 Fetching live market data...")
-        extraction_prompt = (
-            f"Extract company names or tickers related to this query:\n{query}\n"
-            "Respond only with comma-separated symbols or names."
-        )
-        response = llm.invoke(extraction_prompt)
-        entities = [e.strip() for e in response.strip().split(",")]
+        entities = extract_entities(query)
 
-        if not entities or entities == ["None"]:
+        if not entities:
             return json.dumps({"error": "No valid tickers or companies identified."})
 
-        results = []
-        for entity in entities:
-            try:
-                ticker = entity if "." in entity or "-" in entity else yf.Ticker(entity).info['symbol']
-                info = yf.Ticker(ticker).info
-                history = yf.Ticker(ticker).history(period="1d")
-
-                if history.empty:
-                    continue
+        results = engine.snapshot([entity["symbol"] for entity in entities])
 
-                current_price = round(history["Close"].iloc[-1], 2)
-                previous_close = round(history["Open"].iloc[0], 2)
-                change_percent = round(((current_price - previous_close) / previous_close) * 100, 2)
-                volume = int(history["Volume"].iloc[-1])
-                eps = info.get("epsTrailingTwelveMonths")
-                market_cap = info.get("marketCap")
-
-                result = {
-                    "ticker": ticker,
-                    "name": info.get("shortName", ticker),
-                    "price": current_price,
-                    "change_percent": change_percent,
-                    "previous_close": previous_close,
-                    "volume": volume,
-                    "eps_trailing_12m": eps,
-                    "market_cap": market_cap
-                }
-
-                results.append(result)
-
-                # Index into ChromaDB
-                FinanceTools._index_into_chroma(json.dumps(result))
-
-            except Exception as e:
-                print(f"Error fetching data for {entity}: {str(e)}")
+        # Index into ChromaDB
+        for result in results:
+            FinanceTools._index_into_chroma(
+                json.dumps(result), f"market:{result['ticker']}",
+                {"source": "market_data", "ticker": result["ticker"]},
+            )
 
         return json.dumps(results, indent=2)
 
@@ -109,60 +78,59 @@ class FinanceTools:
         Supports international IR portals. Automatically indexes findings into ChromaDB.
         """
         print("📄 Searching for recent filings...")
-        extraction_prompt = (
-            f"Extract company names or tickers related to this query:\n{query}\n"
-            "Respond only with comma-separated symbols or names."
-        )
-        response = llm.invoke(extraction_prompt)
-        entities = [e.strip() for e in response.strip().split(",")]
+        entities = extract_entities(query)
 
         results = []
 
-        for entity in entities:
+        for filing in scrape_filings(entities):
+            entity = filing["entity"]
             try:
-                ir_url = f"https://www.google.com/search?q= {entity} investor relations latest earnings report OR filing"
-                headers = {"User-Agent": "Mozilla/5.0"}
-                resp = requests.get(ir_url, headers=headers)
-                soup = BeautifulSoup(resp.text, 'html.parser')
-                links = [a['href'] for a in soup.find_all('a', href=True)]
-
-                relevant_links = [urljoin(ir_url, link) for link in links if 'ir' in link or 'news' in link]
-                if relevant_links:
-                    content = BeautifulSoup(requests.get(relevant_links[0], headers=headers).text, 'html.parser').get_text()
-                    summary_prompt = (
-                        "Summarize this earnings report or disclosure excerpt.\n"
-                        "Highlight EPS surprise, revenue change, guidance updates, and tone.\n"
-                        "---\n"
-                        f"{content[:3000]}"
-                    )
-                    summary = llm.invoke(summary_prompt).strip()
-
-                    result = {
-                        "company": entity,
-                        "source": relevant_links[0],
-                        "summary": summary
-                    }
-                    results.append(result)
-
-                    # Index into ChromaDB
-                    FinanceTools._index_into_chroma(json.dumps(result))
+                summary_prompt = (
+                    "Summarize this earnings report or disclosure excerpt.\n"
+                    "Highlight EPS surprise, revenue change, guidance updates, and tone.\n"
+                    "---\n"
+                    f"{filing['content']}"
+                )
+                summary = llm.invoke(summary_prompt).strip()
+
+                result = {
+                    "company": entity["name"],
+                    "ticker": entity["symbol"],
+                    "source": filing["source"],
+                    "summary": summary
+                }
+                results.append(result)
+
+                # Index into ChromaDB
+                FinanceTools._index_into_chroma(
+                    json.dumps(result), f"filing:{filing['source']}",
+                    {"source": "filing", "ticker": entity["symbol"], "url": filing["source"]},
+                )
 
             except Exception as e:
-                print(f"Error processing {entity}: {str(e)}")
+                print(f"Error processing {entity['name']}: {str(e)}")
 
         return json.dumps(results, indent=2)
 
     @tool("Knowledge Retriever")
-    def retriever_tool(query):
+    def retriever_tool(query, ticker: str = None, source: str = None):
         """
-        Retrieves top-k relevant documents from the vector database.
+        Retrieves top-k relevant documents from the vector database,
+        optionally only for one exchange-qualified ticker or one source
+        (e.g. 'filing' or 'market_data').
         """
         print("🧠 Retrieving past insights from vector DB...")
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectordb = Chroma(persist_directory=CHROMA_PATH, embedding_function=embeddings)
-        docs = vectordb.similarity_search(query, k=3)
-
-        matches = [{"content": doc.page_content, "similarity": round(vectordb._similarity_search_with_relevance_scores(query, k=3)[0][1], 2)} for doc in docs]
+        hits = hybrid_search(query, k=3, score_threshold=0.3, ticker=ticker, source=source)
+
+        matches = [
+            {
+                "content": hit["content"],
+                "similarity": round(hit["similarity"], 2),
+                "ticker": hit["metadata"].get("ticker"),
+                "source": hit["metadata"].get("source"),
+            }
+            for hit in hits
+        ]
         return json.dumps(matches, indent=2)
 
     @tool("Quantitative Analyst")
@@ -171,16 +139,17 @@ class FinanceTools:
         Analyzes portfolio risk, allocation changes, and earnings surprises.
         """
         print("📊 Performing quantitative analysis...")
-        analysis_prompt = (
-            "Given the following query:\n"
-            f"{query}\n"
-            "Analyze and summarize:\n"
-            "- Allocation delta\n- Earnings surprises\n- Risk exposure\n"
-            "- Regional sentiment\n"
-            "Return structured JSON output."
-        )
-        response = llm.invoke(analysis_prompt)
-        return response.strip()
+        entities = extract_entities(query)
+        portfolio = get_portfolio()
+        portfolio.refresh()
+
+        symbols = [entity["symbol"] for entity in entities] or portfolio.symbols()
+        held = portfolio.weights(previous=True)
+        weights = {symbol: held[symbol] for symbol in symbols if symbol in held} or None
+
+        metrics = analyze_symbols(symbols, weights=weights)
+        metrics["exposure"] = portfolio.summary()
+        return json.dumps(metrics, indent=2)
 
     @tool("Narrative Generator")
     def language_narrator(query):
@@ -197,26 +166,22 @@ class FinanceTools:
             "- Sentiment summary\n"
             "Style: Confident, professional, Bloomberg-style tone."
         )
-        response = llm.invoke(narrative_prompt)
+        response = stream_completion(llm, narrative_prompt)
         return response.strip()
 
     @tool("Voice Broadcaster")
     def voice_financier(text):
         """
         Converts text to speech using a professional finance voice.
-        Placeholder until full TTS integration.
+        Uses the engine selected by TTS_ENGINE (gtts or offline piper).
         """
         print("🎙️ Converting to audio...")
-        return f"[AUDIO FILE GENERATED FROM TEXT]: {text}"
+        audio_path = synthesize_to_file(text)
+        return f"[AUDIO FILE GENERATED AT {audio_path}]: {text}"
 
     # ——— HELPER METHODS ———
 
     @staticmethod
-    def _index_into_chroma(content: str):
-        """Adds new document chunk to ChromaDB"""
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectordb = Chroma(persist_directory=CHROMA_PATH, embedding_function=embeddings)
-        from langchain.schema import Document
-        doc = Document(page_content=content, metadata={"source": "auto_indexed"})
-        vectordb.add_documents([doc])
-        vectordb.persist()
\ No newline at end of file
+    def _index_into_chroma(content: str, source_key: str, metadata: dict = None):
+        """Queues a source for background chunking, dedup and batched upsert into ChromaDB"""
+        index_queue.submit(content, source_key, metadata)
\ No newline at end of file
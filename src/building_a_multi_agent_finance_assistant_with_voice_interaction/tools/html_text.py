@@ -0,0 +1,86 @@
+from html.parser import HTMLParser
+
+# Boilerplate that never carries filing content
+SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "svg", "form", "iframe", "template"}
+BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "table"}
+
+# Rough chars-per-token ratio for English prose
+CHARS_PER_TOKEN = 4
+
+
+class StreamingTextExtractor(HTMLParser):
+    """
+    Incremental HTML-to-text: feed the document chunk by chunk and stop as
+    soon as `max_chars` of visible text have been collected. Nothing beyond
+    the current chunk is kept in memory.
+    """
+
+    def __init__(self, max_chars: int = 3000):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.done = False
+        self._parts = []
+        self._length = 0
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in BLOCK_TAGS:
+            self._append("\n")
+
+    def handle_data(self, data):
+        if self._skip_depth or self.done:
+            return
+        text = " ".join(data.split())
+        if text:
+            self._append(text + " ")
+
+    def _append(self, text: str):
+        if self.done:
+            return
+        if text == "\n" and (not self._parts or self._parts[-1].endswith("\n")):
+            return
+        remaining = self.max_chars - self._length
+        self._parts.append(text[:remaining])
+        self._length += min(len(text), remaining)
+        if self._length >= self.max_chars:
+            self.done = True
+
+    def feed(self, data: str) -> bool:
+        """Returns True once the budget is filled and the caller can stop reading."""
+        if not self.done:
+            super().feed(data)
+        return self.done
+
+    def text(self) -> str:
+        return "".join(self._parts).strip()
+
+
+def budget_chars(max_chars: int = None, max_tokens: int = None) -> int:
+    if max_tokens is not None:
+        return max_tokens * CHARS_PER_TOKEN
+    return max_chars or 3000
+
+
+def extract_text(html: str, max_chars: int = None, max_tokens: int = None, chunk_size: int = 16384) -> str:
+    extractor = StreamingTextExtractor(budget_chars(max_chars, max_tokens))
+    for start in range(0, len(html), chunk_size):
+        if extractor.feed(html[start:start + chunk_size]):
+            break
+    return extractor.text()
+
+
+async def extract_from_stream(chunks, max_chars: int = None, max_tokens: int = None) -> str:
+    """Consumes an async text stream (e.g. httpx aiter_text) until the budget is met."""
+    extractor = StreamingTextExtractor(budget_chars(max_chars, max_tokens))
+    async for chunk in chunks:
+        if extractor.feed(chunk):
+            break
+    return extractor.text()
@@ -0,0 +1,95 @@
+from tools.document_store import document_store
+import threading
+import atexit
+import queue
+import time
+import os
+
+INDEX_BATCH_SIZE = int(os.getenv("INDEX_BATCH_SIZE", "32"))
+INDEX_FLUSH_SECONDS = float(os.getenv("INDEX_FLUSH_SECONDS", "2.0"))
+
+
+class IndexingQueue:
+    """
+    Write-behind indexing: submit() returns immediately and a background
+    thread embeds and writes documents to Chroma in batches, flushing when
+    `batch_size` items are pending or `flush_seconds` have passed since the
+    first one arrived. Pending writes are flushed at interpreter exit.
+    """
+
+    def __init__(self, store=None, batch_size: int = INDEX_BATCH_SIZE, flush_seconds: float = INDEX_FLUSH_SECONDS):
+        self.store = store or document_store
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        self.batches = 0
+        self.indexed = 0
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="chroma-indexer", daemon=True)
+                self._worker.start()
+
+    def submit(self, content: str, source_key: str, metadata: dict = None):
+        self._queue.put((content, source_key, metadata))
+        self._ensure_worker()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_seconds
+            stop = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: list):
+        try:
+            stats = self.store.ingest_batch(batch)
+            self.batches += 1
+            self.indexed += len(batch)
+            print(f"🗂️ Indexed batch of {len(batch)}: {stats}")
+        except Exception as e:
+            print(f"Error indexing batch of {len(batch)}: {str(e)}")
+
+    def flush(self):
+        """Blocks until everything submitted so far has been written."""
+        self._queue.join()
+
+    def shutdown(self):
+        if self._stopping:
+            return
+        self._stopping = True
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+
+index_queue = IndexingQueue()
+atexit.register(index_queue.shutdown)
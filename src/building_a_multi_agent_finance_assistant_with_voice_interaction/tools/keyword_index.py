@@ -0,0 +1,181 @@
+from tools.vector_store import CHROMA_PATH, DEFAULT_COLLECTION
+from collections import Counter, defaultdict
+import threading
+import sqlite3
+import json
+import math
+import re
+import os
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9.\-]*[a-z0-9]|[a-z0-9]")
+# Case-preserving symbol candidates on word boundaries; an apostrophe is not a
+# boundary, so the "T" in "DON'T" is not AT&T's ticker
+SYMBOL_PATTERN = re.compile(r"(?<![\w'’])([A-Za-z0-9][A-Za-z0-9.\-]*[A-Za-z0-9]|[A-Za-z0-9])(?![\w'’])")
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list:
+    """Words plus exchange-qualified symbols; 'infy.ns' also yields 'infy' and 'ns'."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if "." in token or "-" in token:
+            tokens.extend(p for p in re.split(r"[.\-]", token) if p)
+    return tokens
+
+
+class KeywordIndex:
+    """
+    BM25 inverted index kept next to a Chroma collection. Postings live in
+    memory for microsecond lookups and are persisted to SQLite so the index
+    survives restarts; DocumentStore keeps it in sync on every add/delete.
+    """
+
+    def __init__(self, collection_name: str = DEFAULT_COLLECTION, directory: str = CHROMA_PATH):
+        self.path = os.path.join(directory, f"bm25_{collection_name}.sqlite3")
+        self._lock = threading.RLock()
+        self._conn = None
+        self._loaded = False
+        self._rebuilt = False
+        self.postings = defaultdict(dict)
+        self.docs = {}
+        self.tickers = defaultdict(set)
+        self._total_length = 0
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS docs (id TEXT PRIMARY KEY, content TEXT, metadata TEXT)"
+            )
+        return self._conn
+
+    def _load(self):
+        if self._loaded:
+            return
+        for doc_id, content, metadata in self._db().execute("SELECT id, content, metadata FROM docs"):
+            self._index(doc_id, content, json.loads(metadata))
+        self._loaded = True
+
+    def _index(self, doc_id: str, content: str, metadata: dict):
+        counts = Counter(tokenize(content))
+        for term, tf in counts.items():
+            self.postings[term][doc_id] = tf
+        length = sum(counts.values())
+        self.docs[doc_id] = {"content": content, "metadata": metadata, "length": length}
+        self._total_length += length
+        if metadata.get("ticker"):
+            self.tickers[metadata["ticker"]].add(doc_id)
+
+    def _unindex(self, doc_id: str):
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self._total_length -= doc["length"]
+        for term in set(tokenize(doc["content"])):
+            self.postings[term].pop(doc_id, None)
+            if not self.postings[term]:
+                del self.postings[term]
+        ticker = doc["metadata"].get("ticker")
+        if ticker:
+            self.tickers[ticker].discard(doc_id)
+
+    def add(self, ids: list, texts: list, metadatas: list):
+        with self._lock:
+            self._load()
+            for doc_id, text, metadata in zip(ids, texts, metadatas):
+                self._unindex(doc_id)
+                self._index(doc_id, text, metadata or {})
+            db = self._db()
+            db.executemany(
+                "INSERT OR REPLACE INTO docs (id, content, metadata) VALUES (?, ?, ?)",
+                [(i, t, json.dumps(m or {})) for i, t, m in zip(ids, texts, metadatas)],
+            )
+            db.commit()
+
+    def delete(self, ids: list):
+        with self._lock:
+            self._load()
+            for doc_id in ids:
+                self._unindex(doc_id)
+            db = self._db()
+            db.executemany("DELETE FROM docs WHERE id = ?", [(i,) for i in ids])
+            db.commit()
+
+    def ensure_built(self, vectordb):
+        """Backfills once per process if the index is empty but Chroma may not be."""
+        if not self._rebuilt and not len(self):
+            self.rebuild(vectordb)
+
+    def rebuild(self, vectordb):
+        """Backfills the index from everything already stored in Chroma."""
+        rows = vectordb.get(include=["documents", "metadatas"])
+        with self._lock:
+            self._rebuilt = True
+            db = self._db()
+            db.execute("DELETE FROM docs")
+            db.commit()
+            self.postings.clear()
+            self.docs.clear()
+            self.tickers.clear()
+            self._total_length = 0
+            self._loaded = True
+        if rows["ids"]:
+            self.add(rows["ids"], rows["documents"], rows["metadatas"])
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return len(self.docs)
+
+    def symbols_in(self, query: str) -> list:
+        """
+        Tickers from the index that appear verbatim in the raw query: same
+        case, whole words. Lowercasing first would let one-letter tickers
+        such as "T" or "F" match stray letters.
+        """
+        with self._lock:
+            self._load()
+            return [t for t in dict.fromkeys(SYMBOL_PATTERN.findall(query)) if self.tickers.get(t)]
+
+    def search(self, query: str, k: int = 10, matches=None) -> list:
+        """BM25 top-k as (doc_id, score, content, metadata); `matches` filters on metadata."""
+        with self._lock:
+            self._load()
+            n = len(self.docs)
+            if not n:
+                return []
+            avgdl = self._total_length / n
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    length = self.docs[doc_id]["length"]
+                    scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl))
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            results = []
+            for doc_id, score in ranked:
+                doc = self.docs[doc_id]
+                if matches is not None and not matches(doc["metadata"]):
+                    continue
+                results.append((doc_id, score, doc["content"], doc["metadata"]))
+                if len(results) >= k:
+                    break
+            return results
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_keyword_index(collection_name: str = DEFAULT_COLLECTION) -> KeywordIndex:
+    with _indexes_lock:
+        if collection_name not in _indexes:
+            _indexes[collection_name] = KeywordIndex(collection_name)
+        return _indexes[collection_name]
@@ -0,0 +1,231 @@
+from openai import OpenAI
+from tools.cache import CACHE_DIR
+from tools import tracing
+import threading
+import hashlib
+import sqlite3
+import httpx
+import json
+import time
+import os
+
+# Point at any OpenAI-compatible endpoint, e.g. the local fake server in benchmarks/fake_llm.py
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") or None
+COMPLETION_MODEL = os.getenv("COMPLETION_MODEL", "gpt-3.5-turbo-instruct")
+LLM_CACHE_PATH = os.path.join(CACHE_DIR, "llm_cache.sqlite3")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL_DAYS", "30")) * 24 * 3600
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+
+class _Call:
+    """One in-flight request that identical concurrent callers wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class LLMGateway:
+    """
+    Single entry point for every completion the tools make. One OpenAI client
+    over one pooled httpx connection pool serves the whole process.
+    Deterministic (temperature 0) requests are answered from a SQLite cache
+    when possible, and identical ones already in flight are coalesced so
+    only the first caller reaches the API. Sampled requests always go out.
+    """
+
+    def __init__(self, base_url: str = LLM_BASE_URL, api_key: str = None, cache_path: str = LLM_CACHE_PATH,
+                 cache_ttl: float = LLM_CACHE_TTL, max_connections: int = LLM_MAX_CONNECTIONS):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.cache_path = cache_path
+        self.cache_ttl = cache_ttl
+        self.max_connections = max_connections
+        self._client = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._inflight = {}
+        self._stats = {
+            "requests": 0, "api_calls": 0, "cache_hits": 0, "cache_misses": 0, "coalesced": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "tokens_saved": 0,
+        }
+
+    # ----- plumbing -----
+
+    @property
+    def client(self) -> OpenAI:
+        with self._lock:
+            if self._client is None:
+                http_client = httpx.Client(
+                    limits=httpx.Limits(max_connections=self.max_connections,
+                                        max_keepalive_connections=self.max_connections),
+                    timeout=LLM_TIMEOUT,
+                )
+                self._client = OpenAI(
+                    api_key=self.api_key or os.getenv("OPENAI_API_KEY") or "not-needed",
+                    base_url=self.base_url,
+                    http_client=http_client,
+                )
+            return self._client
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, text TEXT, "
+                "prompt_tokens INTEGER, completion_tokens INTEGER, created_at REAL)"
+            )
+        return self._conn
+
+    def _cache_get(self, key: str):
+        with self._db_lock:
+            row = self._db().execute(
+                "SELECT text, prompt_tokens, completion_tokens, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[3] + self.cache_ttl < time.time():
+            return None
+        return {"text": row[0], "prompt_tokens": row[1], "completion_tokens": row[2]}
+
+    def _cache_put(self, key: str, result: dict):
+        with self._db_lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO completions (key, text, prompt_tokens, completion_tokens, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, result["text"], result["prompt_tokens"], result["completion_tokens"], time.time()),
+            )
+            db.commit()
+
+    def _count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    @staticmethod
+    def _key(kind: str, payload: dict) -> str:
+        return hashlib.sha256(json.dumps([kind, payload], sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _call_api(self, kind: str, payload: dict) -> dict:
+        with tracing.span(f"llm:{payload['model']}", "llm", endpoint=kind):
+            if kind == "chat":
+                response = self.client.chat.completions.create(**payload)
+                text = response.choices[0].message.content or ""
+            else:
+                response = self.client.completions.create(**payload)
+                text = response.choices[0].text or ""
+            usage = getattr(response, "usage", None)
+            result = {
+                "text": text,
+                "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+                "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            }
+            tracing.add("llm_calls")
+            tracing.add("prompt_tokens", result["prompt_tokens"])
+            tracing.add("completion_tokens", result["completion_tokens"])
+        self._count(api_calls=1, prompt_tokens=result["prompt_tokens"], completion_tokens=result["completion_tokens"])
+        return result
+
+    def _request(self, kind: str, payload: dict) -> str:
+        self._count(requests=1)
+        if payload.get("temperature", 1) != 0:
+            return self._call_api(kind, payload)["text"]
+
+        key = self._key(kind, payload)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._count(cache_hits=1, tokens_saved=cached["prompt_tokens"] + cached["completion_tokens"])
+            tracing.add("llm_cache_hits")
+            return cached["text"]
+
+        with self._lock:
+            call = self._inflight.get(key)
+            owner = call is None
+            if owner:
+                call = self._inflight[key] = _Call()
+
+        if not owner:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            self._count(coalesced=1, tokens_saved=call.result["prompt_tokens"] + call.result["completion_tokens"])
+            tracing.add("llm_coalesced")
+            return call.result["text"]
+
+        self._count(cache_misses=1)
+        try:
+            call.result = self._call_api(kind, payload)
+            self._cache_put(key, call.result)
+            return call.result["text"]
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    # ----- public API -----
+
+    def complete(self, prompt: str, temperature: float = 0, model: str = COMPLETION_MODEL, max_tokens: int = 256) -> str:
+        """Text completion (the endpoint LangChain's OpenAI wrapper used)."""
+        return self._request("completion", {
+            "model": model, "prompt": prompt, "temperature": temperature, "max_tokens": max_tokens,
+        })
+
+    def chat(self, messages: list, model: str = "gpt-4o-mini", temperature: float = 0, max_tokens: int = None) -> str:
+        payload = {"model": model, "messages": messages, "temperature": temperature}
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        return self._request("chat", payload)
+
+    def stream(self, prompt: str, temperature: float = 0.7, model: str = COMPLETION_MODEL, max_tokens: int = 512):
+        """Yields completion text as it is generated; never cached."""
+        self._count(requests=1, api_calls=1)
+        with tracing.span(f"llm:{model}", "llm", endpoint="completion", stream=True):
+            tracing.add("llm_calls")
+            response = self.client.completions.create(
+                model=model, prompt=prompt, temperature=temperature, max_tokens=max_tokens, stream=True,
+            )
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].text:
+                    yield chunk.choices[0].text
+
+    def llm(self, temperature: float = 0, model: str = COMPLETION_MODEL, max_tokens: int = 256) -> "GatewayLLM":
+        return GatewayLLM(self, temperature, model, max_tokens)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["cache_hits"] + stats["cache_misses"] + stats["coalesced"]
+        stats["hit_rate"] = round((stats["cache_hits"] + stats["coalesced"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+class GatewayLLM:
+    """invoke/stream facade with fixed sampling settings, a drop-in for the LangChain OpenAI wrapper."""
+
+    def __init__(self, gateway: LLMGateway, temperature: float, model: str, max_tokens: int):
+        self.gateway = gateway
+        self.temperature = temperature
+        self.model = model
+        self.max_tokens = max_tokens
+
+    def invoke(self, prompt: str) -> str:
+        return self.gateway.complete(prompt, self.temperature, self.model, self.max_tokens)
+
+    def stream(self, prompt: str):
+        return self.gateway.stream(prompt, self.temperature, self.model, self.max_tokens)
+
+
+gateway = LLMGateway()
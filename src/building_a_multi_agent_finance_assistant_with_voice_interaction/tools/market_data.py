@@ -0,0 +1,318 @@
+from concurrent.futures import ThreadPoolExecutor
+from tools.price_store import PriceStore
+from tools import tracing
+import yfinance as yf
+import pandas as pd
+import threading
+import time
+import os
+
+PRICE_STORE_ENABLED = os.getenv("PRICE_STORE_ENABLED", "1") == "1"
+
+QUOTE_TTL = 60
+HISTORY_TTL = 3600
+FUNDAMENTALS_TTL = 24 * 3600
+
+QUOTE_FIELDS = ("price", "previous_close", "change_percent", "volume")
+FUNDAMENTAL_FIELDS = ("name", "eps_trailing_12m", "market_cap", "sector", "country")
+EARNINGS_FIELDS = ("eps_actual", "eps_estimate", "earnings_date")
+
+# Fields such as EPS can legitimately be None, so misses use a sentinel
+MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe in-memory cache keyed by (symbol, field) with per-entry expiry."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < time.time():
+                self.misses += 1
+                return MISSING
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl: float):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+class YahooProvider:
+    """Fetches quotes for many symbols in a single batched yfinance download."""
+
+    def quotes(self, symbols: list) -> dict:
+        data = yf.download(
+            symbols, period="1d", group_by="ticker", threads=True,
+            progress=False, auto_adjust=False,
+        )
+        results = {}
+        for symbol in symbols:
+            try:
+                history = data[symbol] if symbol in data.columns.get_level_values(0) else data
+                history = history.dropna(how="all")
+                if history.empty:
+                    continue
+                current_price = round(float(history["Close"].iloc[-1]), 2)
+                previous_close = round(float(history["Open"].iloc[0]), 2)
+                results[symbol] = {
+                    "price": current_price,
+                    "previous_close": previous_close,
+                    "change_percent": round(((current_price - previous_close) / previous_close) * 100, 2),
+                    "volume": int(history["Volume"].iloc[-1]),
+                }
+            except Exception as e:
+                print(f"Error reading quote for {symbol}: {str(e)}")
+        return results
+
+    def fundamentals(self, symbols: list) -> dict:
+        # Yahoo has no batch endpoint for .info; fan the lookups out instead
+        tickers = yf.Tickers(" ".join(symbols))
+
+        def fetch(symbol):
+            try:
+                info = tickers.tickers[symbol].info
+                return symbol, {
+                    "name": info.get("shortName", symbol),
+                    "eps_trailing_12m": info.get("epsTrailingTwelveMonths"),
+                    "market_cap": info.get("marketCap"),
+                    "sector": info.get("sector"),
+                    "country": info.get("country"),
+                }
+            except Exception as e:
+                print(f"Error fetching fundamentals for {symbol}: {str(e)}")
+                return symbol, None
+
+        with ThreadPoolExecutor(max_workers=min(8, len(symbols))) as pool:
+            return {symbol: info for symbol, info in pool.map(fetch, symbols) if info}
+
+    def history(self, symbols: list, period: str = "1y") -> dict:
+        """Daily adjusted closes for every symbol in one batched download."""
+        data = yf.download(
+            symbols, period=period, interval="1d", threads=True,
+            progress=False, auto_adjust=True,
+        )
+        closes = data["Close"]
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(symbols[0])
+        return {
+            symbol: closes[symbol].dropna()
+            for symbol in symbols
+            if symbol in closes.columns and closes[symbol].notna().any()
+        }
+
+    def bars(self, symbols: list, start: str, end: str = None) -> dict:
+        """Daily adjusted OHLCV from `start` (inclusive) to `end` (inclusive), one batched download."""
+        data = yf.download(
+            symbols, start=start,
+            end=(pd.Timestamp(end) + pd.Timedelta(days=1)).strftime("%Y-%m-%d") if end else None,
+            interval="1d", group_by="ticker", threads=True, progress=False, auto_adjust=True,
+        )
+        results = {}
+        for symbol in symbols:
+            try:
+                frame = data[symbol] if symbol in data.columns.get_level_values(0) else data
+                frame = frame.rename(columns=str.lower).dropna(how="all")
+                if not frame.empty:
+                    results[symbol] = frame
+            except Exception as e:
+                print(f"Error reading bars for {symbol}: {str(e)}")
+        return results
+
+    def earnings(self, symbols: list) -> dict:
+        """Most recent reported EPS against the consensus estimate."""
+        tickers = yf.Tickers(" ".join(symbols))
+
+        def fetch(symbol):
+            try:
+                dates = tickers.tickers[symbol].earnings_dates
+                reported = dates.dropna(subset=["Reported EPS"]) if dates is not None else None
+                if reported is None or reported.empty:
+                    return symbol, None
+                latest = reported.sort_index().iloc[-1]
+                estimate = latest.get("EPS Estimate")
+                return symbol, {
+                    "eps_actual": float(latest["Reported EPS"]),
+                    "eps_estimate": None if pd.isna(estimate) else float(estimate),
+                    "earnings_date": reported.sort_index().index[-1].strftime("%Y-%m-%d"),
+                }
+            except Exception as e:
+                print(f"Error fetching earnings for {symbol}: {str(e)}")
+                return symbol, None
+
+        with ThreadPoolExecutor(max_workers=min(8, len(symbols))) as pool:
+            return {symbol: info for symbol, info in pool.map(fetch, symbols) if info}
+
+
+class StaticProvider:
+    """
+    Offline provider serving fixed quotes and fundamentals.
+    Counts calls so cache behaviour can be checked without Yahoo.
+    """
+
+    def __init__(self, quotes: dict = None, fundamentals: dict = None, history: dict = None, earnings: dict = None):
+        self._quotes = quotes or {}
+        self._fundamentals = fundamentals or {}
+        self._history = history or {}
+        self._earnings = earnings or {}
+        self.quote_calls = 0
+        self.fundamental_calls = 0
+        self.history_calls = 0
+
+    def quotes(self, symbols: list) -> dict:
+        self.quote_calls += 1
+        return {s: self._quotes[s] for s in symbols if s in self._quotes}
+
+    def fundamentals(self, symbols: list) -> dict:
+        self.fundamental_calls += 1
+        return {s: self._fundamentals[s] for s in symbols if s in self._fundamentals}
+
+    def history(self, symbols: list, period: str = "1y") -> dict:
+        self.history_calls += 1
+        return {s: pd.Series(self._history[s]) for s in symbols if s in self._history}
+
+    def bars(self, symbols: list, start: str, end: str = None) -> dict:
+        self.history_calls += 1
+        results = {}
+        for symbol in symbols:
+            if symbol not in self._history:
+                continue
+            close = pd.Series(self._history[symbol])
+            close.index = pd.to_datetime(close.index)
+            close = close[close.index >= pd.Timestamp(start)]
+            if end is not None:
+                close = close[close.index <= pd.Timestamp(end)]
+            if not close.empty:
+                results[symbol] = close.to_frame("close")
+        return results
+
+    def earnings(self, symbols: list) -> dict:
+        return {s: self._earnings[s] for s in symbols if s in self._earnings}
+
+
+class MarketDataEngine:
+    """
+    Serves market snapshots from a TTL cache and batches whatever is missing
+    into one provider call per data kind. Quotes expire in about a minute,
+    fundamentals (EPS, market cap) in about a day.
+    """
+
+    def __init__(self, provider=None, quote_ttl: float = QUOTE_TTL, fundamentals_ttl: float = FUNDAMENTALS_TTL,
+                 history_ttl: float = HISTORY_TTL, price_store=None):
+        self.provider = provider or YahooProvider()
+        self.price_store = price_store
+        self.quote_ttl = quote_ttl
+        self.fundamentals_ttl = fundamentals_ttl
+        self.history_ttl = history_ttl
+        self.cache = TTLCache()
+
+    def _cached(self, symbol: str, fields: tuple):
+        values = {}
+        for field in fields:
+            value = self.cache.get((symbol, field))
+            if value is MISSING:
+                return None
+            values[field] = value
+        return values
+
+    def _load(self, symbols: list, fields: tuple, fetch, ttl: float) -> dict:
+        found = {}
+        missing = []
+        for symbol in symbols:
+            values = self._cached(symbol, fields)
+            if values is None:
+                missing.append(symbol)
+            else:
+                found[symbol] = values
+
+        tracing.add("market_cache_hits", len(found))
+        tracing.add("market_cache_misses", len(missing))
+        if missing:
+            try:
+                with tracing.span(f"market_fetch:{fields[0]}", "http", symbols=len(missing)):
+                    fetched = fetch(missing)
+            except Exception as e:
+                print(f"Error fetching market data for {', '.join(missing)}: {str(e)}")
+                fetched = {}
+            for symbol, values in fetched.items():
+                for field in fields:
+                    self.cache.set((symbol, field), values.get(field), ttl)
+                found[symbol] = values
+        return found
+
+    def snapshot(self, symbols: list) -> list:
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return []
+
+        quotes = self._load(symbols, QUOTE_FIELDS, self.provider.quotes, self.quote_ttl)
+        fundamentals = self._load(symbols, FUNDAMENTAL_FIELDS, self.provider.fundamentals, self.fundamentals_ttl)
+
+        results = []
+        for symbol in symbols:
+            if symbol not in quotes:
+                continue
+            info = fundamentals.get(symbol, {})
+            results.append({
+                "ticker": symbol,
+                "name": info.get("name") or symbol,
+                **quotes[symbol],
+                "eps_trailing_12m": info.get("eps_trailing_12m"),
+                "market_cap": info.get("market_cap"),
+            })
+        return results
+
+    def history(self, symbols: list, period: str = "1y") -> pd.DataFrame:
+        """Daily closes as a date x symbol frame; symbols Yahoo has no data for are left out."""
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return pd.DataFrame()
+        field = f"close:{period}"
+
+        def fetch(missing):
+            # With a price store only bars it does not hold yet touch the network
+            if self.price_store is not None:
+                closes = self.price_store.history(missing, self.provider, period)
+            else:
+                closes = self.provider.history(missing, period)
+            return {s: {field: c} for s, c in closes.items()}
+
+        series = self._load(symbols, (field,), fetch, self.history_ttl)
+        closes = {symbol: series[symbol][field] for symbol in symbols if symbol in series}
+        return pd.DataFrame(closes).sort_index()
+
+    def earnings(self, symbols: list) -> dict:
+        """Latest reported vs estimated EPS per symbol, cached like fundamentals."""
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        return self._load(symbols, EARNINGS_FIELDS, self.provider.earnings, self.fundamentals_ttl)
+
+    def profiles(self, symbols: list) -> dict:
+        """Sector and country per symbol, served from the fundamentals cache."""
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        return self._load(symbols, ("sector", "country"), self.provider.fundamentals, self.fundamentals_ttl)
+
+    def stats(self) -> dict:
+        total = self.cache.hits + self.cache.misses
+        return {
+            "hits": self.cache.hits,
+            "misses": self.cache.misses,
+            "hit_rate": round(self.cache.hits / total, 3) if total else 0.0,
+        }
+
+
+engine = MarketDataEngine(price_store=PriceStore() if PRICE_STORE_ENABLED else None)
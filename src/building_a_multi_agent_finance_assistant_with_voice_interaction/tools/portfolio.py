@@ -0,0 +1,409 @@
+from tools.exchanges import currency_for, exchange_for, last_completed_session
+from tools.cache import CACHE_DIR
+from tools.market_data import engine
+import pandas as pd
+import threading
+import json
+import math
+import os
+
+USER_PREFERENCES_PATH = os.getenv("USER_PREFERENCES_PATH", os.path.join("knowledge", "user_preference.txt"))
+PORTFOLIO_PATH = os.getenv("PORTFOLIO_PATH", os.path.join(CACHE_DIR, "portfolio.json"))
+TRADING_DAYS = 252
+# Every position is valued in this currency; Yahoo quotes "{CCY}=X" as units of CCY per USD
+BASE_CURRENCY = os.getenv("BASE_CURRENCY", "USD").upper()
+
+# Bootstrap once with a year of bars, then only the last few days are fetched
+BOOTSTRAP_PERIOD = "1y"
+REFRESH_PERIOD = "5d"
+CATCH_UP_PERIOD = "1mo"
+FX_PERIOD = "5d"
+
+LIST_PREFERENCES = ("regions", "sectors")
+
+# Exchange suffix -> region, used when Yahoo has no country for a symbol
+SUFFIX_REGIONS = {
+    "T": "Asia", "KS": "Asia", "KQ": "Asia", "HK": "Asia", "SS": "Asia", "SZ": "Asia", "TW": "Asia",
+    "NS": "Asia", "BO": "Asia", "SI": "Asia", "AX": "Asia", "JK": "Asia", "BK": "Asia",
+    "L": "Europe", "DE": "Europe", "PA": "Europe", "AS": "Europe", "MI": "Europe", "SW": "Europe",
+    "MC": "Europe", "ST": "Europe", "CO": "Europe", "OL": "Europe", "HE": "Europe", "BR": "Europe",
+    "TO": "North America", "V": "North America", "MX": "North America",
+}
+COUNTRY_REGIONS = {
+    "United States": "North America", "Canada": "North America", "Mexico": "North America",
+    "Japan": "Asia", "South Korea": "Asia", "Taiwan": "Asia", "China": "Asia", "Hong Kong": "Asia",
+    "India": "Asia", "Singapore": "Asia", "Australia": "Asia", "Indonesia": "Asia", "Thailand": "Asia",
+    "United Kingdom": "Europe", "Germany": "Europe", "France": "Europe", "Netherlands": "Europe",
+    "Switzerland": "Europe", "Italy": "Europe", "Spain": "Europe", "Sweden": "Europe", "Ireland": "Europe",
+    "Denmark": "Europe", "Norway": "Europe", "Finland": "Europe", "Belgium": "Europe",
+}
+
+
+def load_preferences(path: str = USER_PREFERENCES_PATH) -> dict:
+    """
+    Parses the key=value preference file. Lists (regions, sectors, watchlist)
+    are split on commas; holdings use "SYMBOL:QTY[:REGION[:SECTOR]]" entries.
+    """
+    preferences = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except OSError:
+        print(f"⚠️ No user preferences at {path}, using defaults")
+        return preferences
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = (part.strip() for part in line.split("=", 1))
+        if key in LIST_PREFERENCES or key == "watchlist":
+            preferences[key] = [item.strip() for item in value.split(",") if item.strip()]
+        elif key == "holdings":
+            holdings = {}
+            for item in value.split(","):
+                parts = [p.strip() for p in item.split(":")]
+                if len(parts) < 2 or not parts[0]:
+                    continue
+                holdings[parts[0]] = {
+                    "quantity": float(parts[1]),
+                    "region": parts[2] if len(parts) > 2 and parts[2] else None,
+                    "sector": parts[3] if len(parts) > 3 and parts[3] else None,
+                }
+            preferences[key] = holdings
+        else:
+            preferences[key] = value
+    return preferences
+
+
+def region_for(symbol: str, country: str = None) -> str:
+    if country in COUNTRY_REGIONS:
+        return COUNTRY_REGIONS[country]
+    suffix = symbol.rsplit(".", 1)[1].upper() if "." in symbol else ""
+    return SUFFIX_REGIONS.get(suffix, "North America" if not suffix else "Other")
+
+
+def _period_since(last_date: str) -> str:
+    """Smallest Yahoo period that still covers every bar after last_date."""
+    if last_date is None:
+        return BOOTSTRAP_PERIOD
+    days = (pd.Timestamp.now().normalize() - pd.Timestamp(last_date)).days
+    if days <= 5:
+        return REFRESH_PERIOD
+    return CATCH_UP_PERIOD if days <= 28 else BOOTSTRAP_PERIOD
+
+
+def fx_symbol(currency: str) -> str:
+    return f"{currency}=X"
+
+
+def _new_position(quantity: float, region: str = None, sector: str = None) -> dict:
+    return {
+        "quantity": quantity,
+        "region": region,
+        "sector": sector,
+        # Latest bar, which may belong to a session still trading
+        "last_date": None,
+        "close": None,
+        "previous_close": None,
+        "provisional": False,
+        # Running return statistics (Welford) and drawdown state over completed sessions only
+        "settled_date": None,
+        "settled_close": None,
+        "count": 0,
+        "mean": 0.0,
+        "m2": 0.0,
+        "peak": None,
+        "max_drawdown": 0.0,
+    }
+
+
+def _migrate(position: dict) -> dict:
+    """Fills fields added since the state file was written; stored bars were all treated as final."""
+    position.setdefault("settled_date", position.get("last_date"))
+    position.setdefault("settled_close", position.get("close"))
+    for field, default in _new_position(position.get("quantity", 0.0)).items():
+        position.setdefault(field, default)
+    return position
+
+
+class Portfolio:
+    """
+    Holdings and watchlist seeded from the user preference file and persisted
+    as JSON. Each position keeps running statistics, so a new daily bar costs
+    O(1) per position instead of recomputing the whole history; the previous
+    close is kept alongside the latest one, which makes "exposure change since
+    yesterday" a direct read. The latest bar is provisional until its session
+    closes: it is replaced on every refresh and only reaches the statistics
+    once it is final. Values are converted to BASE_CURRENCY with the latest
+    and previous FX closes, so holdings quoted in KRW, JPY and USD add up.
+    """
+
+    def __init__(self, path: str = PORTFOLIO_PATH, preferences: dict = None):
+        self.path = path
+        self.preferences = preferences if preferences is not None else load_preferences()
+        self.watchlist = list(self.preferences.get("watchlist", []))
+        self.positions = {}
+        self.fx = {}
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.positions = {symbol: _migrate(p) for symbol, p in state.get("positions", {}).items()}
+            self.watchlist = state.get("watchlist", self.watchlist)
+            self.fx = state.get("fx", {})
+        except (OSError, ValueError):
+            self.positions = {}
+            self.fx = {}
+
+        # Holdings in the preference file win over the stored quantities
+        for symbol, holding in self.preferences.get("holdings", {}).items():
+            self.set_holding(symbol, holding["quantity"], holding["region"], holding["sector"], save=False)
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"positions": self.positions, "watchlist": self.watchlist, "fx": self.fx}, f)
+            os.replace(tmp_path, self.path)
+
+    def set_holding(self, symbol: str, quantity: float, region: str = None, sector: str = None, save: bool = True):
+        with self._lock:
+            position = self.positions.get(symbol)
+            if position is None:
+                position = self.positions[symbol] = _new_position(quantity, region, sector)
+            position["quantity"] = quantity
+            position["region"] = region or position.get("region")
+            position["sector"] = sector or position.get("sector")
+            if save:
+                self.save()
+
+    def remove_holding(self, symbol: str):
+        with self._lock:
+            if self.positions.pop(symbol, None) is not None:
+                self.save()
+
+    def symbols(self) -> list:
+        with self._lock:
+            return list(self.positions)
+
+    @staticmethod
+    def _settle(position: dict, date: str, close: float):
+        """Adds one completed session to the return and drawdown statistics."""
+        if position["settled_date"] is not None and date <= position["settled_date"]:
+            return
+        if position["settled_close"] is not None:
+            ret = close / position["settled_close"] - 1
+            position["count"] += 1
+            delta = ret - position["mean"]
+            position["mean"] += delta / position["count"]
+            position["m2"] += delta * (ret - position["mean"])
+
+        position["peak"] = close if position["peak"] is None else max(position["peak"], close)
+        position["max_drawdown"] = min(position["max_drawdown"], close / position["peak"] - 1)
+        position["settled_close"] = close
+        position["settled_date"] = date
+
+    def update_bar(self, symbol: str, date: str, close: float, final: bool = True) -> bool:
+        """
+        Folds one daily close into a position. A bar for the latest date
+        replaces it while that bar is provisional; final bars (and provisional
+        ones superseded by a later date) are added to the statistics once.
+        Older bars are ignored, so replaying overlapping history is harmless.
+        """
+        with self._lock:
+            position = self.positions.get(symbol)
+            if position is None or close is None or not math.isfinite(close):
+                return False
+            last_date = position["last_date"]
+            if last_date is not None and date < last_date:
+                return False
+
+            if date == last_date:
+                if not position["provisional"] or (close == position["close"] and not final):
+                    return False
+                position["close"] = close
+            else:
+                if position["provisional"]:
+                    # No final bar arrived for it; its last close stands
+                    self._settle(position, last_date, position["close"])
+                position["previous_close"] = position["close"]
+                position["close"] = close
+                position["last_date"] = date
+
+            position["provisional"] = not final
+            if final:
+                self._settle(position, date, close)
+            return True
+
+    def refresh(self, market=None) -> int:
+        """
+        Pulls recent bars for every holding and folds in only the new ones;
+        bars after the exchange's last completed session stay provisional.
+        Positions never seen before are bootstrapped with a year of history.
+        """
+        market = market or engine
+        batches = {}
+        with self._lock:
+            for symbol, position in self.positions.items():
+                batches.setdefault(_period_since(position["last_date"]), []).append(symbol)
+
+        updated = 0
+        for period, symbols in batches.items():
+            closes = market.history(symbols, period)
+            for symbol in closes.columns:
+                settled = last_completed_session(exchange_for(symbol))
+                for date, close in closes[symbol].dropna().items():
+                    date = pd.Timestamp(date).strftime("%Y-%m-%d")
+                    updated += self.update_bar(symbol, date, float(close), final=date <= settled)
+
+        with self._lock:
+            missing_meta = [s for s, p in self.positions.items() if not p.get("region") or not p.get("sector")]
+        if missing_meta:
+            profiles = market.profiles(missing_meta)
+            with self._lock:
+                for symbol in missing_meta:
+                    position = self.positions.get(symbol)
+                    if position is None:
+                        continue
+                    info = profiles.get(symbol, {})
+                    position["region"] = position.get("region") or region_for(symbol, info.get("country"))
+                    position["sector"] = position.get("sector") or info.get("sector") or "Unknown"
+
+        fx_updated = self.refresh_fx(market)
+        if updated or missing_meta or fx_updated:
+            self.save()
+        return updated
+
+    def currencies(self) -> set:
+        """Currencies that need a USD rate to value the holdings in BASE_CURRENCY."""
+        with self._lock:
+            needed = {currency_for(symbol)[0] for symbol in self.positions} | {BASE_CURRENCY}
+        return needed - {"USD"}
+
+    def refresh_fx(self, market=None) -> bool:
+        """Latest and previous {CCY}=X closes for every currency the holdings use, in one batch."""
+        currencies = sorted(self.currencies())
+        if not currencies:
+            return False
+        market = market or engine
+        closes = market.history([fx_symbol(c) for c in currencies], FX_PERIOD)
+
+        changed = False
+        with self._lock:
+            for currency in currencies:
+                symbol = fx_symbol(currency)
+                series = closes[symbol].dropna() if symbol in closes.columns else None
+                if series is None or series.empty:
+                    if currency not in self.fx:
+                        print(f"⚠️ No {symbol} rate, positions in {currency} are left out of exposure")
+                    continue
+                rate = {
+                    "last_date": pd.Timestamp(series.index[-1]).strftime("%Y-%m-%d"),
+                    "close": float(series.iloc[-1]),
+                    "previous_close": float(series.iloc[-2]) if len(series) > 1 else float(series.iloc[-1]),
+                }
+                changed = changed or self.fx.get(currency) != rate
+                self.fx[currency] = rate
+        return changed
+
+    def _usd_rate(self, currency: str, previous: bool = False):
+        """Units of `currency` per USD, or None when no rate has been fetched."""
+        if currency == "USD":
+            return 1.0
+        rate = self.fx.get(currency)
+        if rate is None:
+            return None
+        return rate["previous_close" if previous else "close"] or rate["close"]
+
+    def _values(self, previous: bool = False) -> dict:
+        """Position values in BASE_CURRENCY; positions without a close or an FX rate are left out."""
+        field = "previous_close" if previous else "close"
+        base_rate = self._usd_rate(BASE_CURRENCY, previous)
+        values = {}
+        for symbol, p in self.positions.items():
+            currency, units = currency_for(symbol)
+            rate = self._usd_rate(currency, previous)
+            if p[field] is None or rate is None or base_rate is None:
+                continue
+            values[symbol] = p["quantity"] * p[field] / units / rate * base_rate
+        return values
+
+    def exposure(self, by: str = "region", previous: bool = False) -> dict:
+        """Share of portfolio value per region, sector or symbol at the latest (or previous) close."""
+        with self._lock:
+            values = self._values(previous)
+            total = sum(values.values())
+            grouped = {}
+            for symbol, value in values.items():
+                key = symbol if by == "symbol" else (self.positions[symbol].get(by) or "Unknown")
+                grouped[key] = grouped.get(key, 0.0) + value
+            return {key: value / total for key, value in grouped.items()} if total else {}
+
+    def exposure_change(self, by: str = "region") -> dict:
+        """Today's vs yesterday's allocation per group, in percentage points, plus the value change."""
+        with self._lock:
+            today = self.exposure(by)
+            yesterday = self.exposure(by, previous=True)
+            value_today = sum(self._values().values())
+            value_yesterday = sum(self._values(previous=True).values())
+            as_of = max((p["last_date"] for p in self.positions.values() if p["last_date"]), default=None)
+
+        groups = {}
+        for key in sorted(set(today) | set(yesterday)):
+            groups[key] = {
+                "yesterday_pct": round(yesterday.get(key, 0.0) * 100, 2),
+                "today_pct": round(today.get(key, 0.0) * 100, 2),
+                "change_pp": round((today.get(key, 0.0) - yesterday.get(key, 0.0)) * 100, 2),
+            }
+        return {
+            "as_of": as_of,
+            "by": by,
+            "currency": BASE_CURRENCY,
+            "value": round(value_today, 2),
+            "value_change_pct": round((value_today / value_yesterday - 1) * 100, 2) if value_yesterday else None,
+            "groups": groups,
+        }
+
+    def weights(self, previous: bool = False) -> dict:
+        return self.exposure("symbol", previous)
+
+    def risk(self) -> dict:
+        """Per-position volatility and drawdown read straight from the running statistics."""
+        with self._lock:
+            return {
+                symbol: {
+                    "annual_volatility": round(math.sqrt(p["m2"] / (p["count"] - 1) * TRADING_DAYS), 4)
+                    if p["count"] > 1 else None,
+                    "max_drawdown": round(p["max_drawdown"], 4),
+                    "observations": p["count"],
+                }
+                for symbol, p in self.positions.items()
+            }
+
+    def summary(self) -> dict:
+        return {
+            "regions": self.preferences.get("regions", []),
+            "sectors": self.preferences.get("sectors", []),
+            "watchlist": self.watchlist,
+            "exposure_change_by_region": self.exposure_change("region"),
+            "exposure_change_by_sector": self.exposure_change("sector"),
+            "risk": self.risk(),
+        }
+
+
+_portfolio = None
+_portfolio_lock = threading.Lock()
+
+
+def get_portfolio() -> Portfolio:
+    """Process-wide portfolio, loaded on first use."""
+    global _portfolio
+    with _portfolio_lock:
+        if _portfolio is None:
+            _portfolio = Portfolio()
+        return _portfolio
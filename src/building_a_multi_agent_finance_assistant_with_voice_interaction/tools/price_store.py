@@ -0,0 +1,287 @@
+from tools.exchanges import exchange_for, last_completed_session, local_now
+from tools.cache import CACHE_DIR
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pandas as pd
+import threading
+import json
+import time
+import os
+
+PRICE_STORE_PATH = os.getenv("PRICE_STORE_PATH", os.path.join(CACHE_DIR, "prices"))
+BAR_COLUMNS = ("open", "high", "low", "close", "volume")
+BACKFILL_START = os.getenv("PRICE_BACKFILL_START", "2000-01-01")
+STORE_REFRESH_SECONDS = 900
+
+SCHEMA = pa.schema([
+    ("date", pa.timestamp("s")),
+    ("open", pa.float64()),
+    ("high", pa.float64()),
+    ("low", pa.float64()),
+    ("close", pa.float64()),
+    ("volume", pa.float64()),
+])
+
+# Yahoo period strings -> calendar offsets for range reads
+PERIODS = {
+    "1d": pd.DateOffset(days=1), "5d": pd.DateOffset(days=7), "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3), "6mo": pd.DateOffset(months=6), "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2), "5y": pd.DateOffset(years=5), "10y": pd.DateOffset(years=10),
+}
+
+
+def period_start(period: str, today: pd.Timestamp = None) -> pd.Timestamp:
+    """First date covered by a Yahoo-style period such as "1y"; "max" and "ytd" are supported."""
+    today = (today or pd.Timestamp.now()).normalize()
+    if period == "max":
+        return pd.Timestamp(BACKFILL_START)
+    if period == "ytd":
+        return today.replace(month=1, day=1)
+    return today - PERIODS[period]
+
+
+def _safe(symbol: str) -> str:
+    return symbol.replace("/", "_").replace("^", "_idx_")
+
+
+def settled_through(symbol: str, now=None) -> pd.Timestamp:
+    """Last session date whose bar is final, judged by the listing exchange's clock and close time."""
+    return pd.Timestamp(last_completed_session(exchange_for(symbol), now))
+
+
+def exchange_today(symbol: str, now=None) -> pd.Timestamp:
+    """The current calendar date on the listing exchange."""
+    return pd.Timestamp(local_now(exchange_for(symbol), now).date())
+
+
+class PriceStore:
+    """
+    Daily bars on disk as Parquet, one directory per symbol and one file per
+    year (prices/symbol=AAPL/year=2024.parquet). Only bars outside the stored
+    date range are ever fetched, and a write rewrites just the year files it
+    touches. Reads are memory-mapped and only open the years a range needs.
+    A bar for a session that has not closed yet on its exchange is kept in
+    memory, so a partial intraday close is never persisted.
+    """
+
+    def __init__(self, root: str = PRICE_STORE_PATH):
+        self.root = root
+        self._lock = threading.RLock()
+        self._manifest_path = os.path.join(root, "manifest.json")
+        self._manifest = None
+        self._live = {}
+        self._checked = {}
+
+    # ----- layout -----
+
+    def _dir(self, symbol: str) -> str:
+        return os.path.join(self.root, f"symbol={_safe(symbol)}")
+
+    def _file(self, symbol: str, year: int) -> str:
+        return os.path.join(self._dir(symbol), f"year={year}.parquet")
+
+    def _manifest_data(self) -> dict:
+        if self._manifest is None:
+            try:
+                with open(self._manifest_path, "r", encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self._manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp_path, self._manifest_path)
+
+    def coverage(self, symbol: str):
+        """(first_date, last_date) stored for a symbol, as YYYY-MM-DD strings, or None."""
+        with self._lock:
+            entry = self._manifest_data().get(symbol)
+            return (entry["first"], entry["last"]) if entry else None
+
+    def _floor(self, symbol: str):
+        """Earliest date the provider has been asked for; it had nothing older."""
+        floor = (self._manifest_data().get(symbol) or {}).get("floor")
+        return pd.Timestamp(floor) if floor else None
+
+    # ----- writes -----
+
+    def append(self, symbol: str, bars: pd.DataFrame, now=None) -> int:
+        """
+        Adds completed bars outside the stored date range (older history or
+        newer sessions); returns how many were written. `bars` is indexed by
+        exchange-local date with open/high/low/close/volume.
+        """
+        if bars is None or bars.empty:
+            return 0
+        bars = bars.copy()
+        bars.index = pd.DatetimeIndex(bars.index).tz_localize(None).normalize()
+        bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+        bars = bars.reindex(columns=list(BAR_COLUMNS)).dropna(subset=["close"])
+
+        settled = settled_through(symbol, now)
+        with self._lock:
+            live = bars[bars.index > settled]
+            if not live.empty:
+                self._live[symbol] = live
+            bars = bars[bars.index <= settled]
+
+            coverage = self.coverage(symbol)
+            if coverage:
+                bars = bars[(bars.index < pd.Timestamp(coverage[0])) | (bars.index > pd.Timestamp(coverage[1]))]
+            if bars.empty:
+                return 0
+
+            for year, rows in bars.groupby(bars.index.year):
+                table = pa.Table.from_pandas(
+                    rows.rename_axis("date").reset_index(), schema=SCHEMA, preserve_index=False,
+                )
+                path = self._file(symbol, year)
+                if os.path.exists(path):
+                    table = pa.concat_tables([pq.read_table(path, schema=SCHEMA), table]).sort_by("date")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                pq.write_table(table, tmp_path, compression="zstd")
+                os.replace(tmp_path, path)
+
+            manifest = self._manifest_data()
+            first, last = bars.index[0].strftime("%Y-%m-%d"), bars.index[-1].strftime("%Y-%m-%d")
+            if coverage:
+                first, last = min(first, coverage[0]), max(last, coverage[1])
+            manifest[symbol] = {**manifest.get(symbol, {}), "first": first, "last": last}
+            self._save_manifest()
+            return len(bars)
+
+    def _missing_ranges(self, symbol: str, start: pd.Timestamp) -> list:
+        today = exchange_today(symbol)
+        coverage = self.coverage(symbol)
+        if coverage is None:
+            return [(start, None)]
+        first, last = pd.Timestamp(coverage[0]), pd.Timestamp(coverage[1])
+        ranges = []
+        if start < first:
+            ranges.append((start, first - pd.Timedelta(days=1)))
+        if last + pd.Timedelta(days=1) <= today:
+            ranges.append((last + pd.Timedelta(days=1), None))
+        return ranges
+
+    def backfill(self, symbols: list, provider, start=BACKFILL_START) -> dict:
+        """
+        Fetches only the bars missing between `start` and each exchange's
+        current date. Symbols that
+        share a missing range go out in one batched download, so a whole
+        watchlist usually costs a single provider call. The recent edge is
+        re-checked at most every STORE_REFRESH_SECONDS per symbol.
+        """
+        start = pd.Timestamp(start)
+        now = time.time()
+        batches = {}
+        with self._lock:
+            for symbol in dict.fromkeys(symbols):
+                for since, until in self._missing_ranges(symbol, start):
+                    if until is None and now - self._checked.get(symbol, 0) < STORE_REFRESH_SECONDS:
+                        continue
+                    # Listings younger than `start` have nothing older to give
+                    floor = self._floor(symbol)
+                    if until is not None and floor is not None and floor <= since:
+                        continue
+                    batches.setdefault((since, until), []).append(symbol)
+
+        written = {}
+        for (since, until), batch in batches.items():
+            try:
+                fetched = provider.bars(batch, since.strftime("%Y-%m-%d"),
+                                        until.strftime("%Y-%m-%d") if until is not None else None)
+            except Exception as e:
+                print(f"Error backfilling prices for {', '.join(batch)}: {str(e)}")
+                continue
+            with self._lock:
+                for symbol in batch:
+                    if until is None:
+                        self._checked[symbol] = now
+            for symbol, bars in fetched.items():
+                written[symbol] = written.get(symbol, 0) + self.append(symbol, bars)
+            # Persisted with the coverage so a restart does not ask again for years a young listing never had
+            with self._lock:
+                manifest = self._manifest_data()
+                day = since.strftime("%Y-%m-%d")
+                floored = [s for s in batch if s in manifest and day < manifest[s].get("floor", "9999-12-31")]
+                for symbol in floored:
+                    manifest[symbol]["floor"] = day
+                if floored:
+                    self._save_manifest()
+        if any(written.values()):
+            print(f"💾 Price store: wrote {sum(written.values())} bars for {len(written)} symbol(s)")
+        return written
+
+    # ----- reads -----
+
+    def read(self, symbol: str, start=None, end=None, columns: tuple = ("close",), now=None) -> pd.DataFrame:
+        """
+        Bars in [start, end] from the year files the range touches, memory-mapped,
+        plus the in-memory bar of a session still trading.
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        coverage = self.coverage(symbol)
+
+        tables = []
+        if coverage:
+            first_year = max(int(coverage[0][:4]), start.year if start is not None else 0)
+            last_year = min(int(coverage[1][:4]), end.year if end is not None else 9999)
+            for year in range(first_year, last_year + 1):
+                path = self._file(symbol, year)
+                if os.path.exists(path):
+                    tables.append(pq.read_table(path, columns=["date", *columns], memory_map=True))
+
+        frame = pd.DataFrame(columns=list(columns), index=pd.DatetimeIndex([], name="date"))
+        if tables:
+            table = pa.concat_tables(tables)
+            mask = None
+            if start is not None:
+                mask = pc.greater_equal(table["date"], pa.scalar(start.to_pydatetime(), pa.timestamp("s")))
+            if end is not None:
+                upper = pc.less_equal(table["date"], pa.scalar(end.to_pydatetime(), pa.timestamp("s")))
+                mask = upper if mask is None else pc.and_(mask, upper)
+            if mask is not None:
+                table = table.filter(mask)
+            frame = table.to_pandas(split_blocks=True, self_destruct=True).set_index("date")
+
+        live = self._live.get(symbol)
+        if live is not None:
+            # Once its session closes the live bar is dropped; the next backfill stores the final one
+            live = live[live.index > settled_through(symbol, now)]
+            if end is not None:
+                live = live[live.index <= end]
+            if not live.empty:
+                frame = pd.concat([frame, live[list(columns)]])
+                frame = frame[~frame.index.duplicated(keep="last")]
+        return frame
+
+    def closes(self, symbols: list, start=None, end=None) -> pd.DataFrame:
+        """Close prices as a date x symbol frame."""
+        series = {}
+        for symbol in dict.fromkeys(symbols):
+            close = self.read(symbol, start, end)["close"]
+            if not close.empty:
+                series[symbol] = close.astype(float)
+        return pd.DataFrame(series).sort_index()
+
+    def history(self, symbols: list, provider, period: str = "1y") -> dict:
+        """Provider-shaped {symbol: close series}: missing bars are fetched first, then read locally."""
+        start = period_start(period)
+        self.backfill(symbols, provider, start)
+        closes = self.closes(symbols, start=start)
+        return {symbol: closes[symbol].dropna() for symbol in closes.columns}
+
+    def stats(self) -> dict:
+        with self._lock:
+            manifest = self._manifest_data()
+            size = 0
+            for dirpath, _, filenames in os.walk(self.root):
+                size += sum(os.path.getsize(os.path.join(dirpath, name)) for name in filenames)
+            return {"symbols": len(manifest), "bytes": size}
@@ -0,0 +1,155 @@
+from tools.llm_gateway import gateway
+from tools.entities import known_names
+import threading
+import json
+import time
+import re
+
+VALIDATION_MODEL = "gpt-4"
+MAX_CACHED_QUERIES = 512
+
+# Market-abuse topics. A mention alone is not unethical ("what are insider
+# trading rules?"), so the rules only reject a clear request to do it.
+UNETHICAL_PATTERNS = re.compile(
+    r"insider (trading|information|tip)|pump(ing)? and dump|manipulat\w* (the )?(price|market|stock)"
+    r"|front[- ]?run|launder|tax evasion|evade tax|wash trad|spoofing|ponzi",
+    re.IGNORECASE,
+)
+ABUSE_REQUEST = re.compile(
+    r"\b(how (can|do|could|should) (i|we)|how to|help me|teach me|show me|give me|get me|send me"
+    r"|i want to|i'd like to|let's|(best|easiest|quickest) way to|ways to|tips? (for|on) how)\b",
+    re.IGNORECASE,
+)
+# Questions about rules, detection or prevention are for the LLM to judge
+INFORMATIONAL = re.compile(
+    r"\b(what (is|are|was|were|counts)|explain|define|definition|rules?|laws?|legal\w*|illegal\w*|regulat\w*"
+    r"|complian\w*|comply|penalt\w*|fines?|detect\w*|spot\w*|identif\w*|prevent\w*|avoid\w*|report\w*"
+    r"|protect\w*|history|examples?|cases?)\b",
+    re.IGNORECASE,
+)
+FINANCE_TERMS = re.compile(
+    r"\b(buy|sell|hold|short|invest\w*|stocks?|shares?|equit\w+|price|target|earnings|eps|revenue|guidance"
+    r"|dividends?|portfolio|exposure|allocation|valuation|market|index|bonds?|yield|ipo|results|outlook"
+    r"|rally|sell-?off|risk|returns?|quarter\w*|q[1-4])\b",
+    re.IGNORECASE,
+)
+# Explicit ticker syntax only; bare words count once they resolve to a listed symbol
+TICKER_PATTERNS = re.compile(
+    r"\$[A-Za-z]{1,6}\b"                                   # cashtags
+    r"|\b[A-Z0-9]{1,10}\.(NS|BO|L|T|HK|KS|KQ|DE|PA|AS|MI|TO|AX|SS|SZ|SI|SW)\b"  # exchange-qualified
+)
+
+LLM_SYSTEM_PROMPT = """
+You are a compliance officer for a financial assistant.
+
+Evaluate the following query and respond ONLY with JSON like:
+{
+  "is_finance": true,
+  "is_ethical": true,
+  "confidence": 42,
+  "reason": "Explain the confidence level briefly.",
+  "suggestions": [
+    "Improved version of the query suggestion 1",
+    "Improved version of the query suggestion 2"
+  ]
+}
+"""
+
+_results = {}
+_lock = threading.Lock()
+
+
+def _normalize(query: str) -> str:
+    return " ".join(str(query).lower().split())
+
+
+def _mentions_company(query: str) -> bool:
+    if TICKER_PATTERNS.search(query):
+        return True
+    lowered = f" {_normalize(query)} "
+    return any(f" {name} " in lowered for name in known_names())
+
+
+def rule_validate(query: str):
+    """
+    Millisecond tier: settles clear requests to commit market abuse and
+    obvious finance queries (a resolved company or ticker plus a finance
+    term). Returns None when the rules cannot decide and the LLM should be
+    asked, including any other query that mentions an abuse topic.
+    """
+    if UNETHICAL_PATTERNS.search(query):
+        if ABUSE_REQUEST.search(query) and not INFORMATIONAL.search(query):
+            return {
+                "is_finance": True,
+                "is_ethical": False,
+                "confidence": 95,
+                "reason": "The query asks for market abuse or otherwise unlawful activity.",
+                "suggestions": [],
+            }
+        return None
+    if FINANCE_TERMS.search(query) and _mentions_company(query):
+        return {
+            "is_finance": True,
+            "is_ethical": True,
+            "confidence": 90,
+            "reason": "Names a listed company or ticker together with a clear financial intent.",
+            "suggestions": [],
+        }
+    return None
+
+
+def llm_validate(query: str) -> dict:
+    try:
+        # Temperature 0 so repeated queries are served from the gateway cache
+        text_response = gateway.chat(
+            messages=[
+                {"role": "system", "content": LLM_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Query: {query}"}
+            ],
+            model=VALIDATION_MODEL,
+            temperature=0,
+            max_tokens=500,
+        ).strip()
+        json_part = text_response[text_response.find("{"):text_response.rfind("}") + 1]
+        return json.loads(json_part)
+
+    except Exception as e:
+        return {
+            "is_finance": False,
+            "is_ethical": False,
+            "confidence": 0,
+            "reason": f"Validation failed: {e}",
+            "suggestions": []
+        }
+
+
+def validate_query(query: str) -> dict:
+    """
+    Tiered validation: rules first, LLM only for ambiguous queries. The result
+    (with "tier" and "elapsed_ms") is remembered so later stages such as the
+    confidence checker reuse it instead of re-scoring the query.
+    """
+    cached = cached_validation(query)
+    if cached is not None:
+        return cached
+
+    start = time.perf_counter()
+    result = rule_validate(query)
+    tier = "rules"
+    if result is None:
+        result = llm_validate(query)
+        tier = "llm"
+    result = {**result, "tier": tier, "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    # Failed LLM calls are not remembered
+    if tier == "rules" or not str(result.get("reason", "")).startswith("Validation failed"):
+        with _lock:
+            if len(_results) >= MAX_CACHED_QUERIES:
+                _results.pop(next(iter(_results)))
+            _results[_normalize(query)] = result
+    return result
+
+
+def cached_validation(query: str):
+    with _lock:
+        return _results.get(_normalize(query))
@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta
+from tools.vector_store import get_vectordb
+from tools.cache import CACHE_DIR
+from tools.entities import extract_entities
+from tools.exchanges import exchange_for, is_open, local_now, next_open, session_close
+import threading
+import hashlib
+import time
+import re
+import os
+
+COLLECTION_NAME = "response_cache"
+SIMILARITY_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.92"))
+# Neighbours checked per lookup, so an expired or mismatched top hit does not hide a good one
+CANDIDATES = 5
+
+# Answers go stale faster while any market the query touches is trading
+INTRADAY_TTL = timedelta(minutes=15)
+
+# A cached brief only answers a query asking the same thing about the same companies
+INTENT_PATTERNS = {
+    "buy": re.compile(r"\b(buy|buying|purchase|accumulate|go long|add to)\b"),
+    "sell": re.compile(r"\b(sell|selling|dump|exit|trim|reduce|take profits?)\b"),
+    "hold": re.compile(r"\b(hold|holding|keep)\b"),
+    "compare": re.compile(r"\b(compare|comparison|versus|vs|better than|outperform)\b"),
+    "risk": re.compile(r"\b(risk|exposure|volatility|drawdown|hedge)\b"),
+    "earnings": re.compile(r"\b(earnings|eps|surprise|beat|miss|guidance|results)\b"),
+}
+
+
+def query_intent(query: str) -> str:
+    """Comma-joined intents the query asks about, or "brief" for a general market update."""
+    lowered = str(query).lower()
+    intents = [name for name, pattern in INTENT_PATTERNS.items() if pattern.search(lowered)]
+    return ",".join(intents) or "brief"
+
+
+def entity_key(entities: list) -> str:
+    """Sorted, comma-joined symbols the query resolved to."""
+    return ",".join(sorted({str(e.get("symbol", "")).upper() for e in entities if e.get("symbol")}))
+
+
+def expires_at(symbols: list = None, now: datetime = None) -> float:
+    """
+    While an exchange the brief covers is trading, the brief is fresh for
+    INTRADAY_TTL (capped at that exchange's close). Outside every session
+    nothing moves, so it stays valid until the next of them opens. Sessions
+    are read in each exchange's own timezone; no symbols means US hours.
+    """
+    now = now or datetime.now().astimezone()
+    exchanges = {exchange_for(symbol) for symbol in symbols or []} or {exchange_for("")}
+
+    deadlines = []
+    for exchange in exchanges:
+        if is_open(exchange, now):
+            deadlines.append(min(local_now(exchange, now) + INTRADAY_TTL, session_close(exchange, now)))
+        else:
+            deadlines.append(next_open(exchange, now))
+    return min(deadline.timestamp() for deadline in deadlines)
+
+
+class SemanticResponseCache:
+    """
+    Maps queries to finished briefs (and their audio) in a dedicated Chroma
+    collection, so near-identical questions skip the crew entirely. Wording
+    alone is not enough: a hit must resolve to the same companies and ask
+    for the same thing ("buy" vs "sell").
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, audio_dir: str = None):
+        self.threshold = threshold
+        self.audio_dir = audio_dir or os.path.join(CACHE_DIR, "responses")
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def store(self):
+        return get_vectordb(COLLECTION_NAME)
+
+    def lookup(self, query: str, entities: list = None):
+        """
+        Returns {"brief", "audio", "audio_format", "similarity", "created_at"} for
+        a fresh match about the same companies with the same intent, else None.
+        """
+        if entities is None:
+            entities = extract_entities(query)
+        symbols, intent = entity_key(entities), query_intent(query)
+
+        hit = None
+        results = self.store.similarity_search_with_relevance_scores(query, k=CANDIDATES)
+        for doc, score in sorted(results, key=lambda item: item[1], reverse=True):
+            if doc.metadata.get("expires_at", 0) < time.time():
+                self.store.delete(ids=[doc.metadata["entry_id"]])
+                continue
+            if score < self.threshold:
+                break
+            if doc.metadata.get("symbols") != symbols or doc.metadata.get("intent") != intent:
+                continue
+            hit = {
+                "brief": doc.metadata["brief"],
+                "audio": self._read_audio(doc.metadata.get("audio_path")),
+                "audio_format": doc.metadata.get("audio_format", "mp3"),
+                "similarity": round(score, 3),
+                "created_at": doc.metadata.get("created_at"),
+            }
+            break
+
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return hit
+
+    def store_response(self, query: str, brief: str, audio: bytes = None, audio_format: str = "mp3",
+                       entities: list = None):
+        if entities is None:
+            entities = extract_entities(query)
+        symbols = entity_key(entities)
+        entry_id = hashlib.sha256(" ".join(query.lower().split()).encode("utf-8")).hexdigest()
+        metadata = {
+            "entry_id": entry_id,
+            "brief": brief,
+            "symbols": symbols,
+            "intent": query_intent(query),
+            "created_at": time.time(),
+            "expires_at": expires_at(symbols.split(",") if symbols else None),
+        }
+        if audio:
+            os.makedirs(self.audio_dir, exist_ok=True)
+            audio_path = os.path.join(self.audio_dir, f"{entry_id}.{audio_format}")
+            with open(audio_path, "wb") as f:
+                f.write(audio)
+            metadata["audio_path"] = audio_path
+            metadata["audio_format"] = audio_format
+
+        # Same normalised query overwrites its previous answer
+        self.store.delete(ids=[entry_id])
+        self.store.add_texts([query], metadatas=[metadata], ids=[entry_id])
+
+    def _read_audio(self, path: str):
+        if not path:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+response_cache = SemanticResponseCache()
@@ -0,0 +1,141 @@
+from tools.vector_store import get_vectordb, DEFAULT_COLLECTION
+from tools.keyword_index import get_keyword_index
+from tools import tracing
+import os
+
+# BM25 score that maps to a keyword similarity of 0.5; higher scores saturate towards 1
+BM25_SATURATION = float(os.getenv("BM25_SATURATION", "5"))
+
+
+def build_filter(ticker: str = None, source: str = None, indexed_since: int = None, indexed_until: int = None):
+    """
+    Chroma `where` clause from optional ticker/source filters and an ingest
+    date window (YYYYMMDD, matched against the "date" document_store stamps).
+    """
+    conditions = []
+    if ticker:
+        conditions.append({"ticker": ticker})
+    if source:
+        conditions.append({"source": source})
+    if indexed_since:
+        conditions.append({"date": {"$gte": int(indexed_since)}})
+    if indexed_until:
+        conditions.append({"date": {"$lte": int(indexed_until)}})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def _hit_key(document) -> str:
+    return document.metadata.get("content_hash") or document.page_content
+
+
+def search(query: str, k: int = 3, score_threshold: float = None, ticker: str = None, source: str = None,
+           indexed_since: int = None, indexed_until: int = None, mmr: bool = False, fetch_k: int = 20,
+           lambda_mult: float = 0.5, collection_name: str = DEFAULT_COLLECTION) -> list:
+    """
+    One scored vector search. Returns up to k hits as
+    {"content", "similarity", "metadata"} with similarity normalized to [0, 1].
+    With mmr=True, fetch_k candidates are re-ranked for diversity before
+    truncating to k; the query embedding comes from the embedding cache the
+    second time.
+    """
+    vectordb = get_vectordb(collection_name)
+    where = build_filter(ticker, source, indexed_since, indexed_until)
+
+    with tracing.span("vector_search", "vector", collection=collection_name):
+        tracing.add("vector_searches")
+        scored = vectordb.similarity_search_with_relevance_scores(query, k=fetch_k if mmr else k, filter=where)
+        if not scored:
+            return []
+        documents = [document for document, _ in scored]
+        if mmr:
+            documents = vectordb.max_marginal_relevance_search(
+                query, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=where,
+            )
+
+    scores = {_hit_key(document): min(1.0, max(0.0, score)) for document, score in scored}
+    hits = []
+    for document in documents:
+        score = scores.get(_hit_key(document), 0.0)
+        if score_threshold is not None and score < score_threshold:
+            continue
+        hits.append({
+            "content": document.page_content,
+            "similarity": round(score, 3),
+            "metadata": document.metadata or {},
+        })
+    return hits[:k]
+
+
+def keyword_similarity(score: float) -> float:
+    """
+    BM25 score squashed to [0, 1) as s / (s + k). Unlike dividing by the top
+    hit, the result does not depend on the other hits, so a score threshold
+    still means something.
+    """
+    return score / (score + BM25_SATURATION) if score > 0 else 0.0
+
+
+def _metadata_filter(ticker: str = None, source: str = None, indexed_since: int = None, indexed_until: int = None):
+    def matches(metadata: dict) -> bool:
+        if ticker and metadata.get("ticker") != ticker:
+            return False
+        if source and metadata.get("source") != source:
+            return False
+        if indexed_since and metadata.get("date", 0) < int(indexed_since):
+            return False
+        if indexed_until and metadata.get("date", 0) > int(indexed_until):
+            return False
+        return True
+    return matches
+
+
+def hybrid_search(query: str, k: int = 3, score_threshold: float = None, ticker: str = None, source: str = None,
+                  indexed_since: int = None, indexed_until: int = None, mmr: bool = False, vector_weight: float = 0.6,
+                  collection_name: str = DEFAULT_COLLECTION) -> list:
+    """
+    BM25 + vector retrieval. Queries naming a known ticker verbatim are
+    answered from the keyword index alone, with no embedding call; otherwise
+    both result lists are fused as vector_weight * vector score plus
+    (1 - vector_weight) * saturated BM25 score. score_threshold applies to
+    both paths; when too few keyword hits pass it, the fused path runs.
+    """
+    keyword_index = get_keyword_index(collection_name)
+    keyword_index.ensure_built(get_vectordb(collection_name))
+    matches = _metadata_filter(ticker, source, indexed_since, indexed_until)
+
+    with tracing.span("keyword_search", "vector", collection=collection_name):
+        symbols = keyword_index.symbols_in(query)
+        keyword_hits = keyword_index.search(query, k=max(k, 20), matches=matches)
+
+    # Exact-symbol fast path
+    if symbols:
+        hits = [
+            {"content": content, "similarity": round(keyword_similarity(score), 3), "metadata": metadata}
+            for _, score, content, metadata in keyword_hits
+        ]
+        if score_threshold is not None:
+            hits = [hit for hit in hits if hit["similarity"] >= score_threshold]
+        if len(hits) >= k:
+            return hits[:k]
+
+    vector_hits = search(query, k=max(k, 20) if not mmr else k, ticker=ticker, source=source,
+                         indexed_since=indexed_since, indexed_until=indexed_until, mmr=mmr, collection_name=collection_name)
+
+    fused = {}
+    for hit in vector_hits:
+        key = hit["metadata"].get("content_hash") or hit["content"]
+        fused[key] = {**hit, "similarity": vector_weight * hit["similarity"]}
+    for _, score, content, metadata in keyword_hits:
+        key = metadata.get("content_hash") or content
+        keyword_score = (1 - vector_weight) * keyword_similarity(score)
+        if key in fused:
+            fused[key]["similarity"] += keyword_score
+        else:
+            fused[key] = {"content": content, "similarity": keyword_score, "metadata": metadata}
+
+    ranked = sorted(fused.values(), key=lambda hit: hit["similarity"], reverse=True)
+    if score_threshold is not None:
+        ranked = [hit for hit in ranked if hit["similarity"] >= score_threshold]
+    return [{**hit, "similarity": round(hit["similarity"], 3)} for hit in ranked[:k]]
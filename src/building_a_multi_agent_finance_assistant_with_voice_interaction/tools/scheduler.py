@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+from tools.portfolio import get_portfolio, load_preferences
+from tools.market_data import engine
+from tools.entities import extract_entities
+from tools.scraper import scrape_filings
+from tools.index_queue import index_queue
+from tools.analytics import analyze_symbols
+from tools.response_cache import response_cache
+from tools.streaming import StreamSink, stream_to
+from tools.tts import SpeechPipeline, finish_speech, get_engine
+import threading
+import time
+import os
+
+# Briefs are ready this many minutes before daily_brief_time
+BRIEF_LEAD_MINUTES = int(os.getenv("BRIEF_LEAD_MINUTES", "30"))
+DEFAULT_BRIEF_TIME = "08:00"
+
+
+def scheduled_queries(preferences: dict = None) -> list:
+    """
+    The queries pre-computed each morning: one for the holdings and one for
+    the watchlist. The app offers the same strings, so they hit the response
+    cache verbatim.
+    """
+    preferences = preferences if preferences is not None else load_preferences()
+    regions = ", ".join(preferences.get("regions", [])) or "global"
+    sectors = ", ".join(preferences.get("sectors", [])) or "all"
+
+    queries = [f"What's our risk exposure and earnings picture across {regions} markets in {sectors} stocks today?"]
+    watchlist = preferences.get("watchlist", [])
+    if watchlist:
+        queries.append(f"Morning brief on my watchlist: {', '.join(watchlist)}. Any earnings surprises or price moves?")
+    return queries
+
+
+def next_run(brief_time: str = DEFAULT_BRIEF_TIME, lead_minutes: int = BRIEF_LEAD_MINUTES, now: datetime = None) -> datetime:
+    """Next weekday run, lead_minutes before brief_time (HH:MM, local time)."""
+    now = now or datetime.now()
+    hour, minute = (int(part) for part in brief_time.split(":"))
+    run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0) - timedelta(minutes=lead_minutes)
+    if run_at <= now:
+        run_at += timedelta(days=1)
+    while run_at.weekday() >= 5:
+        run_at += timedelta(days=1)
+    return run_at
+
+
+def warm_caches(queries: list) -> dict:
+    """
+    Fills the market, filing and embedding caches the crew will read:
+    quotes and fundamentals, the local price store and portfolio bars, and
+    fresh filings indexed (and therefore embedded) into the document store.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    portfolio = get_portfolio()
+    portfolio.refresh()
+    entities = {}
+    for query in queries:
+        for entity in extract_entities(query):
+            entities.setdefault(entity["symbol"], entity)
+    symbols = list(dict.fromkeys([*entities, *portfolio.symbols()]))
+    timings["entities_and_portfolio"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if engine.price_store is not None:
+        # Full history for the watchlist and holdings, so later periods read locally
+        engine.price_store.backfill([*symbols, *portfolio.watchlist], engine.provider)
+    engine.snapshot(symbols)
+    analyze_symbols(symbols, weights=portfolio.weights(previous=True) or None)
+    timings["market_data"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for filing in scrape_filings(list(entities.values())):
+        index_queue.submit(
+            filing["content"], f"filing_text:{filing['source']}",
+            {"source": "filing", "ticker": filing["entity"]["symbol"], "url": filing["source"]},
+        )
+    index_queue.flush()
+    timings["filings_and_embeddings"] = time.perf_counter() - start
+
+    return {name: round(seconds, 2) for name, seconds in timings.items()}
+
+
+def precompute_briefs(crew_factory=None, queries: list = None) -> list:
+    """
+    Runs the crew for every scheduled query and stores the brief and its
+    audio in the response cache, where the app finds them instantly.
+    """
+    if crew_factory is None:
+        from crew import CachedCrew as crew_factory
+
+    queries = queries or scheduled_queries()
+    print(f"🌅 Warming caches for {len(queries)} scheduled brief(s)...")
+    print(f"🌅 Cache warm-up timings (s): {warm_caches(queries)}")
+
+    tts_engine = get_engine()
+    done = []
+    for query in queries:
+        start = time.perf_counter()
+        try:
+            # Voice the broadcaster's answer as it streams instead of synthesizing it twice
+            speech = SpeechPipeline(tts_engine)
+            with stream_to(StreamSink(on_speech=speech.feed)):
+                result = str(crew_factory().crew().kickoff(inputs={"query": query}))
+            audio = finish_speech(speech, result)
+            response_cache.store_response(query, result, audio, tts_engine.format)
+            done.append(query)
+            print(f"✅ Pre-computed brief in {time.perf_counter() - start:.1f}s: {query}")
+        except Exception as e:
+            print(f"Error pre-computing brief for '{query}': {str(e)}")
+    return done
+
+
+def run_scheduler(crew_factory=None, once: bool = False, stop_event: threading.Event = None):
+    """Pre-computes briefs ahead of daily_brief_time every weekday; `once` runs immediately and returns."""
+    if once:
+        return precompute_briefs(crew_factory)
+
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        # Re-read so edits to the preference file apply from the next morning
+        brief_time = load_preferences().get("daily_brief_time", DEFAULT_BRIEF_TIME)
+        run_at = next_run(brief_time)
+        print(f"⏰ Next morning brief pre-computation at {run_at:%Y-%m-%d %H:%M}")
+        if stop_event.wait(max(0.0, (run_at - datetime.now()).total_seconds())):
+            break
+        precompute_briefs(crew_factory)
+
+
+_background = None
+_background_lock = threading.Lock()
+
+
+def start_background_scheduler(crew_factory=None) -> threading.Thread:
+    """Runs the scheduler on a daemon thread once per process, sharing its in-memory caches."""
+    global _background
+    with _background_lock:
+        if _background is None or not _background.is_alive():
+            _background = threading.Thread(
+                target=run_scheduler, kwargs={"crew_factory": crew_factory},
+                name="brief-scheduler", daemon=True,
+            )
+            _background.start()
+        return _background
@@ -0,0 +1,155 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus, urljoin, urlparse
+from bs4 import BeautifulSoup, SoupStrainer
+from tools.cache import CACHE_DIR, JsonFileCache
+from tools.html_text import extract_from_stream
+from tools import tracing
+import contextvars
+import asyncio
+import hashlib
+import random
+import httpx
+import os
+
+SEARCH_URL = os.getenv(
+    "FILING_SEARCH_URL",
+    "https://www.google.com/search?q={query}",
+)
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+CONTENT_CHARS = 3000
+
+PER_HOST_LIMIT = int(os.getenv("SCRAPER_PER_HOST", "4"))
+TOTAL_LIMIT = int(os.getenv("SCRAPER_MAX_CONNECTIONS", "16"))
+TIMEOUT = float(os.getenv("SCRAPER_TIMEOUT", "10"))
+RETRIES = 3
+BACKOFF = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+VALIDATOR_TTL = 7 * 24 * 3600
+
+
+class AsyncFilingScraper:
+    """
+    Concurrent IR/filing scraper: one pooled HTTP client per run, a
+    semaphore per host, timeouts, retries with jittered backoff and
+    conditional GETs (ETag / Last-Modified) against a local body cache.
+    """
+
+    def __init__(self, search_url: str = SEARCH_URL, per_host: int = PER_HOST_LIMIT,
+                 max_connections: int = TOTAL_LIMIT, timeout: float = TIMEOUT, retries: int = RETRIES):
+        self.search_url = search_url
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retries = retries
+        self.validators = JsonFileCache("http_validators.json", ttl=VALIDATOR_TTL)
+        self.body_dir = os.path.join(CACHE_DIR, "http")
+        self._host_limits = {}
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    def _body_path(self, url: str) -> str:
+        return os.path.join(self.body_dir, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def _cached_body(self, url: str):
+        try:
+            with open(self._body_path(url), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _remember(self, key: str, response: httpx.Response, body: str):
+        validators = {k: response.headers[k] for k in ("etag", "last-modified") if k in response.headers}
+        if not validators:
+            return
+        os.makedirs(self.body_dir, exist_ok=True)
+        with open(self._body_path(key), "w", encoding="utf-8") as f:
+            f.write(body)
+        self.validators.set(key, validators)
+
+    async def fetch(self, client: httpx.AsyncClient, url: str, max_chars: int = None) -> str:
+        """
+        GETs `url` and returns its body, or with `max_chars` its visible text
+        extracted while streaming, stopping once the budget is filled.
+        """
+        key = url if max_chars is None else f"text:{max_chars}:{url}"
+        headers = dict(HEADERS)
+        validators = self.validators.get(key) or {}
+        cached_body = self._cached_body(key) if validators else None
+        if cached_body is not None:
+            if "etag" in validators:
+                headers["If-None-Match"] = validators["etag"]
+            if "last-modified" in validators:
+                headers["If-Modified-Since"] = validators["last-modified"]
+
+        async with self._host_limit(url):
+            for attempt in range(self.retries + 1):
+                try:
+                    with tracing.span("http:GET", "http", url=url, attempt=attempt):
+                        tracing.add("http_calls")
+                        async with client.stream("GET", url, headers=headers) as response:
+                            if response.status_code == 304 and cached_body is not None:
+                                tracing.add("http_not_modified")
+                                return cached_body
+                            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                                raise httpx.HTTPStatusError("retryable status", request=response.request, response=response)
+                            response.raise_for_status()
+                            if max_chars is None:
+                                body = (await response.aread()).decode(response.encoding or "utf-8", errors="replace")
+                            else:
+                                body = await extract_from_stream(response.aiter_text(), max_chars=max_chars)
+                            tracing.add("bytes_fetched", response.num_bytes_downloaded)
+                    self._remember(key, response, body)
+                    return body
+                except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                    retryable = isinstance(e, httpx.TransportError) or e.response.status_code in RETRY_STATUSES
+                    if attempt >= self.retries or not retryable:
+                        raise
+                    await asyncio.sleep(BACKOFF * (2 ** attempt) * (1 + random.random()))
+
+    async def _scrape_entity(self, client: httpx.AsyncClient, entity: dict):
+        query = f"{entity['name']} investor relations latest earnings report OR filing"
+        search_url = self.search_url.format(query=quote_plus(query))
+        try:
+            search_html = await self.fetch(client, search_url)
+            # Only anchors matter on the results page
+            anchors = BeautifulSoup(search_html, "html.parser", parse_only=SoupStrainer("a"))
+            links = [a["href"] for a in anchors.find_all("a", href=True)]
+            relevant_links = [urljoin(search_url, link) for link in links if "ir" in link or "news" in link]
+            if not relevant_links:
+                return None
+
+            # Stream the filing page and stop once the summary budget is filled
+            content = await self.fetch(client, relevant_links[0], max_chars=CONTENT_CHARS)
+            return {"entity": entity, "source": relevant_links[0], "content": content}
+        except Exception as e:
+            print(f"Error processing {entity['name']}: {str(e)}")
+            return None
+
+    async def scrape(self, entities: list) -> list:
+        """Scrapes every entity at once and returns the ones with a filing found."""
+        self._host_limits = {}
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits, follow_redirects=True) as client:
+            results = await asyncio.gather(*(self._scrape_entity(client, e) for e in entities))
+        return [r for r in results if r]
+
+
+def run_sync(coro):
+    """Runs a coroutine from sync tool code, even if the caller already has a loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Carry the caller's context (trace span, stream sink) onto the helper thread
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(context.run, asyncio.run, coro).result()
+
+
+def scrape_filings(entities: list, scraper: AsyncFilingScraper = None) -> list:
+    return run_sync((scraper or AsyncFilingScraper()).scrape(entities))
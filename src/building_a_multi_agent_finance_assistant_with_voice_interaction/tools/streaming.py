@@ -0,0 +1,111 @@
+from contextlib import contextmanager
+import contextvars
+
+# Sink for the kickoff running in this context. Worker threads only see it if
+# they were started with a copy of the kickoff's context (see ContextTask in
+# crew.py); anything else streams nowhere rather than into another kickoff.
+_current_sink = contextvars.ContextVar("stream_sink", default=None)
+
+# Spoken agents reason and call tools before answering; only the answer is read aloud
+FINAL_ANSWER = "Final Answer:"
+
+
+class StreamSink:
+    """
+    Receives tokens as they are generated. Subclass or pass callables.
+    Tokens from spoken agents also reach on_speech, from their final answer on.
+    """
+
+    def __init__(self, on_token=None, on_segment_end=None, on_speech=None):
+        self._on_token = on_token
+        self._on_segment_end = on_segment_end
+        self._on_speech = on_speech
+        self._speech_buffer = ""
+        self._answering = False
+
+    @property
+    def speaks(self) -> bool:
+        """Whether this sink voices spoken output itself while it streams."""
+        return self._on_speech is not None or type(self).on_speech is not StreamSink.on_speech
+
+    def on_token(self, token: str):
+        if self._on_token:
+            self._on_token(token)
+
+    def on_segment_end(self):
+        if self._on_segment_end:
+            self._on_segment_end()
+
+    def on_speech(self, text: str):
+        if self._on_speech:
+            self._on_speech(text)
+
+    def speak(self, token: str):
+        if self._answering:
+            self.on_speech(token)
+            return
+        self._speech_buffer += token
+        marker = self._speech_buffer.find(FINAL_ANSWER)
+        if marker >= 0:
+            self._answering = True
+            answer = self._speech_buffer[marker + len(FINAL_ANSWER):].lstrip()
+            self._speech_buffer = ""
+            if answer:
+                self.on_speech(answer)
+
+    def end_segment(self):
+        self._speech_buffer = ""
+        self._answering = False
+        self.on_segment_end()
+
+
+def _sink():
+    return _current_sink.get()
+
+
+@contextmanager
+def stream_to(sink: StreamSink):
+    """Route tokens emitted while the block runs (e.g. a crew kickoff) to `sink`."""
+    token = _current_sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _current_sink.reset(token)
+
+
+def is_streaming() -> bool:
+    return _sink() is not None
+
+
+def is_speaking() -> bool:
+    """True when the active sink voices spoken agents live, so nothing else needs to synthesize them."""
+    sink = _sink()
+    return sink is not None and sink.speaks
+
+
+def emit(token: str, spoken: bool = False):
+    sink = _sink()
+    if sink is not None and token:
+        sink.on_token(token)
+        if spoken:
+            sink.speak(token)
+
+
+def end_segment():
+    """Marks the end of one streamed output, e.g. when a task completes."""
+    sink = _sink()
+    if sink is not None:
+        sink.end_segment()
+
+
+def stream_completion(llm, prompt: str) -> str:
+    """Invokes a LangChain LLM, emitting tokens when a sink is active."""
+    if not is_streaming():
+        return llm.invoke(prompt)
+    parts = []
+    for chunk in llm.stream(prompt):
+        text = getattr(chunk, "content", chunk)
+        parts.append(text)
+        emit(text)
+    end_segment()
+    return "".join(parts)
@@ -0,0 +1,316 @@
+from contextlib import contextmanager
+from tools.cache import CACHE_DIR
+import contextvars
+import threading
+import json
+import time
+import os
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1") == "1"
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", os.path.join(CACHE_DIR, "traces", "spans.jsonl"))
+
+# Span for the code running in this context. Worker threads only see it if
+# they were started with a copy of the kickoff's context (see ContextTask in
+# crew.py); spans opened anywhere else are dropped rather than attached to
+# another kickoff's trace.
+_current_span = contextvars.ContextVar("trace_span", default=None)
+
+
+class Span:
+    """
+    One timed stage (kickoff, task, tool, LLM call, HTTP fetch, vector search)
+    with free-form counters. Exported with OpenTelemetry field names.
+    """
+
+    def __init__(self, name: str, kind: str, parent: "Span" = None, **attributes):
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = "OK"
+        self.attributes = dict(attributes)
+        self.children = []
+        self._lock = threading.Lock()
+        self._token = None
+        if parent is not None:
+            with parent._lock:
+                parent.children.append(self)
+
+    def add(self, counter: str, value: float = 1):
+        with self._lock:
+            self.attributes[counter] = self.attributes.get(counter, 0) + value
+
+    def set(self, **attributes):
+        with self._lock:
+            self.attributes.update(attributes)
+
+    def end(self, status: str = None):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+        if status:
+            self.status = status
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns or time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def walk(self):
+        yield self
+        for child in list(self.children):
+            yield from child.walk()
+
+    def totals(self) -> dict:
+        """Numeric counters summed over this span and everything below it."""
+        totals = {}
+        for span in self.walk():
+            for key, value in span.attributes.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration_ms, 2),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def current_span():
+    return _current_span.get()
+
+
+def start_span(name: str, kind: str = "internal", parent: Span = None, **attributes):
+    """Opens a child of `parent` (default: the current span) and makes it current. None when tracing is off."""
+    parent = parent or current_span()
+    if not TRACING_ENABLED or parent is None:
+        return None
+    span = Span(name, kind, parent, **attributes)
+    span._token = _current_span.set(span)
+    return span
+
+
+def end_span(span: Span, status: str = None):
+    if span is None:
+        return
+    span.end(status)
+    try:
+        _current_span.reset(span._token)
+    except (ValueError, RuntimeError):
+        # Ended from a different context than it started in
+        _current_span.set(span.parent)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """Times the block as a child of the current span; a no-op outside a trace."""
+    opened = start_span(name, kind, **attributes)
+    try:
+        yield opened
+    except Exception:
+        end_span(opened, "ERROR")
+        raise
+    else:
+        end_span(opened)
+
+
+def add(counter: str, value: float = 1):
+    """Adds to a counter on the current span, if a trace is active."""
+    target = current_span()
+    if target is not None and value:
+        target.add(counter, value)
+
+
+@contextmanager
+def trace(name: str = "kickoff", export_path: str = TRACE_EXPORT_PATH, **attributes):
+    """
+    Root span for one kickoff. Every span opened underneath, on any thread,
+    is exported as one JSON line per span when the block exits.
+    """
+    if not TRACING_ENABLED:
+        yield None
+        return
+
+    root = Span(name, "kickoff", **attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except Exception:
+        root.end("ERROR")
+        raise
+    finally:
+        root.end()
+        _current_span.reset(token)
+        export(root, export_path)
+
+
+def export(root: Span, path: str = TRACE_EXPORT_PATH):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for item in root.walk():
+                f.write(json.dumps(item.to_dict(), default=str) + "\n")
+    except OSError as e:
+        print(f"Error exporting trace: {str(e)}")
+
+
+def critical_path(root: Span) -> list:
+    """
+    Chain of direct children that bounds the kickoff's wall time: start from
+    the child that finished last and repeatedly step to the sibling that
+    finished latest before the current one started.
+    """
+    children = [c for c in root.children if c.end_ns is not None]
+    path = []
+    horizon = root.end_ns or time.time_ns()
+    while True:
+        candidates = [c for c in children if c.end_ns <= horizon and c not in path]
+        if not candidates:
+            break
+        step = max(candidates, key=lambda c: c.end_ns)
+        path.append(step)
+        horizon = step.start_ns
+    return list(reversed(path))
+
+
+def summarize(root: Span) -> dict:
+    """Totals, per-kind time and the critical path, ready for the UI."""
+    by_kind = {}
+    for item in root.walk():
+        if item is root:
+            continue
+        entry = by_kind.setdefault(item.kind, {"count": 0, "ms": 0.0})
+        entry["count"] += 1
+        entry["ms"] += item.duration_ms
+    return {
+        "trace_id": root.trace_id,
+        "wall_ms": round(root.duration_ms, 1),
+        "totals": root.totals(),
+        "by_kind": {kind: {"count": v["count"], "ms": round(v["ms"], 1)} for kind, v in by_kind.items()},
+        "critical_path": [
+            {
+                "stage": step.name,
+                "kind": step.kind,
+                "start_ms": round((step.start_ns - root.start_ns) / 1e6, 1),
+                "duration_ms": round(step.duration_ms, 1),
+                **step.totals(),
+            }
+            for step in critical_path(root)
+        ],
+    }
+
+
+# ----- crewAI events -> task / tool / agent-LLM spans -----
+
+_event_spans = {}
+_event_lock = threading.Lock()
+
+
+def _task_key(event):
+    task = getattr(event, "task", None)
+    return getattr(task, "id", None) or getattr(event, "task_id", None) or id(task)
+
+
+def _trace_root():
+    """Root of the trace this context belongs to, so concurrent kickoffs keep their tasks apart."""
+    span = current_span()
+    while span is not None and span.parent is not None:
+        span = span.parent
+    return span
+
+
+def _open(key, name: str, kind: str, parent: Span = None):
+    opened = start_span(name, kind, parent=parent)
+    if opened is not None:
+        with _event_lock:
+            _event_spans.setdefault(key, []).append(opened)
+
+
+def _close(key, status: str = None, **attributes):
+    with _event_lock:
+        stack = _event_spans.get(key)
+        opened = stack.pop() if stack else None
+        if stack == []:
+            _event_spans.pop(key, None)
+    if opened is not None:
+        opened.set(**attributes)
+        end_span(opened, status)
+
+
+def register_crewai_listeners():
+    """Hooks crewAI's event bus so tasks, tool calls and agent LLM calls become spans."""
+    try:
+        from crewai.utilities.events import (
+            crewai_event_bus, TaskStartedEvent, TaskCompletedEvent, TaskFailedEvent,
+            ToolUsageStartedEvent, ToolUsageFinishedEvent, ToolUsageErrorEvent,
+            LLMCallStartedEvent, LLMCallCompletedEvent, LLMCallFailedEvent,
+        )
+    except ImportError:
+        try:
+            from crewai.events import (
+                crewai_event_bus, TaskStartedEvent, TaskCompletedEvent, TaskFailedEvent,
+                ToolUsageStartedEvent, ToolUsageFinishedEvent, ToolUsageErrorEvent,
+                LLMCallStartedEvent, LLMCallCompletedEvent, LLMCallFailedEvent,
+            )
+        except ImportError:
+            print("⚠️ crewAI events unavailable; task-level tracing disabled")
+            return
+
+    def task_name(event):
+        task = getattr(event, "task", None)
+        return getattr(task, "name", None) or getattr(event, "task_name", None) or "task"
+
+    # Concurrent tasks would otherwise nest under whichever task span is current, so tasks hang off the root
+    @crewai_event_bus.on(TaskStartedEvent)
+    def _task_started(source, event):
+        _open(("task", _task_key(event)), task_name(event), "task", parent=_trace_root())
+
+    @crewai_event_bus.on(TaskCompletedEvent)
+    def _task_completed(source, event):
+        _close(("task", _task_key(event)))
+
+    @crewai_event_bus.on(TaskFailedEvent)
+    def _task_failed(source, event):
+        _close(("task", _task_key(event)), "ERROR")
+
+    def tool_key(event):
+        return ("tool", threading.get_ident(), getattr(event, "tool_name", "tool"))
+
+    @crewai_event_bus.on(ToolUsageStartedEvent)
+    def _tool_started(source, event):
+        _open(tool_key(event), f"tool:{getattr(event, 'tool_name', 'tool')}", "tool")
+
+    @crewai_event_bus.on(ToolUsageFinishedEvent)
+    def _tool_finished(source, event):
+        _close(tool_key(event), from_cache=bool(getattr(event, "from_cache", False)))
+
+    @crewai_event_bus.on(ToolUsageErrorEvent)
+    def _tool_failed(source, event):
+        _close(tool_key(event), "ERROR")
+
+    def llm_key():
+        return ("llm", threading.get_ident())
+
+    @crewai_event_bus.on(LLMCallStartedEvent)
+    def _llm_started(source, event):
+        _open(llm_key(), "agent_llm", "llm")
+        add("llm_calls")
+
+    @crewai_event_bus.on(LLMCallCompletedEvent)
+    def _llm_completed(source, event):
+        _close(llm_key())
+
+    @crewai_event_bus.on(LLMCallFailedEvent)
+    def _llm_failed(source, event):
+        _close(llm_key(), "ERROR")
@@ -0,0 +1,224 @@
+from concurrent.futures import ThreadPoolExecutor
+from tools.cache import CACHE_DIR
+from tools.audio_cache import audio_cache
+import threading
+import hashlib
+import io
+import os
+import re
+import wave
+
+TTS_ENGINE = os.getenv("TTS_ENGINE", "gtts")
+TTS_LANGUAGE = os.getenv("TTS_LANGUAGE", "en")
+PIPER_MODEL = os.getenv("PIPER_MODEL", "./voices/en_US-ryan-high.onnx")
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "3"))
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+SPEECH_NOISE = re.compile(r"[*_#`>|\[\]]+")
+
+
+def clean_for_speech(text: str) -> str:
+    """Drops markdown symbols that TTS engines read out literally."""
+    return " ".join(SPEECH_NOISE.sub(" ", text).split())
+
+
+def split_sentences(text: str) -> list:
+    return [s for s in (clean_for_speech(p) for p in SENTENCE_END.split(text)) if s]
+
+
+class GTTSEngine:
+    """Google TTS over the network, returns MP3."""
+    name = "gtts"
+    format = "mp3"
+
+    def __init__(self, language: str = TTS_LANGUAGE):
+        self.language = language
+        self.voice = "default"
+
+    def synthesize(self, text: str) -> bytes:
+        from gtts import gTTS
+        audio_io = io.BytesIO()
+        gTTS(text=text, lang=self.language).write_to_fp(audio_io)
+        return audio_io.getvalue()
+
+
+class PiperEngine:
+    """Offline Piper voice, returns WAV. Needs a downloaded .onnx voice model."""
+    name = "piper"
+    format = "wav"
+
+    def __init__(self, model_path: str = PIPER_MODEL, language: str = TTS_LANGUAGE):
+        from piper.voice import PiperVoice
+        self.language = language
+        self.voice = os.path.basename(model_path)
+        self._voice = PiperVoice.load(model_path)
+
+    def synthesize(self, text: str) -> bytes:
+        audio_io = io.BytesIO()
+        with wave.open(audio_io, "wb") as wav_file:
+            self._voice.synthesize(text, wav_file)
+        return audio_io.getvalue()
+
+
+class SilentEngine:
+    """Offline stand-in returning silent WAV of speech-like length, for benchmarks."""
+    name = "silent"
+    format = "wav"
+    rate = 16000
+    seconds_per_word = 0.35
+
+    def __init__(self, language: str = TTS_LANGUAGE):
+        self.language = language
+        self.voice = "silence"
+
+    def synthesize(self, text: str) -> bytes:
+        frames = int(self.rate * self.seconds_per_word * max(1, len(text.split())))
+        audio_io = io.BytesIO()
+        with wave.open(audio_io, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(self.rate)
+            wav_file.writeframes(b"\x00\x00" * frames)
+        return audio_io.getvalue()
+
+
+ENGINES = {
+    "gtts": GTTSEngine,
+    "piper": PiperEngine,
+    "silent": SilentEngine,
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(name: str = TTS_ENGINE):
+    """Engines are loaded once per process; Piper model loading is not cheap."""
+    with _engines_lock:
+        if name not in _engines:
+            _engines[name] = ENGINES[name]()
+        return _engines[name]
+
+
+def cache_key(text: str, engine) -> str:
+    return audio_cache.key(text, engine.voice, engine.name, engine.language)
+
+
+def synthesize_cached(text: str, engine) -> bytes:
+    """Serves repeated phrases from the on-disk audio cache."""
+    key = cache_key(text, engine)
+    audio = audio_cache.get(key)
+    if audio is None:
+        audio = engine.synthesize(text)
+        audio_cache.put(key, audio)
+    return audio
+
+
+def join_audio(chunks: list, fmt: str) -> bytes:
+    """MP3 frames concatenate as-is; WAV chunks are merged into one header."""
+    chunks = [c for c in chunks if c]
+    if fmt != "wav" or len(chunks) <= 1:
+        return b"".join(chunks)
+
+    out = io.BytesIO()
+    with wave.open(out, "wb") as writer:
+        for i, chunk in enumerate(chunks):
+            with wave.open(io.BytesIO(chunk), "rb") as reader:
+                if i == 0:
+                    writer.setparams(reader.getparams())
+                writer.writeframes(reader.readframes(reader.getnframes()))
+    return out.getvalue()
+
+
+class SpeechPipeline:
+    """
+    Sentence-level TTS: text is split into sentences as it arrives, each one is
+    synthesized on a bounded worker pool, and chunks come back in order.
+    The first sentence is playable long before the last one is written.
+    """
+
+    def __init__(self, engine=None, max_workers: int = TTS_WORKERS):
+        self.engine = engine or get_engine()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures = []
+        self._buffer = ""
+
+    def feed(self, text: str):
+        """Accepts partial text; complete sentences are submitted immediately."""
+        self._buffer += text
+        parts = SENTENCE_END.split(self._buffer)
+        self._buffer = parts.pop()
+        for sentence in parts:
+            self._submit(sentence)
+
+    def _submit(self, sentence: str):
+        sentence = clean_for_speech(sentence)
+        if sentence:
+            self._futures.append(self._pool.submit(synthesize_cached, sentence, self.engine))
+
+    def close(self):
+        self._submit(self._buffer)
+        self._buffer = ""
+        self._pool.shutdown(wait=False)
+
+    @property
+    def heard(self) -> bool:
+        """Whether any text has been fed so far."""
+        return bool(self._futures) or bool(self._buffer.strip())
+
+    def first_chunk(self):
+        """The first sentence's audio if it is already synthesized; never waits."""
+        if self._futures and self._futures[0].done() and self._futures[0].exception() is None:
+            return self._futures[0].result()
+        return None
+
+    def chunks(self):
+        """Yields audio chunks in sentence order as each becomes ready."""
+        for future in self._futures:
+            try:
+                yield future.result()
+            except Exception as e:
+                print(f"Error synthesizing sentence: {str(e)}")
+
+    def audio(self) -> bytes:
+        return join_audio(list(self.chunks()), self.engine.format)
+
+
+def synthesize(text: str, engine=None) -> bytes:
+    engine = engine or get_engine()
+    # Replayed briefs hit the whole-text entry; new ones still reuse cached sentences
+    key = cache_key(text, engine)
+    audio = audio_cache.get(key)
+    if audio is None:
+        pipeline = SpeechPipeline(engine)
+        pipeline.feed(text)
+        pipeline.close()
+        audio = pipeline.audio()
+        audio_cache.put(key, audio)
+    return audio
+
+
+def finish_speech(pipeline: SpeechPipeline, text: str) -> bytes:
+    """
+    Audio for `text` from a pipeline fed while the text was streaming, so most
+    sentences are already done. Falls back to synthesizing `text` when nothing
+    was streamed into it.
+    """
+    heard = pipeline.heard
+    pipeline.close()
+    if not heard:
+        return synthesize(text, pipeline.engine)
+    audio = pipeline.audio()
+    audio_cache.put(cache_key(text, pipeline.engine), audio)
+    return audio
+
+
+def synthesize_to_file(text: str, engine=None) -> str:
+    """Writes the spoken version of `text` under the cache dir and returns its path."""
+    engine = engine or get_engine()
+    audio_dir = os.path.join(CACHE_DIR, "audio")
+    os.makedirs(audio_dir, exist_ok=True)
+    audio_path = os.path.join(audio_dir, f"{hashlib.sha256(text.encode('utf-8')).hexdigest()}.{engine.format}")
+    with open(audio_path, "wb") as f:
+        f.write(synthesize(text, engine))
+    return audio_path
@@ -0,0 +1,80 @@
+from langchain_chroma import Chroma
+from langchain_openai import OpenAIEmbeddings
+from tools.embedding_cache import CachedEmbeddings, HashEmbeddings
+import threading
+import time
+import os
+
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./chroma")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+DEFAULT_COLLECTION = "langchain"
+
+# "openai" for production, "hash" for deterministic offline embeddings
+EMBEDDINGS_BACKEND = os.getenv("EMBEDDINGS_BACKEND", "openai")
+
+
+class VectorStoreRegistry:
+    """
+    Process-wide pool of embedding models and Chroma handles.
+    Every tool asks the registry for its store, so SQLite and the HNSW index
+    are opened once per (persist_directory, collection) instead of per call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._embeddings = {}
+        self._stores = {}
+        self._timings = {}
+
+    def get_embeddings(self, model: str = "text-embedding-ada-002"):
+        """Embedding model wrapped in the on-disk embedding cache."""
+        with self._lock:
+            if model not in self._embeddings:
+                start = time.perf_counter()
+                if EMBEDDINGS_BACKEND == "hash":
+                    inner, model_name = HashEmbeddings(), "hash"
+                else:
+                    inner, model_name = OpenAIEmbeddings(model=model, openai_api_key=OPENAI_API_KEY), model
+                self._embeddings[model] = CachedEmbeddings(inner, model_name)
+                self._timings[f"embeddings:{model}"] = time.perf_counter() - start
+            return self._embeddings[model]
+
+    def get_store(self, persist_directory: str = CHROMA_PATH, collection_name: str = DEFAULT_COLLECTION):
+        key = (os.path.abspath(persist_directory), collection_name)
+        store = self._stores.get(key)
+        if store is not None:
+            return store
+
+        embeddings = self.get_embeddings()
+        with self._lock:
+            # Another thread may have opened it while we were waiting
+            if key not in self._stores:
+                start = time.perf_counter()
+                self._stores[key] = Chroma(
+                    collection_name=collection_name,
+                    persist_directory=persist_directory,
+                    embedding_function=embeddings,
+                )
+                elapsed = time.perf_counter() - start
+                self._timings[f"store:{collection_name}@{persist_directory}"] = elapsed
+                print(f"🗄️ Opened Chroma '{collection_name}' at {persist_directory} in {elapsed * 1000:.1f} ms")
+            return self._stores[key]
+
+    def stats(self) -> dict:
+        """Open/load time in milliseconds for everything the registry has built so far."""
+        with self._lock:
+            return {name: round(seconds * 1000, 2) for name, seconds in self._timings.items()}
+
+    def reset(self):
+        with self._lock:
+            self._embeddings.clear()
+            self._stores.clear()
+            self._timings.clear()
+
+
+registry = VectorStoreRegistry()
+
+
+def get_vectordb(collection_name: str = DEFAULT_COLLECTION):
+    """Shared Chroma handle for the default persist directory."""
+    return registry.get_store(CHROMA_PATH, collection_name)
@@ -0,0 +1,25 @@
+"""
+Tests import the tool modules the way the app does (`from tools.x import y`),
+and every on-disk cache (Chroma included) is pointed at a throwaway directory
+before they load. Embeddings use the offline hash backend. Offline doubles
+shared with the benchmarks (the fake OpenAI server) are imported from there.
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src",
+                           "building_a_multi_agent_finance_assistant_with_voice_interaction")
+BENCHMARKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks")
+CACHE_DIR = tempfile.mkdtemp(prefix="finance-tests-")
+
+os.environ["FINANCE_CACHE_DIR"] = CACHE_DIR
+os.environ["TRACING_ENABLED"] = "0"
+os.environ["CHROMA_PATH"] = os.path.join(CACHE_DIR, "chroma")
+os.environ["EMBEDDINGS_BACKEND"] = "hash"
+os.environ.setdefault("OPENAI_API_KEY", "test")
+sys.path.insert(0, PACKAGE_DIR)
+sys.path.append(BENCHMARKS_DIR)
+atexit.register(shutil.rmtree, CACHE_DIR, ignore_errors=True)
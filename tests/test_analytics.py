@@ -0,0 +1,118 @@
+import pandas as pd
+import pytest
+
+from tools import analytics
+from tools.analytics import allocation_delta, analyze, analyze_symbols, beta, historical_var, max_drawdown
+from tools.market_data import MarketDataEngine, StaticProvider
+
+
+def frame(columns: dict) -> pd.DataFrame:
+    rows = len(next(iter(columns.values())))
+    return pd.DataFrame(columns, index=pd.bdate_range("2025-06-02", periods=rows))
+
+
+def test_beta_is_covariance_over_benchmark_variance():
+    market = pd.Series([0.01, -0.01, 0.0])
+    returns = pd.DataFrame({
+        # cov = (0.01 * 0.01 + -0.01 * -0.01 + 0) / 2 = 0.0001, var = 0.0001
+        "noisy": [0.02, 0.0, 0.01],
+        "levered": [0.02, -0.02, 0.0],
+        "flat": [0.005, 0.005, 0.005],
+    })
+
+    result = beta(returns, market)
+
+    assert result["noisy"] == pytest.approx(1.0)
+    assert result["levered"] == pytest.approx(2.0)
+    assert result["flat"] == pytest.approx(0.0)
+
+
+def test_historical_var_is_the_lower_tail_quantile():
+    returns = pd.DataFrame({"A": [0.06, -0.03, 0.01, 0.0, -0.05, 0.02, 0.03, -0.01, 0.05, 0.04]})
+
+    # Sorted: -0.05, -0.03, -0.01, ... ; the 10% and 5% tails both land on the worst day,
+    # the 20% tail ((10 - 1) * 0.2 = 1.8, rounded down) on the second worst
+    assert historical_var(returns, 0.95)["A"] == pytest.approx(0.05)
+    assert historical_var(returns, 0.90)["A"] == pytest.approx(0.05)
+    assert historical_var(returns, 0.80)["A"] == pytest.approx(0.03)
+
+
+def test_max_drawdown_is_the_deepest_peak_to_trough_fall():
+    prices = pd.DataFrame({
+        # 120 -> 90 is -25%; the later 130 -> 117 is only -10%
+        "A": [100.0, 120.0, 90.0, 110.0, 130.0, 117.0],
+        "up": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+    })
+
+    result = max_drawdown(prices)
+
+    assert result["A"] == pytest.approx(-0.25)
+    assert result["up"] == pytest.approx(0.0)
+
+
+def test_allocation_delta_drifts_and_renormalizes_weights():
+    weights = pd.Series({"A": 0.6, "B": 0.4})
+    # 0.6 * 1.5 = 0.9 and 0.4 * 1.0 = 0.4 out of 1.3; C has no return and is ignored
+    result = allocation_delta(weights, pd.Series({"A": 0.5, "C": 0.2}))
+
+    assert result.loc["A", "current"] == pytest.approx(0.9 / 1.3)
+    assert result.loc["B", "current"] == pytest.approx(0.4 / 1.3)
+    assert result.loc["A", "delta"] == pytest.approx(0.9 / 1.3 - 0.6)
+    assert result["current"].sum() == pytest.approx(1.0)
+
+
+def test_analyze_defaults_to_equal_weights():
+    # A: +10%, -10%; B: 0%, +10%
+    prices = frame({"A": [100.0, 110.0, 99.0], "B": [100.0, 100.0, 110.0]})
+
+    portfolio = analyze(prices)["portfolio"]
+
+    assert portfolio["allocation"]["A"] == {"previous": 0.5, "current": 0.45, "delta": -0.05}
+    assert portfolio["allocation"]["B"] == {"previous": 0.5, "current": 0.55, "delta": 0.05}
+    # Portfolio returns are 5% then 0%
+    assert portfolio["return_1d"] == 0.0
+    assert portfolio["return_period"] == 0.05
+
+
+def test_analyze_normalizes_the_given_weights():
+    prices = frame({"A": [100.0, 110.0, 99.0], "B": [100.0, 100.0, 110.0]})
+
+    result = analyze(prices, weights={"A": 3, "B": 1})
+    portfolio = result["portfolio"]
+
+    # 0.75 * 0.9 = 0.675 and 0.25 * 1.1 = 0.275 out of 0.95
+    assert portfolio["allocation"]["A"] == {"previous": 0.75, "current": 0.7105, "delta": -0.0395}
+    assert portfolio["allocation"]["B"] == {"previous": 0.25, "current": 0.2895, "delta": 0.0395}
+    # Portfolio returns are 7.5% then -5%: 1.075 * 0.95 - 1
+    assert portfolio["return_1d"] == -0.05
+    assert portfolio["return_period"] == 0.0213
+    assert portfolio["max_drawdown"] == -0.05
+    assert result["symbols"]["A"]["max_drawdown"] == -0.1
+    assert result["symbols"]["B"]["return_period"] == 0.1
+
+
+def test_analyze_symbols_pulls_the_benchmark_and_earnings_in_one_pass(monkeypatch):
+    dates = [d.strftime("%Y-%m-%d") for d in pd.bdate_range("2025-06-02", periods=4)]
+    provider = StaticProvider(
+        history={
+            # Index returns are +1%, -1%, 0%; TSM moves twice as far
+            "^GSPC": dict(zip(dates, [100.0, 101.0, 99.99, 99.99])),
+            "TSM": dict(zip(dates, [50.0, 51.0, 49.98, 49.98])),
+        },
+        earnings={"TSM": {"eps_actual": 1.1, "eps_estimate": 1.0}},
+    )
+    monkeypatch.setattr(analytics, "engine", MarketDataEngine(provider))
+
+    result = analyze_symbols(["TSM", "TSM"], benchmark="^GSPC", period="1mo")
+
+    assert list(result["symbols"]) == ["TSM"]
+    assert result["benchmark"] == "^GSPC"
+    assert result["observations"] == 3
+    assert result["symbols"]["TSM"]["beta"] == 2.0
+    assert result["symbols"]["TSM"]["eps_surprise_pct"] == 10.0
+    assert result["portfolio"]["beta"] == 2.0
+    assert provider.history_calls == 1
+
+
+def test_analyze_symbols_with_nothing_to_analyze():
+    assert analyze_symbols([]) == {"as_of": None, "symbols": {}, "portfolio": {}}
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from tools import tts
+from tools.audio_cache import AudioCache
+from tools.tts import SilentEngine, cache_key, synthesize_cached
+
+
+class CountingEngine(SilentEngine):
+    """SilentEngine that records every text it is asked to speak."""
+
+    def __init__(self, voice: str = "silence"):
+        super().__init__()
+        self.voice = voice
+        self.spoken = []
+
+    def synthesize(self, text: str) -> bytes:
+        self.spoken.append(text)
+        return super().synthesize(text)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = AudioCache(str(tmp_path / "tts"))
+    monkeypatch.setattr(tts, "audio_cache", cache)
+    return cache
+
+
+def test_key_covers_text_voice_engine_and_language():
+    base = AudioCache.key("TSMC beat estimates.", "silence", "silent", "en")
+
+    assert AudioCache.key(" TSMC  beat estimates.\n", "silence", "silent", "en") == base
+    assert AudioCache.key("TSMC beat estimates.", "ryan", "silent", "en") != base
+    assert AudioCache.key("TSMC beat estimates.", "silence", "piper", "en") != base
+    assert AudioCache.key("TSMC beat estimates.", "silence", "silent", "ko") != base
+
+
+def test_repeated_text_is_served_from_disk(cache):
+    engine = CountingEngine()
+
+    first = synthesize_cached("TSMC beat estimates.", engine)
+    second = synthesize_cached("TSMC  beat estimates.", engine)
+
+    assert first == second
+    assert engine.spoken == ["TSMC beat estimates."]
+    assert cache.stats()["hits"] == 1
+
+
+def test_another_voice_or_engine_misses(cache):
+    engine, other_voice = CountingEngine(), CountingEngine(voice="ryan")
+    other_engine = CountingEngine()
+    other_engine.name = "piper"
+
+    for e in (engine, other_voice, other_engine):
+        synthesize_cached("Yen weakens against the dollar.", e)
+
+    assert engine.spoken == other_voice.spoken == other_engine.spoken == ["Yen weakens against the dollar."]
+    assert len({cache_key("Yen weakens against the dollar.", e) for e in (engine, other_voice, other_engine)}) == 3
+    assert cache.stats()["misses"] == 3
+
+
+def test_least_recently_used_files_are_evicted_by_size(tmp_path):
+    cache = AudioCache(str(tmp_path / "tts"), max_bytes=250)
+    cache.put("aa-old", b"a" * 100)
+    cache.put("bb-older", b"b" * 100)
+    os.utime(cache._path("aa-old"), (1000, 1000))
+    os.utime(cache._path("bb-older"), (500, 500))
+
+    # Reading refreshes the entry, so the untouched one is evicted first
+    cache.get("bb-older")
+    cache.put("cc-new", b"c" * 100)
+
+    assert cache.get("aa-old") is None
+    assert cache.get("bb-older") == b"b" * 100
+    assert cache.get("cc-new") == b"c" * 100
+    assert cache.stats()["bytes_stored"] == 200
+
+
+def test_bytes_saved_counts_every_hit(cache):
+    cache.put("brief", b"x" * 64)
+
+    cache.get("brief")
+    cache.get("brief")
+    cache.get("missing")
+
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 1,
+        "hit_ratio": 0.667,
+        "bytes_saved": 128,
+        "bytes_stored": 64,
+    }
@@ -0,0 +1,84 @@
+import uuid
+
+import pytest
+
+pytest.importorskip("langchain.text_splitter")
+pytest.importorskip("langchain_chroma")
+
+from tools.document_store import DocumentStore  # noqa: E402
+from tools.index_queue import IndexingQueue  # noqa: E402
+from tools.keyword_index import get_keyword_index  # noqa: E402
+
+
+def paragraph(topic: str) -> str:
+    # Long enough that every paragraph is a chunk of its own
+    return " ".join(f"{topic} sentence {i} about quarterly results." for i in range(15))
+
+
+@pytest.fixture
+def store():
+    return DocumentStore(f"test_{uuid.uuid4().hex[:12]}")
+
+
+def assert_in_sync(store: DocumentStore):
+    """Chroma and the BM25 index hold exactly the same chunks."""
+    chroma_ids = set(store.store.get(include=[])["ids"])
+    assert set(get_keyword_index(store.collection_name).docs) == chroma_ids
+    return chroma_ids
+
+
+def test_reingesting_an_edited_source_only_touches_the_changed_chunk(store):
+    original = "\n\n".join(paragraph(t) for t in ("revenue", "guidance", "dividend"))
+    edited = "\n\n".join(paragraph(t) for t in ("revenue", "buyback", "dividend"))
+
+    first = store.ingest(original, "filing:TSM", {"ticker": "TSM", "source": "filing"})
+    before = assert_in_sync(store)
+    second = store.ingest(edited, "filing:TSM", {"ticker": "TSM", "source": "filing"})
+    after = assert_in_sync(store)
+
+    assert first == {"added": 3, "skipped": 0, "removed": 0}
+    assert second == {"added": 1, "skipped": 2, "removed": 1}
+    assert len(before & after) == 2
+    keyword_index = get_keyword_index(store.collection_name)
+    assert keyword_index.search("guidance") == []
+    assert len(keyword_index.search("buyback")) == 1
+
+
+def test_unchanged_source_is_skipped_without_touching_chroma(store):
+    text = "\n\n".join(paragraph(t) for t in ("revenue", "guidance"))
+    store.ingest(text, "filing:TSM")
+
+    assert store.ingest(text, "filing:TSM") == {"added": 0, "skipped": 1, "removed": 0}
+    assert len(assert_in_sync(store)) == 2
+
+
+def test_removing_a_chunk_from_one_source_keeps_the_other_copy(store):
+    shared = paragraph("macro")
+    store.ingest("\n\n".join([shared, paragraph("korea")]), "market:005930.KS")
+    store.ingest("\n\n".join([shared, paragraph("taiwan")]), "market:TSM")
+
+    store.ingest(paragraph("korea"), "market:005930.KS")
+
+    rows = store.store.get(where={"source_key": "market:TSM"}, include=["documents"])
+    assert shared in rows["documents"]
+    assert len(assert_in_sync(store)) == 3
+
+
+def test_flush_leaves_the_store_consistent(store):
+    indexer = IndexingQueue(store=store, batch_size=2, flush_seconds=0.05)
+    try:
+        indexer.submit(paragraph("revenue"), "market:TSM", {"ticker": "TSM"})
+        indexer.submit(paragraph("guidance"), "market:AAPL", {"ticker": "AAPL"})
+        indexer.submit(paragraph("dividend"), "market:INFY.NS", {"ticker": "INFY.NS"})
+        # A later submission for the same source replaces the earlier one
+        indexer.submit(paragraph("buyback"), "market:TSM", {"ticker": "TSM"})
+        indexer.flush()
+
+        assert indexer.pending() == 0
+        assert indexer.indexed == 4
+        rows = store.store.get(include=["metadatas"])
+        assert sorted(m["source_key"] for m in rows["metadatas"]) == ["market:AAPL", "market:INFY.NS", "market:TSM"]
+        assert len(assert_in_sync(store)) == 3
+        assert get_keyword_index(store.collection_name).search("revenue") == []
+    finally:
+        indexer.shutdown()
@@ -0,0 +1,80 @@
+import math
+
+from tools.embedding_cache import CachedEmbeddings, HashEmbeddings
+
+
+class CountingEmbeddings(HashEmbeddings):
+    """HashEmbeddings that records every batch it is asked to embed."""
+
+    def __init__(self):
+        super().__init__()
+        self.document_batches = []
+        self.queries = []
+
+    def embed_documents(self, texts: list) -> list:
+        self.document_batches.append(list(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> list:
+        self.queries.append(text)
+        return super().embed_query(text)
+
+
+def cosine(a: list, b: list) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+def test_hash_embeddings_are_deterministic_and_normalized():
+    first = HashEmbeddings().embed_query("TSMC beat estimates")
+    second = HashEmbeddings().embed_query("TSMC beat estimates")
+
+    assert first == second
+    assert len(first) == 384
+    assert math.isclose(math.sqrt(sum(v * v for v in first)), 1.0, rel_tol=1e-9)
+
+
+def test_hash_embeddings_rank_keyword_overlap_higher():
+    embeddings = HashEmbeddings()
+    query = embeddings.embed_query("Samsung earnings surprise")
+    related, unrelated = embeddings.embed_documents(
+        ["Samsung earnings surprise in Q2", "Yen weakens against the dollar"]
+    )
+
+    assert cosine(query, related) > cosine(query, unrelated)
+
+
+def test_only_uncached_documents_reach_the_model(tmp_path):
+    inner = CountingEmbeddings()
+    cached = CachedEmbeddings(inner, "hash", path=str(tmp_path / "embeddings.sqlite3"))
+
+    first = cached.embed_documents(["alpha", "beta", "alpha"])
+    second = cached.embed_documents(["beta", "gamma"])
+
+    assert inner.document_batches == [["alpha", "beta"], ["gamma"]]
+    assert first[0] == first[2] == inner.embed_query("alpha")
+    assert second[0] == first[1]
+    assert cached.stats() == {"hits": 2, "misses": 3, "hit_rate": 0.4}
+
+
+def test_whitespace_variants_share_a_cache_entry(tmp_path):
+    inner = CountingEmbeddings()
+    cached = CachedEmbeddings(inner, "hash", path=str(tmp_path / "embeddings.sqlite3"))
+
+    cached.embed_query("Asia tech  exposure")
+    cached.embed_query(" Asia tech exposure\n")
+
+    assert inner.queries == ["Asia tech  exposure"]
+    assert cached.stats()["hits"] == 1
+
+
+def test_cache_survives_a_restart_and_is_keyed_by_model(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    CachedEmbeddings(HashEmbeddings(), "hash", path=path).embed_documents(["risk exposure"])
+
+    restarted = CountingEmbeddings()
+    CachedEmbeddings(restarted, "hash", path=path).embed_documents(["risk exposure"])
+    other_model = CountingEmbeddings()
+    CachedEmbeddings(other_model, "hash-v2", path=path).embed_documents(["risk exposure"])
+
+    assert restarted.document_batches == []
+    assert other_model.document_batches == [["risk exposure"]]
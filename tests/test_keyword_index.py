@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip("langchain_chroma")
+
+from tools.keyword_index import KeywordIndex  # noqa: E402
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = KeywordIndex("test", directory=str(tmp_path))
+    index.add(
+        ["att", "ford", "infy"],
+        ["AT&T raised its dividend", "Ford cut guidance", "Infosys beat estimates"],
+        [{"ticker": "T"}, {"ticker": "F"}, {"ticker": "INFY.NS"}],
+    )
+    return index
+
+
+def test_symbols_match_whole_words_in_the_same_case(index):
+    assert index.symbols_in("How did T and INFY.NS trade?") == ["T", "INFY.NS"]
+    assert index.symbols_in("What about $F?") == ["F"]
+
+
+def test_stray_letters_are_not_tickers(index):
+    assert index.symbols_in("I don't know what Asia tech did") == []
+    assert index.symbols_in("DON'T panic, what's the tone?") == []
+    assert index.symbols_in("t and f and infy.ns") == []
+
+
+def test_deleted_documents_drop_their_ticker(index):
+    index.delete(["ford"])
+
+    assert index.symbols_in("How did F trade?") == []
+    assert [doc_id for doc_id, *_ in index.search("guidance")] == []
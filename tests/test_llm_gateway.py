@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fake_llm import FakeLLMServer
+from tools.llm_gateway import LLMGateway
+
+
+@pytest.fixture
+def fake():
+    with FakeLLMServer(latency=0.2) as server:
+        yield server
+
+
+@pytest.fixture
+def gateway(fake, tmp_path):
+    gw = LLMGateway(base_url=fake.base_url, cache_path=str(tmp_path / "llm_cache.sqlite3"))
+    yield gw
+    gw.close()
+
+
+def test_concurrent_identical_prompts_are_coalesced(fake, gateway):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        answers = list(pool.map(lambda _: gateway.complete("Summarize TSMC earnings"), range(8)))
+
+    stats = gateway.stats()
+    assert len(set(answers)) == 1
+    assert fake.requests == 1
+    assert stats["api_calls"] == 1
+    assert stats["coalesced"] == 7
+    assert stats["tokens_saved"] > 0
+
+
+def test_repeated_prompts_are_served_from_cache(fake, gateway):
+    first = gateway.chat([{"role": "user", "content": "Brief me on Asia tech"}])
+    second = gateway.chat([{"role": "user", "content": "Brief me on Asia tech"}])
+
+    assert first == second
+    assert fake.requests == 1
+    assert gateway.stats()["cache_hits"] == 1
+
+
+def test_cache_persists_across_gateways(fake, gateway):
+    gateway.complete("Summarize Samsung earnings")
+    restarted = LLMGateway(base_url=fake.base_url, cache_path=gateway.cache_path)
+    try:
+        restarted.complete("Summarize Samsung earnings")
+    finally:
+        restarted.close()
+
+    assert fake.requests == 1
+    assert restarted.stats()["cache_hits"] == 1
+
+
+def test_cache_key_covers_sampling_settings(fake, gateway):
+    gateway.complete("Summarize Sony earnings", max_tokens=64)
+    gateway.complete("Summarize Sony earnings", max_tokens=128)
+    gateway.complete("Summarize Sony earnings", model="other-model", max_tokens=64)
+
+    assert fake.requests == 3
+    assert gateway.stats()["cache_hits"] == 0
+
+
+def test_sampled_requests_bypass_cache_and_coalescing(fake, gateway):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda _: gateway.complete("Write a market brief", temperature=0.7), range(4)))
+
+    stats = gateway.stats()
+    assert fake.requests == 4
+    assert stats["cache_hits"] == stats["coalesced"] == 0
+
+
+def test_errors_reach_every_waiting_caller(tmp_path):
+    def responder(prompt):
+        raise RuntimeError("boom")
+
+    with FakeLLMServer(responder=responder, latency=0.2) as broken:
+        gw = LLMGateway(base_url=broken.base_url, cache_path=str(tmp_path / "llm_cache.sqlite3"))
+        gw.client.max_retries = 0
+        try:
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                futures = [pool.submit(gw.complete, "Summarize Sony earnings") for _ in range(3)]
+                errors = [f.exception() for f in futures]
+        finally:
+            gw.close()
+
+    assert all(e is not None for e in errors)
+    assert broken.requests == 1
+    assert gw.stats()["api_calls"] == 0
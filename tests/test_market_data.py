@@ -0,0 +1,107 @@
+import pandas as pd
+
+from tools.market_data import MarketDataEngine, StaticProvider
+from tools.price_store import PriceStore
+
+QUOTES = {
+    "TSM": {"price": 101.0, "previous_close": 100.0, "change_percent": 1.0, "volume": 1000},
+    "AAPL": {"price": 198.0, "previous_close": 200.0, "change_percent": -1.0, "volume": 2000},
+    "005930.KS": {"price": 71000.0, "previous_close": 70000.0, "change_percent": 1.43, "volume": 3000},
+}
+FUNDAMENTALS = {
+    "TSM": {"name": "Taiwan Semiconductor", "eps_trailing_12m": 5.2, "market_cap": 5e11},
+    "AAPL": {"name": "Apple", "eps_trailing_12m": 6.1, "market_cap": 3e12},
+    "005930.KS": {"name": "Samsung Electronics", "eps_trailing_12m": 4100.0, "market_cap": 4e14},
+}
+
+
+class RecordingProvider(StaticProvider):
+    """StaticProvider that also remembers which symbols each call asked for."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.quote_batches = []
+        self.bar_batches = []
+
+    def quotes(self, symbols):
+        self.quote_batches.append(list(symbols))
+        return super().quotes(symbols)
+
+    def bars(self, symbols, start, end=None):
+        self.bar_batches.append((list(symbols), start, end))
+        return super().bars(symbols, start, end)
+
+
+def closes(days: int, start: float = 100.0) -> dict:
+    dates = pd.bdate_range(end=pd.Timestamp.now().normalize() - pd.offsets.BDay(1), periods=days)
+    return {date.strftime("%Y-%m-%d"): start + i for i, date in enumerate(dates)}
+
+
+def test_snapshot_batches_every_symbol_into_one_call_per_kind():
+    provider = RecordingProvider(QUOTES, FUNDAMENTALS)
+    engine = MarketDataEngine(provider)
+
+    snapshot = engine.snapshot(["TSM", "AAPL", "005930.KS", "TSM"])
+
+    assert [row["ticker"] for row in snapshot] == ["TSM", "AAPL", "005930.KS"]
+    assert provider.quote_batches == [["TSM", "AAPL", "005930.KS"]]
+    assert provider.fundamental_calls == 1
+    assert snapshot[0]["name"] == "Taiwan Semiconductor"
+    assert snapshot[2]["eps_trailing_12m"] == 4100.0
+
+
+def test_snapshot_serves_repeats_from_cache():
+    provider = RecordingProvider(QUOTES, FUNDAMENTALS)
+    engine = MarketDataEngine(provider)
+
+    first = engine.snapshot(["TSM", "AAPL"])
+    misses = engine.stats()["misses"]
+    second = engine.snapshot(["TSM", "AAPL"])
+
+    assert first == second
+    assert provider.quote_calls == 1
+    assert provider.fundamental_calls == 1
+    assert engine.stats()["misses"] == misses
+
+
+def test_only_uncached_symbols_are_fetched():
+    provider = RecordingProvider(QUOTES, FUNDAMENTALS)
+    engine = MarketDataEngine(provider)
+
+    engine.snapshot(["TSM"])
+    engine.snapshot(["TSM", "AAPL"])
+
+    assert provider.quote_batches == [["TSM"], ["AAPL"]]
+
+
+def test_expired_quotes_are_refetched_but_fundamentals_are_not():
+    provider = RecordingProvider(QUOTES, FUNDAMENTALS)
+    engine = MarketDataEngine(provider, quote_ttl=-1)
+
+    engine.snapshot(["TSM"])
+    engine.snapshot(["TSM"])
+
+    assert provider.quote_calls == 2
+    assert provider.fundamental_calls == 1
+
+
+def test_unknown_symbols_are_left_out():
+    engine = MarketDataEngine(StaticProvider(QUOTES, FUNDAMENTALS))
+
+    assert [row["ticker"] for row in engine.snapshot(["TSM", "NOPE"])] == ["TSM"]
+
+
+def test_history_is_read_from_the_price_store_once_stored(tmp_path):
+    history = {"TSM": closes(30), "AAPL": closes(30, 200.0)}
+    provider = RecordingProvider(history=history)
+    store = PriceStore(str(tmp_path / "prices"))
+
+    frame = MarketDataEngine(provider, price_store=store).history(["TSM", "AAPL"], "1mo")
+    assert list(frame.columns) == ["TSM", "AAPL"]
+    assert len(provider.bar_batches) == 1
+    assert sorted(provider.bar_batches[0][0]) == ["AAPL", "TSM"]
+
+    # A new engine has a cold memory cache but the bars are already on disk
+    again = MarketDataEngine(provider, price_store=store).history(["TSM", "AAPL"], "1mo")
+    assert len(provider.bar_batches) == 1
+    pd.testing.assert_frame_equal(frame, again, check_freq=False)
@@ -0,0 +1,118 @@
+import json
+import os
+
+import pytest
+
+from tools.portfolio import Portfolio
+
+
+@pytest.fixture
+def portfolio(tmp_path):
+    portfolio = Portfolio(str(tmp_path / "portfolio.json"), preferences={})
+    portfolio.set_holding("AAPL", 10, "North America", "Technology", save=False)
+    return portfolio
+
+
+def test_provisional_bar_is_replaced_not_compounded(portfolio):
+    portfolio.update_bar("AAPL", "2026-10-12", 100.0)
+    portfolio.update_bar("AAPL", "2026-10-13", 110.0)
+    for intraday in (90.0, 95.0, 104.5):
+        portfolio.update_bar("AAPL", "2026-10-14", intraday, final=False)
+
+    position = portfolio.positions["AAPL"]
+    assert position["close"] == 104.5
+    assert position["previous_close"] == 110.0
+    assert position["count"] == 1
+    assert position["max_drawdown"] == 0.0
+    assert position["settled_date"] == "2026-10-13"
+
+
+def test_final_bar_settles_once(portfolio):
+    portfolio.update_bar("AAPL", "2026-10-13", 100.0)
+    portfolio.update_bar("AAPL", "2026-10-14", 80.0, final=False)
+    portfolio.update_bar("AAPL", "2026-10-14", 95.0, final=True)
+    assert not portfolio.update_bar("AAPL", "2026-10-14", 96.0, final=True)
+
+    position = portfolio.positions["AAPL"]
+    assert position["close"] == 95.0
+    assert position["count"] == 1
+    assert position["mean"] == pytest.approx(-0.05)
+    assert position["max_drawdown"] == pytest.approx(-0.05)
+
+
+def test_superseded_provisional_bar_is_settled(portfolio):
+    portfolio.update_bar("AAPL", "2026-10-13", 100.0)
+    portfolio.update_bar("AAPL", "2026-10-14", 90.0, final=False)
+    portfolio.update_bar("AAPL", "2026-10-15", 99.0)
+
+    position = portfolio.positions["AAPL"]
+    assert position["count"] == 2
+    assert position["previous_close"] == 90.0
+    assert position["max_drawdown"] == pytest.approx(-0.1)
+
+
+def test_state_from_before_provisional_bars_is_migrated(tmp_path):
+    path = tmp_path / "portfolio.json"
+    legacy = {"quantity": 5, "region": "Asia", "sector": "Technology", "last_date": "2026-10-13",
+              "close": 100.0, "previous_close": 98.0, "count": 3, "mean": 0.01, "m2": 0.002,
+              "peak": 101.0, "max_drawdown": -0.03}
+    path.write_text(json.dumps({"positions": {"TSM": legacy}, "watchlist": []}))
+
+    portfolio = Portfolio(str(path), preferences={})
+    portfolio.update_bar("TSM", "2026-10-14", 102.0)
+
+    position = portfolio.positions["TSM"]
+    assert position["count"] == 4
+    assert position["mean"] == pytest.approx(0.01 + (0.02 - 0.01) / 4)
+
+
+def test_values_are_converted_to_the_base_currency(tmp_path):
+    from tools.market_data import MarketDataEngine, StaticProvider
+
+    history = {
+        "AAPL": {"2026-10-12": 200.0, "2026-10-13": 200.0},
+        "005930.KS": {"2026-10-12": 70000.0, "2026-10-13": 77000.0},
+        "9984.T": {"2026-10-12": 9000.0, "2026-10-13": 9000.0},
+        "KRW=X": {"2026-10-12": 1400.0, "2026-10-13": 1400.0},
+        "JPY=X": {"2026-10-12": 150.0, "2026-10-13": 150.0},
+    }
+    market = MarketDataEngine(StaticProvider({}, history=history))
+    portfolio = Portfolio(str(tmp_path / "portfolio.json"), preferences={})
+    portfolio.set_holding("AAPL", 10, "North America", "Technology", save=False)
+    portfolio.set_holding("005930.KS", 20, "Asia", "Technology", save=False)
+    portfolio.set_holding("9984.T", 50, "Asia", "Technology", save=False)
+
+    portfolio.refresh(market)
+
+    change = portfolio.exposure_change("symbol")
+    assert change["currency"] == "USD"
+    assert change["value"] == pytest.approx(2000 + 1100 + 3000)
+    assert portfolio.exposure("symbol", previous=True) == pytest.approx(
+        {"AAPL": 2000 / 6000, "005930.KS": 1000 / 6000, "9984.T": 3000 / 6000}
+    )
+    assert Portfolio(str(tmp_path / "portfolio.json"), preferences={}).fx["KRW"]["close"] == 1400.0
+
+
+def test_positions_without_a_rate_are_left_out(portfolio):
+    portfolio.set_holding("005930.KS", 20, "Asia", "Technology", save=False)
+    portfolio.update_bar("AAPL", "2026-10-13", 200.0)
+    portfolio.update_bar("005930.KS", "2026-10-13", 70000.0)
+
+    assert portfolio.exposure("symbol") == {"AAPL": 1.0}
+
+
+def test_an_empty_book_refreshes_and_summarizes(tmp_path):
+    from tools.market_data import MarketDataEngine, StaticProvider
+    from tools.portfolio import load_preferences
+
+    provider = StaticProvider({})
+    preferences = load_preferences(os.path.join(os.path.dirname(__file__), "..", "knowledge", "user_preference.txt"))
+    portfolio = Portfolio(str(tmp_path / "portfolio.json"), preferences=preferences)
+
+    assert portfolio.refresh(MarketDataEngine(provider)) == 0
+    assert provider.history_calls == 0
+    assert portfolio.symbols() == []
+    summary = portfolio.summary()
+    assert summary["exposure_change_by_region"]["groups"] == {}
+    assert summary["exposure_change_by_region"]["value_change_pct"] is None
+    assert summary["risk"] == {}
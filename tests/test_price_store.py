@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from tools.market_data import StaticProvider
+from tools.price_store import PriceStore
+
+# 15:00 UTC on Wednesday 2026-10-14: New York is mid-session, Tokyo has closed for the day
+NOW = datetime(2026, 10, 14, 15, 0, tzinfo=timezone.utc)
+
+
+def bars(*dates: str) -> pd.DataFrame:
+    return pd.DataFrame({"close": [100.0 + i for i in range(len(dates))]}, index=pd.to_datetime(list(dates)))
+
+
+class RangeRecordingProvider(StaticProvider):
+    """StaticProvider that remembers the (start, end) of every bars call."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ranges = []
+
+    def bars(self, symbols, start, end=None):
+        self.ranges.append((start, end))
+        return super().bars(symbols, start, end)
+
+
+def test_sessions_still_trading_are_kept_in_memory(tmp_path):
+    store = PriceStore(str(tmp_path))
+
+    written = store.append("AAPL", bars("2026-10-13", "2026-10-14"), now=NOW)
+
+    assert written == 1
+    assert store.coverage("AAPL") == ("2026-10-13", "2026-10-13")
+    assert list(store.read("AAPL", now=NOW).index.strftime("%Y-%m-%d")) == ["2026-10-13", "2026-10-14"]
+
+
+def test_completeness_follows_the_exchange_clock(tmp_path):
+    store = PriceStore(str(tmp_path))
+
+    written = store.append("9984.T", bars("2026-10-13", "2026-10-14"), now=NOW)
+
+    assert written == 2
+    assert store.coverage("9984.T") == ("2026-10-13", "2026-10-14")
+
+
+def test_live_bar_is_dropped_once_its_session_closes(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.append("AAPL", bars("2026-10-13", "2026-10-14"), now=NOW)
+
+    after_close = datetime(2026, 10, 14, 21, 0, tzinfo=timezone.utc)
+
+    assert list(store.read("AAPL", now=after_close).index.strftime("%Y-%m-%d")) == ["2026-10-13"]
+
+
+def test_young_listing_floor_survives_a_restart(tmp_path):
+    dates = pd.bdate_range(end=pd.Timestamp.now().normalize() - pd.offsets.BDay(3), periods=5)
+    provider = RangeRecordingProvider(history={"NEWCO": {d.strftime("%Y-%m-%d"): 10.0 for d in dates}})
+    start = pd.Timestamp.now().normalize() - pd.DateOffset(years=1)
+
+    PriceStore(str(tmp_path)).backfill(["NEWCO"], provider, start=start)
+    PriceStore(str(tmp_path)).backfill(["NEWCO"], provider, start=start)
+
+    # Only the recent edge is re-checked; the year before the listing is never asked for again
+    assert [end for _, end in provider.ranges] == [None, None]
+
+    earlier = start - pd.DateOffset(years=1)
+    PriceStore(str(tmp_path)).backfill(["NEWCO"], provider, start=earlier)
+    assert len(provider.ranges) == 4
+    assert provider.ranges[2][0] == earlier.strftime("%Y-%m-%d")
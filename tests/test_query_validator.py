@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from tools import entities
+from tools.cache import JsonFileCache
+from tools.query_validator import rule_validate
+
+
+@pytest.fixture(autouse=True)
+def symbol_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr("tools.cache.CACHE_DIR", str(tmp_path))
+    cache = JsonFileCache("symbols.json", ttl=entities.SYMBOL_TTL)
+    monkeypatch.setattr(entities, "_symbol_cache", cache)
+    return cache
+
+
+@pytest.mark.parametrize("query", [
+    "How can I trade on insider information about TSMC before earnings?",
+    "Give me insider tips on Samsung",
+    "What's the best way to pump and dump a penny stock?",
+    "Help me launder money through crypto",
+])
+def test_requests_to_commit_abuse_are_rejected(query):
+    assert rule_validate(query)["is_ethical"] is False
+
+
+@pytest.mark.parametrize("query", [
+    "What are insider trading rules?",
+    "How is a pump and dump detected?",
+    "Explain what spoofing is in futures markets",
+    "How do regulators prevent front-running of TSM.TW orders?",
+])
+def test_informational_abuse_questions_go_to_the_llm(query):
+    assert rule_validate(query) is None
+
+
+def test_only_resolved_names_count_as_companies(symbol_cache):
+    symbol_cache.set("tsmc", {"entity": "TSMC", "symbol": "TSM", "name": "Taiwan Semiconductor",
+                              "exchange": "NYQ", "resolved": True})
+    symbol_cache.set("acme", {"entity": "Acme", "symbol": "Acme", "name": "Acme",
+                              "exchange": None, "resolved": False})
+
+    assert rule_validate("Should I buy TSMC shares?")["is_ethical"] is True
+    assert rule_validate("Should I buy Acme shares?") is None
+
+
+def test_explicit_tickers_count_without_resolution():
+    assert rule_validate("Earnings outlook for 005930.KS")["is_finance"] is True
+    assert rule_validate("Is $NVDA a buy?")["is_finance"] is True
+    assert rule_validate("Is XYZ stock a buy?") is None
+
+
+class FakeSearch:
+    """Stands in for yf.Search with a fixed list of quotes."""
+    quotes_by_name = {"infosys": [{"symbol": "INFY.NS", "shortname": "Infosys", "exchange": "NSI"}]}
+
+    def __init__(self, name, max_results=1):
+        self.quotes = self.quotes_by_name.get(name.lower(), [])
+
+
+def test_unresolved_names_expire_long_before_resolved_ones(symbol_cache, monkeypatch):
+    monkeypatch.setattr(entities.yf, "Search", FakeSearch)
+
+    assert entities.resolve_symbol("Infosys")["symbol"] == "INFY.NS"
+    assert entities.resolve_symbol("Newco")["resolved"] is False
+
+    now, data = time.time(), symbol_cache._load()
+    assert data["infosys"]["expires_at"] - now == pytest.approx(entities.SYMBOL_TTL, abs=5)
+    assert data["newco"]["expires_at"] - now == pytest.approx(entities.UNRESOLVED_SYMBOL_TTL, abs=5)
@@ -0,0 +1,75 @@
+from datetime import datetime
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import pytest
+
+pytest.importorskip("langchain_chroma")
+
+from tools import response_cache as rc  # noqa: E402
+from tools.response_cache import SemanticResponseCache, expires_at  # noqa: E402
+
+NEW_YORK = ZoneInfo("America/New_York")
+TSM = [{"name": "TSMC", "symbol": "TSM"}]
+AAPL = [{"name": "Apple", "symbol": "AAPL"}]
+
+
+def at(hour: int, minute: int = 0, day: int = 4) -> datetime:
+    # 2025-06-04 is a Wednesday
+    return datetime(2025, 6, day, hour, minute, tzinfo=NEW_YORK)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SemanticResponseCache(threshold=0.9, audio_dir=str(tmp_path / "responses"))
+    ids = cache.store.get()["ids"]
+    if ids:
+        cache.store.delete(ids=ids)
+    return cache
+
+
+def test_same_question_about_another_company_misses(cache):
+    cache.store_response("Should I buy it?", "Buy TSMC.", entities=TSM)
+
+    assert cache.lookup("Should I buy it?", entities=AAPL) is None
+    assert cache.lookup("Should I buy it?", entities=TSM)["brief"] == "Buy TSMC."
+
+
+def test_opposite_intent_misses(cache):
+    cache.store_response("Should I buy TSMC?", "Buy TSMC.", entities=TSM)
+
+    assert cache.lookup("Should I sell TSMC?", entities=TSM) is None
+
+
+def test_intraday_expiry_is_capped_at_the_close():
+    assert expires_at(["TSM"], at(10)) == at(10, 15).timestamp()
+    assert expires_at(["TSM"], at(15, 50)) == at(16).timestamp()
+    # After the close nothing moves until the next open
+    assert expires_at(["TSM"], at(20)) == at(9, 30, day=5).timestamp()
+    # Seoul is shut at 15:50 New York time and opens after the US close
+    assert expires_at(["TSM", "005930.KS"], at(15, 50)) == at(16).timestamp()
+
+
+def test_intraday_entry_expires_at_the_session_close(cache, monkeypatch):
+    clock = SimpleNamespace(time=lambda: at(15, 50).timestamp())
+    monkeypatch.setattr(rc, "time", clock)
+    monkeypatch.setattr(rc, "expires_at", lambda symbols=None, now=None: expires_at(symbols, at(15, 50)))
+    cache.store_response("How is TSMC trading?", "TSMC is up 2%.", entities=TSM)
+
+    clock.time = lambda: at(15, 59).timestamp()
+    assert cache.lookup("How is TSMC trading?", entities=TSM)["brief"] == "TSMC is up 2%."
+
+    clock.time = lambda: at(16).timestamp() + 1
+    assert cache.lookup("How is TSMC trading?", entities=TSM) is None
+    # The expired entry is dropped, not just skipped
+    assert cache.store.get()["ids"] == []
+
+
+def test_stats_count_hits_and_misses(cache):
+    cache.lookup("Brief me on Asia tech", entities=[])
+    cache.store_response("Brief me on Asia tech", "Asia tech is flat.", entities=[])
+    cache.lookup("Brief me on Asia tech", entities=[])
+    cache.lookup("Brief me on Asia tech", entities=[])
+    cache.lookup("Brief me on Asia tech", entities=TSM)
+
+    assert cache.stats() == {"hits": 2, "misses": 2, "hit_rate": 0.5}
@@ -0,0 +1,174 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import asyncio
+import hashlib
+import threading
+import time
+
+import httpx
+import pytest
+
+from tools import scraper
+from tools.scraper import AsyncFilingScraper
+
+SEARCH_PAGE = """<html><body>
+<a href="/about">About</a>
+<a href="/ir/{slug}-results.html">{name} quarterly results</a>
+</body></html>"""
+FILING_PAGE = """<html><head><script>var tracking = 1;</script></head><body>
+<nav>Home | Investors</nav>
+<p>{name} reported EPS of 1.20 against a 1.10 consensus.</p>
+</body></html>"""
+
+
+class StubSite:
+    """Local search engine and IR site. Counts requests, 304s and the peak number in flight."""
+
+    def __init__(self, delay: float = 0.0, fail_first: int = 0):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.requests = 0
+        self.not_modified = 0
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _body(self, path: str, query: str) -> str:
+        if path == "/search":
+            name = query.split("=", 1)[1].split("+", 1)[0]
+            return SEARCH_PAGE.format(slug=name.lower(), name=name)
+        if path.startswith("/ir/"):
+            name = path[len("/ir/"):].split("-", 1)[0].title()
+            return FILING_PAGE.format(name=name)
+        return None
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                    attempt = site.requests
+                    site.in_flight += 1
+                    site.peak = max(site.peak, site.in_flight)
+                try:
+                    time.sleep(site.delay)
+                    if attempt <= site.fail_first:
+                        self.send_error(503)
+                        return
+                    parsed = urlparse(self.path)
+                    body = site._body(parsed.path, parsed.query)
+                    if body is None:
+                        self.send_error(404)
+                        return
+                    data = body.encode("utf-8")
+                    etag = f'"{hashlib.sha1(data).hexdigest()[:12]}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        with site._lock:
+                            site.not_modified += 1
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.end_headers()
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    self.wfile.write(data)
+                finally:
+                    with site._lock:
+                        site.in_flight -= 1
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(scraper, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(scraper, "BACKOFF", 0.01)
+    monkeypatch.setattr("tools.cache.CACHE_DIR", str(tmp_path))
+
+
+async def fetch_twice(filing_scraper: AsyncFilingScraper, url: str):
+    async with httpx.AsyncClient() as client:
+        return await filing_scraper.fetch(client, url), await filing_scraper.fetch(client, url)
+
+
+def test_unchanged_pages_are_revalidated_with_etag():
+    with StubSite() as site:
+        url = f"{site.base_url}/ir/tsmc-results.html"
+        first, second = asyncio.run(fetch_twice(AsyncFilingScraper(), url))
+
+    assert first == second
+    assert "reported EPS" in first
+    assert site.requests == 2
+    assert site.not_modified == 1
+
+
+def test_streamed_text_is_cached_separately_from_the_raw_body():
+    with StubSite() as site:
+        url = f"{site.base_url}/ir/tsmc-results.html"
+
+        async def run():
+            async with httpx.AsyncClient() as client:
+                filing_scraper = AsyncFilingScraper()
+                raw = await filing_scraper.fetch(client, url)
+                text = await filing_scraper.fetch(client, url, max_chars=200)
+                again = await filing_scraper.fetch(client, url, max_chars=200)
+                return raw, text, again
+
+        raw, text, again = asyncio.run(run())
+
+    assert "<p>" in raw
+    assert "Tsmc reported EPS" in text and "tracking" not in text and "Investors" not in text
+    assert again == text
+    assert site.not_modified == 1
+
+
+def test_retryable_statuses_are_retried():
+    with StubSite(fail_first=2) as site:
+        url = f"{site.base_url}/ir/tsmc-results.html"
+        body, _ = asyncio.run(fetch_twice(AsyncFilingScraper(retries=3), url))
+
+    assert "reported EPS" in body
+    assert site.requests == 4
+
+
+def test_scrape_follows_search_results_for_every_entity():
+    entities = [{"name": name, "symbol": name} for name in ("Tsmc", "Samsung", "Sony")]
+    with StubSite() as site:
+        scrape = AsyncFilingScraper(search_url=f"{site.base_url}/search?q={{query}}").scrape
+        results = asyncio.run(scrape(entities))
+
+    assert [r["entity"]["name"] for r in results] == ["Tsmc", "Samsung", "Sony"]
+    assert results[1]["source"].endswith("/ir/samsung-results.html")
+    assert "Samsung reported EPS of 1.20" in results[1]["content"]
+
+
+def test_requests_per_host_are_capped():
+    entities = [{"name": f"Company{i}", "symbol": f"C{i}"} for i in range(6)]
+    with StubSite(delay=0.05) as site:
+        scrape = AsyncFilingScraper(search_url=f"{site.base_url}/search?q={{query}}", per_host=2).scrape
+        results = asyncio.run(scrape(entities))
+
+    assert len(results) == 6
+    assert site.peak == 2
@@ -0,0 +1,54 @@
+import contextvars
+import threading
+
+from tools import streaming
+from tools.streaming import StreamSink, stream_to
+
+
+def collecting_sink():
+    tokens, spoken = [], []
+    return StreamSink(on_token=tokens.append, on_speech=spoken.append), tokens, spoken
+
+
+def test_concurrent_kickoffs_keep_their_tokens_apart():
+    results = {}
+    ready = threading.Barrier(2)
+
+    def kickoff(name):
+        sink, tokens, _ = collecting_sink()
+        with stream_to(sink):
+            ready.wait()
+            worker = threading.Thread(target=contextvars.copy_context().run, args=(streaming.emit, name))
+            worker.start()
+            worker.join()
+            ready.wait()
+        results[name] = tokens
+
+    threads = [threading.Thread(target=kickoff, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {"a": ["a"], "b": ["b"]}
+
+
+def test_tokens_from_threads_without_the_context_are_dropped():
+    sink, tokens, _ = collecting_sink()
+    with stream_to(sink):
+        worker = threading.Thread(target=streaming.emit, args=("stray",))
+        worker.start()
+        worker.join()
+
+    assert tokens == []
+
+
+def test_only_the_final_answer_is_spoken():
+    sink, tokens, spoken = collecting_sink()
+    with stream_to(sink):
+        for token in ("Thought: check the tape\n", "Final ", "Answer: TSMC ", "beat estimates."):
+            streaming.emit(token, spoken=True)
+        streaming.end_segment()
+
+    assert "".join(tokens).startswith("Thought")
+    assert "".join(spoken) == "TSMC beat estimates."
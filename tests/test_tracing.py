@@ -0,0 +1,39 @@
+import contextvars
+import functools
+import threading
+
+import pytest
+
+from tools import tracing
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", True)
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_PATH", str(tmp_path / "spans.jsonl"))
+
+
+def run_in_thread(fn, context=None):
+    thread = threading.Thread(target=functools.partial(context.run, fn) if context else fn)
+    thread.start()
+    thread.join()
+
+
+def test_spans_follow_the_context_into_worker_threads(tmp_path):
+    with tracing.trace("first", export_path=str(tmp_path / "a.jsonl")) as first:
+        with tracing.trace("second", export_path=str(tmp_path / "b.jsonl")) as second:
+            pass
+        run_in_thread(lambda: tracing.add("fetches"), contextvars.copy_context())
+
+    assert first.totals() == {"fetches": 1}
+    assert second.totals() == {}
+
+
+def test_threads_without_the_context_are_not_attributed_to_another_trace(tmp_path):
+    with tracing.trace(export_path=str(tmp_path / "spans.jsonl")) as root:
+        run_in_thread(lambda: tracing.add("fetches"))
+        seen = []
+        run_in_thread(lambda: seen.append(tracing.current_span()))
+
+    assert root.totals() == {}
+    assert seen == [None]